@@ -170,11 +170,46 @@ export const update_monthly_finalized_profit = async (MonthlyProfitData: Monthly
 }
 
 
-export const distribute_profit = async () => {
-  const response = await api.post('/distribute_profit/')
+export interface JobStatus {
+  job_id: number
+  job_type: string
+  status: 'PENDING' | 'RUNNING' | 'SUCCEEDED' | 'FAILED'
+  rows_total: number
+  rows_processed: number
+  rows_remaining: number
+  elapsed_seconds: number
+  result: any
+  error: string
+}
+
+const JOB_POLL_INTERVAL_MS = 2000
+
+export const getJobStatus = async (jobId: number): Promise<JobStatus> => {
+  const response = await api.get(`/job_status/${jobId}/`)
   return response.data
 }
 
+// Long-running admin operations are queued as background jobs (HTTP 202).
+// Poll until the job finishes and resolve with its result; a failed job is
+// rejected in the same shape as a 400 response so callers keep their handling.
+export const waitForJob = async (job: JobStatus, onProgress?: (job: JobStatus) => void) => {
+  let current = job
+  while (current.status === 'PENDING' || current.status === 'RUNNING') {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+    current = await getJobStatus(job.job_id)
+    onProgress?.(current)
+  }
+  if (current.status === 'FAILED') {
+    throw { response: { status: 400, data: { error: current.error } } }
+  }
+  return current.result
+}
+
+export const distribute_profit = async (onProgress?: (job: JobStatus) => void) => {
+  const response = await api.post('/distribute_profit/')
+  return waitForJob(response.data, onProgress)
+}
+
 interface SetupUserRes {
   userID: string
   username: string
@@ -221,8 +256,15 @@ export const updateUserInfo = async (data: updateUserInfoRes) => {
 }
 
 
-export const getPendingTX = async () => {
-  const response = await api.get('/get_pending_transaction/')
+export const getPendingTX = async (params: dataParams = {}) => {
+  const { page = 1, pageSize } = params
+  const queryParams = new URLSearchParams()
+  if (pageSize) {
+    queryParams.append('page_size', pageSize.toString())
+  }
+  queryParams.append('page', page.toString())
+
+  const response = await api.get(`/get_pending_transaction/?${queryParams.toString()}`)
   return response.data
 }
 
@@ -428,8 +470,12 @@ export const putPerformance = async (data: PerformanceData) => {
 }
 
 
-export const getWDReq = async (params: paramsExportTx) => {
-  const { search, status, startDate, endDate, month, year } = params
+interface paramsWDReq extends paramsExportTx {
+  page?: number
+  pageSize?: number
+}
+export const getWDReq = async (params: paramsWDReq) => {
+  const { search, status, startDate, endDate, month, year, page = 1, pageSize } = params
 
   const queryParams = new URLSearchParams()
   if (search) {
@@ -448,6 +494,10 @@ export const getWDReq = async (params: paramsExportTx) => {
     queryParams.append('month', month.toString())
     queryParams.append('year', year.toString())
   }
+  if (pageSize) {
+    queryParams.append('page_size', pageSize.toString())
+  }
+  queryParams.append('page', page.toString())
 
   const response = await api.get(`/all_withdrawal_requests/?${queryParams.toString()}`)
   return response.data
@@ -509,14 +559,14 @@ export const updateWithdrawalWindow = async () => {
   return response.data
 }
 
-export const revokeProfitDistribution = async () => {
+export const revokeProfitDistribution = async (onProgress?: (job: JobStatus) => void) => {
   const response = await api.post('/revoke_profit_distribution/')
-  return response.data
+  return waitForJob(response.data, onProgress)
 }
 
-export const removeWelcomeBonus = async () => {
+export const removeWelcomeBonus = async (onProgress?: (job: JobStatus) => void) => {
   const response = await api.post('/remove_welcome_bonus/')
-  return response.data
+  return waitForJob(response.data, onProgress)
 }
 
 export const getRemoveWelcomeBonusCount = async () => {
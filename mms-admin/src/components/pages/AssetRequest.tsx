@@ -5,7 +5,7 @@ import Buttons from "../props/Buttons";
 import dayjs from "dayjs";
 import utc from "dayjs/plugin/utc"
 import timezone from "dayjs/plugin/timezone";
-import { Tables } from "../props/Tables";
+import { PageControls, Tables } from "../props/Tables";
 import { NotiErrorAlert, NotiSuccessAlert } from "../props/Noti";
 dayjs.extend(utc);
 dayjs.extend(timezone);
@@ -32,13 +32,19 @@ const AssetRequest = () => {
   const [errorMessage, setErrorMessage] = useState<string>('')
 
   const [transactions, setTransactions] = useState<Transaction[]>([])
+  const [page, setPage] = useState<number>(1)
+  const [pageSize, setPageSize] = useState<number>(30)
+  const [hasNextPage, setHasNextPage] = useState<boolean>(false)
+  const [totalCount, setTotalCount] = useState<number>(0)
 
   const fetchData = async () => {
     try {
       setLoading(true)
-      const response = await getPendingTX()
+      const response = await getPendingTX({ page, pageSize })
+      setHasNextPage(Boolean(response.next))
+      setTotalCount(response.count ?? 0)
 
-      const formattedData = response.map((req: any) => {
+      const formattedData = (response.results || []).map((req: any) => {
         const dt = dayjs.utc(req.created_at).tz("Asia/Kuala_Lumpur");
         return {
           ...req,
@@ -63,7 +69,7 @@ const AssetRequest = () => {
 
   useEffect(() => {
     fetchData()
-  }, [])
+  }, [page, pageSize])
 
 
   const handleApprove = (id: string) => {
@@ -232,6 +238,18 @@ const AssetRequest = () => {
 
       <Tables columns={columns} data={transactions}
       />
+
+      <PageControls
+        page={page}
+        pageSize={pageSize}
+        hasNextPage={hasNextPage}
+        totalCount={totalCount}
+        onPageChange={setPage}
+        onPageSizeChange={size => {
+          setPageSize(size)
+          setPage(1)
+        }}
+      />
     </div>
   )
 }
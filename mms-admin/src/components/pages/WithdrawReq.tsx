@@ -5,7 +5,7 @@ import Buttons from "../props/Buttons";
 import dayjs from "dayjs";
 import utc from "dayjs/plugin/utc";
 import timezone from "dayjs/plugin/timezone";
-import { Tables } from "../props/Tables";
+import { PageControls, Tables } from "../props/Tables";
 import { Inputss } from "../props/Formss";
 import { FixedText } from "../props/Textt";
 import { NotiErrorAlert, NotiSuccessAlert } from "../props/Noti";
@@ -48,6 +48,10 @@ const WithdrawReq = () => {
   const [transactions, setTransactions] = useState<Transaction[]>([])
   const [debouncedSearch, setDebouncedSearch] = useState(search)
   const [totalActWd, setTotalActWd] = useState<number>(0)
+  const [page, setPage] = useState<number>(1)
+  const [pageSize, setPageSize] = useState<number>(30)
+  const [hasNextPage, setHasNextPage] = useState<boolean>(false)
+  const [totalCount, setTotalCount] = useState<number>(0)
 
   type pointType = 'PROFIT' | 'COMMISSION' | 'ASSET'
   const [point, setPoint] = useState<pointType[]>()
@@ -65,9 +69,13 @@ const WithdrawReq = () => {
         startDate,
         endDate,
         month: Number(dayjs(selectedMonthYear).month() + 1) || dateM, 
-        year: Number(dayjs(selectedMonthYear).year()) || dateY
+        year: Number(dayjs(selectedMonthYear).year()) || dateY,
+        page,
+        pageSize,
       })
       setTotalActWd(response.total_actual_wd)
+      setHasNextPage(Boolean(response.next))
+      setTotalCount(response.count ?? 0)
       const results = response.results || []; // fallback to empty array
 
       const formattedData = results.map((user: any) => {
@@ -98,6 +106,11 @@ const WithdrawReq = () => {
 
   useEffect(() => {
     fetchData()
+  }, [debouncedSearch, status, startDate, endDate, selectedMonthYear, page, pageSize])
+
+  // Back to the first page when the filters change
+  useEffect(() => {
+    setPage(1)
   }, [debouncedSearch, status, startDate, endDate, selectedMonthYear])
 
   // Debounced search to avoid excessive API calls
@@ -370,6 +383,18 @@ const WithdrawReq = () => {
       {errorMessage && <span className="text-sm text-red-500">{errorMessage}</span> }
 
       <Tables columns={columns} data={data} />
+
+      <PageControls
+        page={page}
+        pageSize={pageSize}
+        hasNextPage={hasNextPage}
+        totalCount={totalCount}
+        onPageChange={setPage}
+        onPageSizeChange={size => {
+          setPageSize(size)
+          setPage(1)
+        }}
+      />
     </div>
   )
 }
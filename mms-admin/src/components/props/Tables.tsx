@@ -148,6 +148,59 @@ export const Tables = ({
   );
 };
 
+interface PageControlsProps {
+  page: number
+  pageSize: number
+  hasNextPage: boolean
+  totalCount?: number
+  onPageChange: (page: number) => void
+  onPageSizeChange: (pageSize: number) => void
+}
+
+// Prev / Next and page size for the server-paginated queues (page, page_size, next)
+export const PageControls = ({
+  page,
+  pageSize,
+  hasNextPage,
+  totalCount,
+  onPageChange,
+  onPageSizeChange,
+}: PageControlsProps) => {
+  return (
+    <div className="flex justify-end items-center mt-2 space-x-2 text-white">
+      {totalCount !== undefined && (
+        <span className="px-3 py-1 text-sm">{totalCount} total</span>
+      )}
+      <button
+        disabled={page === 1}
+        onClick={() => onPageChange(Math.max(page - 1, 1))}
+        className="px-3 py-1 border rounded disabled:opacity-50"
+      >
+        Prev
+      </button>
+      <span className="px-3 py-1">Page {page}</span>
+      <button
+        disabled={!hasNextPage}
+        onClick={() => onPageChange(page + 1)}
+        className="px-3 py-1 border rounded disabled:opacity-50"
+      >
+        Next
+      </button>
+      <select
+        className="border rounded px-2 py-1 text-xs cursor-pointer text-black"
+        value={pageSize}
+        onChange={e => onPageSizeChange(Number(e.target.value))}
+      >
+        {[30, 40, 50, 100].map(size => (
+          <option key={size} value={size}>
+            Show {size}
+          </option>
+        ))}
+      </select>
+    </div>
+  )
+}
+
 ////////////////////////////////////////////////////
 
 export const RequestTable = ({ columns, data, emptyMessage = "No data available" }: TablesProps) => {
@@ -0,0 +1,127 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class RequestMetrics:
+    """
+    Per-route samples of the most recent requests handled by this process.
+    Each gunicorn worker keeps its own copy.
+    """
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._counts = defaultdict(int)
+
+    def record(self, route, total_ms, db_ms, queries, size):
+        with self._lock:
+            self._samples[route].append((total_ms, db_ms, queries, size))
+            self._counts[route] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {route: list(samples) for route, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        routes = []
+        for route, samples in snapshot.items():
+            total_ms = sorted(sample[0] for sample in samples)
+            db_ms = sorted(sample[1] for sample in samples)
+            queries = sorted(sample[2] for sample in samples)
+            sizes = [sample[3] for sample in samples]
+            routes.append({
+                'route': route,
+                'requests': counts[route],
+                'samples': len(samples),
+                'total_ms': {f'p{pct}': round(_percentile(total_ms, pct), 1) for pct in PERCENTILES},
+                'db_ms': {f'p{pct}': round(_percentile(db_ms, pct), 1) for pct in PERCENTILES},
+                'queries': {'p50': _percentile(queries, 50), 'p95': _percentile(queries, 95), 'max': queries[-1]},
+                'avg_response_bytes': round(sum(sizes) / len(sizes)),
+            })
+        routes.sort(key=lambda row: row['total_ms']['p95'], reverse=True)
+        return routes
+
+
+request_metrics = RequestMetrics(max_samples=getattr(settings, 'REQUEST_METRICS_SAMPLES', 1000))
+
+
+class QueryMetricsMiddleware:
+    """
+    Measures every request: SQL query count, DB time, total time and
+    response size. Logs requests slower than REQUEST_METRICS_SLOW_MS and
+    feeds the per-route percentiles served by the admin request_metrics
+    endpoint. The timings go out as a Server-Timing header only to staff
+    users, or to everyone with REQUEST_METRICS_SERVER_TIMING on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000)
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        stats = {'queries': 0, 'db_seconds': 0.0}
+
+        def track_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['queries'] += 1
+                stats['db_seconds'] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(track_query))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats['db_seconds'] * 1000
+
+        if response.streaming:
+            # Body is produced after this point; queries made while streaming are not counted
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+
+        # DRF sets request.user once the view has authenticated the request
+        if self.server_timing or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{stats["queries"]} queries", app;dur={total_ms:.1f}'
+            )
+
+        match = getattr(request, 'resolver_match', None)
+        route = f"{request.method} /{match.route}" if match else f"{request.method} (unresolved)"
+        request_metrics.record(route, total_ms, db_ms, stats['queries'], size)
+
+        if total_ms >= self.slow_ms:
+            logger.warning(
+                f"Slow request {route} ({request.get_full_path()}): status={response.status_code} "
+                f"total={total_ms:.0f}ms db={db_ms:.0f}ms queries={stats['queries']} size={size}"
+            )
+        return response
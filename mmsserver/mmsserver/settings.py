@@ -100,6 +100,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mmsserver.middleware.query_metrics.QueryMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -111,6 +112,15 @@ MIDDLEWARE = [
     'mmsserver.middleware.security_headers.SecurityHeadersMiddleware',
 ]
 
+# Request instrumentation (mmsserver.middleware.query_metrics)
+REQUEST_METRICS_SLOW_MS = env_to_int('REQUEST_METRICS_SLOW_MS', 1000) # Log requests slower than this
+REQUEST_METRICS_SAMPLES = env_to_int('REQUEST_METRICS_SAMPLES', 1000) # Recent requests kept per route for percentiles
+REQUEST_METRICS_SERVER_TIMING = env_to_bool('REQUEST_METRICS_SERVER_TIMING', False) # Server-Timing header on every response, not only staff's
+
+# Validated token cache of server.authentication.JWTDeviceAuthentication
+AUTH_TOKEN_CACHE_TTL = env_to_int('AUTH_TOKEN_CACHE_TTL', 60) # Seconds a validated token skips the UserJWT / User lookups
+AUTH_REVOCATION_POLL_SECONDS = env_to_int('AUTH_REVOCATION_POLL_SECONDS', 1) # Delay before other workers see a revocation
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -189,6 +199,37 @@ else:
         }
     }
 
+# Caches
+# 'balances' holds the per-user wallet / asset read cache (server/balance_cache.py). Entries
+# are invalidated by the worker that writes the balance, so they need a store shared by all
+# gunicorn workers: Redis when REDIS_URL is set, process-local memory only under DEBUG.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'balances': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'mms',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'balances': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' if DEBUG else 'django.core.cache.backends.dummy.DummyCache',
+            'LOCATION': 'balances',
+        },
+    }
+BALANCE_CACHE_TTL = env_to_int('BALANCE_CACHE_TTL', 300) # Seconds; upper bound on staleness if an invalidation is lost
+REFERENCE_DATA_TTL = env_to_int('REFERENCE_DATA_TTL', 300) # Seconds; bounds staleness when workers do not share the default cache
+REFERENCE_DATA_POLL_SECONDS = env_to_int('REFERENCE_DATA_POLL_SECONDS', 1) # Delay before other workers see a reference data change
+
 RECAPTCHA_SECRET_KEY = os.getenv('RECAPTCHA_SECRET_KEY')
 
 #DEFAULT_FILE_STORAGE = os.getenv('DEFAULT_FILE_STORAGE')
@@ -4,4 +4,6 @@ from .models import *
 # Register your models here.
 admin.site.register(User)
 admin.site.register(Wallet)
-admin.site.register(Transaction)
\ No newline at end of file
+admin.site.register(Transaction)
+admin.site.register(Job)
+admin.site.register(DistributionCheckpoint)
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ServerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'server'
+
+    def ready(self):
+        # Connects the signal receivers that keep the dashboard counters, ledger rollup,
+        # balance cache, reference data cache and validated token cache up to date
+        from . import authentication, balance_cache, dashboard, ledger, reference_data  # noqa: F401
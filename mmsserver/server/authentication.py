@@ -1,18 +1,119 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.conf import settings
-from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
-from .models import UserJWT
+from rest_framework_simplejwt.settings import api_settings
+from .local_cache import MISSING, VersionedLocalCache
+from .models import User, UserJWT
 from .utils import get_client_ip
+from functools import lru_cache
+import copy
 import hashlib
+import time
 
+# Validated tokens are trusted for this long without going back to UserJWT / User
+AUTH_TOKEN_CACHE_TTL = getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+AUTH_TOKEN_CACHE_SIZE = 10000
+# How often each worker checks the shared revocation version in the default cache
+AUTH_REVOCATION_POLL_SECONDS = getattr(settings, 'AUTH_REVOCATION_POLL_SECONDS', 1)
+REVOCATION_VERSION_KEY = 'auth:revocation_version'
+
+# Sent after UserJWT rows are revoked (deleted), once the deletion is committed
+tokens_revoked = Signal()
+
+
+@lru_cache(maxsize=4096)
+def _client_hashes(ip, ua):
+  """(ip_hash, ua_hash) of a client, as carried in the token claims. Memoised per client."""
+  return (
+    hashlib.sha256(f"{ip}{settings.SECRET_KEY}".encode()).hexdigest(),
+    hashlib.sha256(ua.encode()).hexdigest(),
+  )
+
+
+class ValidatedTokenCache(VersionedLocalCache):
+  """
+  Per-process cache of tokens that passed the UserJWT check,
+  {(jti, device fingerprint): (expiry, user)}. Entries live for at most
+  AUTH_TOKEN_CACHE_TTL seconds and never past the token's own exp. The whole
+  cache is dropped when this process revokes tokens, and within
+  AUTH_REVOCATION_POLL_SECONDS when another worker does (through the shared
+  revocation version, see local_cache.py). Tokens are revoked on logout, and
+  for every session of a user who is deactivated, deleted or changes password.
+  """
+
+  def get(self, key):
+    user = self.lookup(key)
+    return None if user is MISSING else user
+
+  def set(self, key, user, token_exp, version):
+    """Stores user for key, unless a revocation happened since `version` was read."""
+    self.store(key, user, version, ttl=(token_exp or 0) - time.time())
+
+
+validated_tokens = ValidatedTokenCache(
+  REVOCATION_VERSION_KEY, AUTH_TOKEN_CACHE_TTL, AUTH_TOKEN_CACHE_SIZE, AUTH_REVOCATION_POLL_SECONDS, 'token revocation',
+)
+
+
+def revoke_tokens(queryset):
+  """
+  Deletes the given UserJWT rows; once committed, tokens_revoked clears the
+  validated token caches of every worker. Returns the number of rows deleted.
+  """
+  user_ids = set(queryset.values_list('user_id', flat=True))
+  deleted, _ = queryset.delete()
+  if deleted:
+    db_transaction.on_commit(lambda: tokens_revoked.send(sender=UserJWT, user_ids=user_ids))
+  return deleted
+
+
+def revoke_user_tokens(user_ids):
+  """Revokes every token of the given users, see revoke_tokens."""
+  return revoke_tokens(UserJWT.objects.filter(user_id__in=list(user_ids)))
+
+
+def _remember_auth_state(sender, instance, raw=False, update_fields=None, **kwargs):
+  if raw or instance._state.adding:
+    return
+  if update_fields is not None and not {'is_active', 'password'} & set(update_fields):
+    return
+  instance._auth_old_state = sender._base_manager.filter(pk=instance.pk).values('is_active', 'password').first()
+
+
+def _revoke_on_credentials_change(sender, instance, raw=False, **kwargs):
+  """A deactivated user or a changed password ends every session of the user."""
+  old_state = instance.__dict__.pop('_auth_old_state', None)
+  if raw or old_state is None:
+    return
+  if (old_state['is_active'] and not instance.is_active) or old_state['password'] != instance.password:
+    revoke_user_tokens([instance.pk])
+
+
+def _revoke_on_user_delete(sender, instance, **kwargs):
+  # The UserJWT rows go with the user (CASCADE); only the caches need clearing
+  user_ids = {instance.pk}
+  db_transaction.on_commit(lambda: tokens_revoked.send(sender=User, user_ids=user_ids))
+
+
+pre_save.connect(_remember_auth_state, sender=User, dispatch_uid='auth_pre_save_User')
+post_save.connect(_revoke_on_credentials_change, sender=User, dispatch_uid='auth_post_save_User')
+post_delete.connect(_revoke_on_user_delete, sender=User, dispatch_uid='auth_post_delete_User')
+
+
+@receiver(tokens_revoked)
+def _bump_revocation_version(sender, **kwargs):
+  validated_tokens.publish_version()
 
 
 class JWTDeviceAuthentication(JWTAuthentication):
   """
-  An authentication backend that authenticates users with a JWT cookie.
+  An authentication backend that authenticates users with a JWT bound to the
+  client's IP / user agent and to a live UserJWT row (looked up by jti).
   """
-  def authenticate(self, request):    
+  def authenticate(self, request):
     # Get token from Authorization header only
     header = self.get_header(request)
     if header is None:
@@ -30,44 +131,53 @@ class JWTDeviceAuthentication(JWTAuthentication):
 
   def _validate_user_and_token(self, request, token):
       """Common validation for tokens"""
-      user = self.get_user(token)
+      ip_hash, ua_hash = _client_hashes(get_client_ip(request), request.META.get('HTTP_USER_AGENT', ''))
+      fingerprint = ua_hash[:16] + ip_hash[:16]
+      jti = token.payload.get(api_settings.JTI_CLAIM)
+
+      user = validated_tokens.get((jti, fingerprint))
       if user is None:
-          raise AuthenticationFailed('User not found')
+          version = validated_tokens.version
+          user = self.get_user(token)
+          if user is None:
+              raise AuthenticationFailed('User not found')
 
-      # Verify token binding
-      if not self._verify_token_binding(request, token):
-          raise AuthenticationFailed('Invalid device binding')
+          # Verify token binding
+          if not self._verify_token_binding(token, ip_hash, ua_hash):
+              raise AuthenticationFailed('Invalid device binding')
 
-      # Verify token in database
-      if not UserJWT.objects.filter(
-          user=user,
-          access_token=str(token),
-          device_fingerprint=self._get_device_fingerprint(request)
-      ).exists():
-          raise AuthenticationFailed('Token revoked')
+          # Verify token in database
+          if not jti or not UserJWT.objects.filter(
+              access_jti=jti,
+              user=user,
+              device_fingerprint=fingerprint
+          ).exists():
+              raise AuthenticationFailed('Token revoked')
 
-      return (user, token)
+          validated_tokens.set((jti, fingerprint), user, token.payload.get('exp'), version)
+      elif not self._verify_token_binding(token, ip_hash, ua_hash):
+          raise AuthenticationFailed('Invalid device binding')
+
+      # Each request gets its own instance; the cached one is shared between threads
+      return (copy.copy(user), token)
 
-  def _verify_token_binding(self, request, token):
+  def _verify_token_binding(self, token, current_ip_hash, current_ua_hash):
         """Verify token matches client characteristics"""
         expected_ip_hash = token.payload.get('ip_hash')
         expected_ua_hash = token.payload.get('ua_hash')
-        
+
         # If no fingerprinting in token, skip validation
         if not expected_ip_hash or not expected_ua_hash:
             return True
-        
-        current_ip_hash = self._hash_ip(get_client_ip(request))
-        current_ua_hash = self._hash_ua(request.META.get('HTTP_USER_AGENT', ''))
-        
+
         return expected_ip_hash == current_ip_hash and expected_ua_hash == current_ua_hash
 
   def _hash_ip(self, ip):
-      return hashlib.sha256(f"{ip}{settings.SECRET_KEY}".encode()).hexdigest()
+      return _client_hashes(ip, '')[0]
 
   def _hash_ua(self, ua):
-      return hashlib.sha256(ua.encode()).hexdigest()
+      return _client_hashes('', ua)[1]
 
   def _get_device_fingerprint(self, request):
-      return self._hash_ua(request.META.get('HTTP_USER_AGENT', ''))[:16] + \
-              self._hash_ip(get_client_ip(request))[:16]
\ No newline at end of file
+      ip_hash, ua_hash = _client_hashes(get_client_ip(request), request.META.get('HTTP_USER_AGENT', ''))
+      return ua_hash[:16] + ip_hash[:16]
@@ -0,0 +1,132 @@
+"""
+Read-through cache of each user's wallet and asset, as served by get_wallet,
+get_asset and the balance fields of get_user.
+
+Entries live in the 'balances' cache (see CACHES in settings). Saves and
+deletes of Wallet / Asset rows invalidate the owner's entry once the
+database transaction commits; the bulk distribution, revoke and reset paths,
+which bypass the model signals, call invalidate_balances with the users they
+touched. Invalidation writes a short-lived fence instead of deleting the
+key, so a request that read the old row just before the commit cannot put
+it back in the cache afterwards.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Asset, Wallet
+from .serializers import AssetSerializer, WalletSerializer
+
+logger = logging.getLogger(__name__)
+
+BALANCE_CACHE_ALIAS = 'balances'
+BALANCE_CACHE_TTL = getattr(settings, 'BALANCE_CACHE_TTL', 300)
+# Longer than a balance read takes, so a fenced key is never refilled with a pre-commit row
+BALANCE_CACHE_FENCE_SECONDS = 5
+INVALIDATE_BATCH_SIZE = 1000
+FENCE = 'invalidated'
+
+
+class BalanceCacheStats:
+    """Hits and misses of the balance cache in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def summary(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        }
+
+
+balance_cache_stats = BalanceCacheStats()
+
+
+def _key(user_id):
+    return f'balances:{user_id}'
+
+
+def _load_balances(user):
+    wallet = Wallet.objects.filter(user=user).first()
+    asset = Asset.objects.filter(user=user).first()
+    return {
+        'wallet': dict(WalletSerializer(wallet).data) if wallet else None,
+        'asset': dict(AssetSerializer(asset).data) if asset else None,
+    }
+
+
+def get_balances(user):
+    """
+    {'wallet': WalletSerializer data, 'asset': AssetSerializer data} of the
+    user, either of which is None when the row does not exist.
+    """
+    cache = caches[BALANCE_CACHE_ALIAS]
+    key = _key(user.pk)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Balance cache unavailable, reading {user.pk} from the database: {str(e)}")
+        cached = FENCE
+    if isinstance(cached, dict):
+        balance_cache_stats.record(hit=True)
+        return cached
+
+    balance_cache_stats.record(hit=False)
+    balances = _load_balances(user)
+    if cached is None:
+        try:
+            # add(), not set(): an invalidation that lands meanwhile wins
+            cache.add(key, balances, BALANCE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Could not cache balances of {user.pk}: {str(e)}")
+    return balances
+
+
+def _fence(user_ids):
+    cache = caches[BALANCE_CACHE_ALIAS]
+    try:
+        for start in range(0, len(user_ids), INVALIDATE_BATCH_SIZE):
+            batch = user_ids[start:start + INVALIDATE_BATCH_SIZE]
+            cache.set_many({_key(user_id): FENCE for user_id in batch}, BALANCE_CACHE_FENCE_SECONDS)
+    except Exception as e:
+        logger.error(f"Could not invalidate cached balances of {len(user_ids)} users: {str(e)}")
+
+
+def invalidate_balances(user_ids):
+    """Invalidates the cached balances of user_ids when the current transaction commits."""
+    user_ids = sorted({user_id for user_id in user_ids if user_id})
+    if user_ids:
+        db_transaction.on_commit(lambda: _fence(user_ids))
+
+
+def _invalidate_owner(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_balances([instance.user_id])
+
+
+for _model in (Wallet, Asset):
+    post_save.connect(_invalidate_owner, sender=_model, dispatch_uid=f'balance_cache_post_save_{_model.__name__}')
+    post_delete.connect(_invalidate_owner, sender=_model, dispatch_uid=f'balance_cache_post_delete_{_model.__name__}')
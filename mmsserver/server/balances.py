@@ -0,0 +1,94 @@
+"""
+Wallet and Asset balance changes as single conditional UPDATEs.
+
+change_balances adds its deltas in the database (SET field = field + delta)
+and guards every debit in the same statement (WHERE field >= -delta), so
+concurrent requests never overwrite each other's changes and a debit that
+the balance no longer covers matches no row instead of driving it negative.
+Only the changed columns are written and the row is locked just for the
+duration of the statement's transaction, not across a read-check-save.
+
+.update() bypasses the model signals, so the dashboard counters and the
+balance cache are fed from here.
+"""
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .balance_cache import invalidate_balances
+from .dashboard import record_bulk_update
+from .models import Wallet
+
+# Attempts at splitting a commission debit before giving up on a moving balance
+COMMISSION_SPLIT_RETRIES = 5
+
+
+def change_balances(model, user_id, deltas, values=None):
+    """
+    Adds deltas ({field: amount}) to the user's Wallet or Asset row and sets
+    `values` ({field: value}, untracked fields only) in one UPDATE. Returns
+    the updated row, or None when a debited balance does not cover its delta,
+    in which case nothing was changed. Raises model.DoesNotExist when the
+    user has no row.
+    """
+    deltas = {field: Decimal(delta) for field, delta in deltas.items() if delta}
+    guard = Q(user_id=user_id)
+    for field, delta in deltas.items():
+        if delta < 0:
+            guard &= Q(**{f'{field}__gte': -delta})
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    changes.update(values or {})
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changes['updated_at'] = timezone.now()
+
+    with db_transaction.atomic():
+        if not model.objects.filter(guard).update(**changes):
+            if not model.objects.filter(user_id=user_id).exists():
+                raise model.DoesNotExist(f"{model.__name__} of {user_id} does not exist.")
+            return None
+        # The UPDATE holds the row lock, so the row read back is exactly the old one plus deltas
+        row = model.objects.get(user_id=user_id)
+        row._tracked_snapshot = {
+            name: value - deltas[name] if name in deltas else value
+            for name, value in row._tracked_snapshot.items()
+        }
+        record_bulk_update([row])
+        invalidate_balances([user_id])
+    return row
+
+
+def commission_split(wallet_values, amount):
+    """(from affiliate, from introducer): the affiliate balance is used first."""
+    from_affiliate = min(amount, max(wallet_values['affiliate_point_balance'], Decimal('0.00')))
+    return from_affiliate, amount - from_affiliate
+
+
+def debit_commission(user_id, amount, credits=None):
+    """
+    Takes amount from the user's affiliate balance first and the rest from
+    the introducer balance, adding `credits` ({field: amount}) in the same
+    UPDATE. The split is computed from a plain read; if a concurrent change
+    invalidates it, the guard fails and the split is recomputed. Returns the
+    updated wallet, or None when the two balances together do not cover
+    amount.
+    """
+    amount = Decimal(amount)
+    for _ in range(COMMISSION_SPLIT_RETRIES):
+        wallet_values = Wallet.objects.filter(user_id=user_id).values(
+            'affiliate_point_balance', 'introducer_point_balance'
+        ).first()
+        if wallet_values is None:
+            raise Wallet.DoesNotExist(f"Wallet of {user_id} does not exist.")
+        if wallet_values['affiliate_point_balance'] + wallet_values['introducer_point_balance'] < amount:
+            return None
+        from_affiliate, from_introducer = commission_split(wallet_values, amount)
+        wallet = change_balances(Wallet, user_id, {
+            **(credits or {}),
+            'affiliate_point_balance': -from_affiliate,
+            'introducer_point_balance': -from_introducer,
+        })
+        if wallet is not None:
+            return wallet
+    return None
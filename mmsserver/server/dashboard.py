@@ -0,0 +1,344 @@
+"""
+Incrementally maintained totals behind the admin dashboard.
+
+Every saved or deleted Wallet, Asset, Transaction, WithdrawalRequest and User
+contributes to a handful of counters ({(metric, day): value}). The
+pre_save / post_save / post_delete receivers below add the difference
+between a row's old and new contribution to a DashboardCounter shard inside
+the same database transaction as the change itself. Bulk writes bypass those
+signals, so the service code that uses bulk_update / bulk_create / F()
+updates calls record_bulk_update, record_bulk_create or
+record_wallet_deltas instead.
+
+rebuild_dashboard_summary replaces the counters with live aggregates and
+check_dashboard_summary reports drift between the two.
+"""
+import random
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import Asset, DashboardCounter, Transaction, User, Wallet, WithdrawalRequest
+
+DASHBOARD_SHARDS = 16
+
+SUPER_USER_ID = 'MMS00QVS'
+# House wallets left out of the balance totals, per balance field
+EXCLUDED_WALLET_USER_IDS = {
+    'profit_point_balance': {'MMS00QVS', 'MMS01FXC'},  # mmssuper, MMSAdmin
+    'affiliate_point_balance': {'MMS01FXC'},
+    'introducer_point_balance': {'MMS01FXC'},
+}
+ADMIN_ASSET_USER_IDS = {'MMS00QVS', 'MMS01FXC', 'MMS0216J', 'MMS02O5G', 'MMS02GKX'}
+ASSET_TIER_THRESHOLD = Decimal('10000')
+CENT = Decimal('0.01')
+
+WALLET_METRICS = {
+    'profit_point_balance': 'wallet_profit',
+    'affiliate_point_balance': 'wallet_affiliate',
+    'introducer_point_balance': 'wallet_introducer',
+}
+COUNT_METRICS = {'users', 'asset_above_10k_users', 'asset_below_10k_users'}
+
+
+# --------------------- CONTRIBUTIONS ----------------------------------------------------
+# Each returns {(metric, day): value} for one row, given its tracked field values.
+
+def _wallet_contributions(values):
+    return {
+        (metric, None): values[field] or Decimal('0.00')
+        for field, metric in WALLET_METRICS.items()
+        if values['user_id'] not in EXCLUDED_WALLET_USER_IDS[field]
+    }
+
+
+def _asset_contributions(values):
+    amount = values['amount'] or Decimal('0.00')
+    tier = 'asset_above_10k' if amount >= ASSET_TIER_THRESHOLD else 'asset_below_10k'
+    contributions = {('asset_total', None): amount, (tier, None): amount, (f'{tier}_users', None): 1}
+    if values['user_id'] in ADMIN_ASSET_USER_IDS:
+        contributions[('asset_admin', None)] = amount
+    return contributions
+
+
+def _transaction_contributions(values):
+    if values['transaction_type'] == 'CONVERT':
+        return {('convert_total', None): values['amount']}
+    if values['transaction_type'] == 'DISTRIBUTION':
+        return {('distribution', timezone.localdate(values['created_at'])): values['amount']}
+    return {}
+
+
+def _withdrawal_contributions(values):
+    return {
+        ('withdraw_amount', None): values['actual_amount'] or Decimal('0.00'),
+        ('withdraw_fee', None): values['fee'] or Decimal('0.00'),
+    }
+
+
+def _user_contributions(values):
+    return {('users', None): 1}
+
+
+CONTRIBUTIONS = {
+    Wallet: _wallet_contributions,
+    Asset: _asset_contributions,
+    Transaction: _transaction_contributions,
+    WithdrawalRequest: _withdrawal_contributions,
+    User: _user_contributions,
+}
+
+
+def _tracked_fields(model):
+    return getattr(model, 'tracked_fields', ())
+
+
+def _current_values(instance):
+    return {name: getattr(instance, name) for name in _tracked_fields(type(instance))}
+
+
+def _diff(deltas, old, new):
+    for key, value in new.items():
+        deltas[key] += Decimal(value)
+    for key, value in old.items():
+        deltas[key] -= Decimal(value)
+    return deltas
+
+
+# --------------------- COUNTERS ---------------------------------------------------------
+
+def apply_deltas(deltas):
+    """Adds {(metric, day): delta} to one randomly chosen shard of each counter."""
+    shard = random.randrange(DASHBOARD_SHARDS)
+    # A fixed lock order keeps concurrent writers from deadlocking on the shard rows
+    for (metric, day), delta in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] or date.min)):
+        if not delta:
+            continue
+        counter = DashboardCounter.objects.filter(metric=metric, day=day, shard=shard)
+        if counter.update(value=F('value') + delta):
+            continue
+        try:
+            with db_transaction.atomic():
+                DashboardCounter.objects.create(metric=metric, day=day, shard=shard, value=delta)
+        except IntegrityError:
+            # Created concurrently by another writer
+            counter.update(value=F('value') + delta)
+
+
+def get_stored_totals():
+    """{(metric, day): total over all shards}, in one query."""
+    rows = DashboardCounter.objects.values('metric', 'day').annotate(total=Sum('value')).order_by('metric', 'day')
+    return {(row['metric'], row['day']): Decimal(row['total']).quantize(CENT) for row in rows}
+
+
+# --------------------- SIGNALS ----------------------------------------------------------
+
+def _remember_old_values(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    fields = _tracked_fields(sender)
+    snapshot = getattr(instance, '_tracked_snapshot', {})
+    missing = [name for name in fields if name not in snapshot]
+    if missing:
+        # Instance was not loaded from the database (or with deferred fields)
+        stored = sender._base_manager.filter(pk=instance.pk).values(*missing).first()
+        if stored is None:
+            return
+        snapshot = {**snapshot, **stored}
+    instance._dashboard_old_values = snapshot
+
+
+def _record_saved_row(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old_values = instance.__dict__.pop('_dashboard_old_values', None)
+    if created:
+        old = {}
+        new_values = _current_values(instance)
+    elif old_values is None or sender is User:
+        return
+    else:
+        old = CONTRIBUTIONS[sender](old_values)
+        new_values = dict(old_values)
+        for name in _tracked_fields(sender):
+            if update_fields is None or name in update_fields or name.removesuffix('_id') in update_fields:
+                new_values[name] = getattr(instance, name)
+    apply_deltas(_diff(defaultdict(Decimal), old, CONTRIBUTIONS[sender](new_values)))
+    if hasattr(instance, 'snapshot_tracked_fields'):
+        instance.snapshot_tracked_fields()
+
+
+def _record_deleted_row(sender, instance, **kwargs):
+    values = {**_current_values(instance), **getattr(instance, '_tracked_snapshot', {})}
+    apply_deltas(_diff(defaultdict(Decimal), CONTRIBUTIONS[sender](values), {}))
+
+
+for _model in CONTRIBUTIONS:
+    pre_save.connect(_remember_old_values, sender=_model, dispatch_uid=f'dashboard_pre_save_{_model.__name__}')
+    post_save.connect(_record_saved_row, sender=_model, dispatch_uid=f'dashboard_post_save_{_model.__name__}')
+    post_delete.connect(_record_deleted_row, sender=_model, dispatch_uid=f'dashboard_post_delete_{_model.__name__}')
+
+
+# --------------------- BULK WRITES ------------------------------------------------------
+
+def record_bulk_update(instances):
+    """Call after bulk_update() of rows loaded from the database."""
+    deltas = defaultdict(Decimal)
+    for instance in instances:
+        model = type(instance)
+        snapshot = instance._tracked_snapshot
+        _diff(deltas, CONTRIBUTIONS[model](snapshot), CONTRIBUTIONS[model]({**snapshot, **_current_values(instance)}))
+        instance.snapshot_tracked_fields()
+    apply_deltas(deltas)
+
+
+def record_bulk_create(instances):
+    """Call after bulk_create()."""
+    deltas = defaultdict(Decimal)
+    for instance in instances:
+        _diff(deltas, {}, CONTRIBUTIONS[type(instance)](_current_values(instance)))
+        if hasattr(instance, 'snapshot_tracked_fields'):
+            instance.snapshot_tracked_fields()
+    apply_deltas(deltas)
+
+
+def record_wallet_deltas(rows):
+    """Call after F() balance updates; rows are (user_id, balance_field, delta)."""
+    deltas = defaultdict(Decimal)
+    for user_id, field, delta in rows:
+        if field in WALLET_METRICS and user_id not in EXCLUDED_WALLET_USER_IDS[field]:
+            deltas[(WALLET_METRICS[field], None)] += delta
+    apply_deltas(deltas)
+
+
+def record_transaction_totals(rows):
+    """
+    Call after set-based Transaction inserts (INSERT ... SELECT); rows are
+    (transaction_type, created_at, amount) with the amounts summed per type.
+    """
+    deltas = defaultdict(Decimal)
+    for transaction_type, created_at, amount in rows:
+        _diff(deltas, {}, _transaction_contributions({
+            'transaction_type': transaction_type, 'created_at': created_at, 'amount': amount,
+        }))
+    apply_deltas(deltas)
+
+
+# --------------------- LIVE AGGREGATES --------------------------------------------------
+
+def compute_live_totals(apps=global_apps):
+    """
+    The counters computed from scratch with full-table aggregates. Takes an
+    app registry so the migration that creates the table can use it.
+    """
+    Wallet = apps.get_model('server', 'Wallet')
+    Asset = apps.get_model('server', 'Asset')
+    Transaction = apps.get_model('server', 'Transaction')
+    WithdrawalRequest = apps.get_model('server', 'WithdrawalRequest')
+    User = apps.get_model('server', 'User')
+
+    totals = {('users', None): User.objects.count()}
+    for field, metric in WALLET_METRICS.items():
+        totals[(metric, None)] = Wallet.objects.exclude(
+            user_id__in=EXCLUDED_WALLET_USER_IDS[field]
+        ).aggregate(total=Sum(field))['total']
+
+    above = Q(amount__gte=ASSET_TIER_THRESHOLD)
+    assets = Asset.objects.aggregate(
+        asset_total=Sum('amount'),
+        asset_admin=Sum('amount', filter=Q(user_id__in=ADMIN_ASSET_USER_IDS)),
+        asset_above_10k=Sum('amount', filter=above),
+        asset_below_10k=Sum('amount', filter=~above),
+        asset_above_10k_users=Count('id', filter=above),
+        asset_below_10k_users=Count('id', filter=~above),
+    )
+    totals.update({(metric, None): value for metric, value in assets.items()})
+
+    withdrawals = WithdrawalRequest.objects.aggregate(withdraw_amount=Sum('actual_amount'), withdraw_fee=Sum('fee'))
+    totals.update({(metric, None): value for metric, value in withdrawals.items()})
+
+    totals[('convert_total', None)] = Transaction.objects.filter(
+        transaction_type='CONVERT'
+    ).aggregate(total=Sum('amount'))['total']
+    daily_profits = (
+        Transaction.objects
+        .filter(transaction_type='DISTRIBUTION')
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Sum('amount'))
+        .order_by('day')
+    )
+    totals.update({('distribution', row['day']): row['total'] for row in daily_profits})
+    # Rounded to the 2 decimal places of the balance columns (SQLite sums them as floats).
+    # Distribution days that net to zero are kept, the dashboard lists them with total 0.
+    return {
+        (metric, day): Decimal(value).quantize(CENT)
+        for (metric, day), value in totals.items()
+        if value or metric == 'distribution'
+    }
+
+
+def rebuild_dashboard_counters(apps=global_apps):
+    """
+    Replaces every counter with the live totals (one shard each). Best run
+    while no distribution or revoke is in progress.
+    """
+    DashboardCounter = apps.get_model('server', 'DashboardCounter')
+    with db_transaction.atomic():
+        list(DashboardCounter.objects.select_for_update().values_list('pk', flat=True))
+        totals = compute_live_totals(apps)
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(metric=metric, day=day, shard=0, value=value) for (metric, day), value in totals.items()],
+            batch_size=1000,
+        )
+    return totals
+
+
+def find_drift():
+    """[(metric, day, stored, live)] for every counter that differs from the live aggregates."""
+    stored = get_stored_totals()
+    live = compute_live_totals()
+    drift = []
+    for metric, day in sorted(set(stored) | set(live), key=lambda key: (key[0], key[1] or date.min)):
+        stored_value = stored.get((metric, day)) or Decimal('0.00')
+        live_value = live.get((metric, day)) or Decimal('0.00')
+        if stored_value != live_value:
+            drift.append((metric, day, stored_value, live_value))
+    return drift
+
+
+# --------------------- DASHBOARD --------------------------------------------------------
+
+def get_dashboard_summary():
+    """The counter-backed part of the admin dashboard response."""
+    totals = get_stored_totals()
+
+    def total(metric):
+        value = totals.get((metric, None)) or Decimal('0.00')
+        return int(value) if metric in COUNT_METRICS else value
+
+    return {
+        'total_asset_amount': total('asset_total') - total('asset_admin'),
+        'total_profit_balance': total('wallet_profit') + total('wallet_affiliate') + total('wallet_introducer'),
+        'total_convert_amount': total('convert_total'),
+        'daily_profits': [
+            {'day': day, 'total': value}
+            for (metric, day), value in totals.items()
+            if metric == 'distribution'
+        ],
+        'total_withdraw_amount': total('withdraw_amount'),
+        'total_withdraw_fee': total('withdraw_fee'),
+        'total_user': total('users'),
+        'asset_above_10k': total('asset_above_10k') - total('asset_admin'),
+        'asset_below_10k': total('asset_below_10k'),
+        'user_asset_above_10k': total('asset_above_10k_users'),
+        'user_asset_below_10k': total('asset_below_10k_users'),
+    }
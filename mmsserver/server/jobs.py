@@ -0,0 +1,144 @@
+"""
+DB-backed background jobs for long-running admin operations.
+
+Views enqueue a Job row and return immediately; the `run_jobs` management
+command claims pending jobs one at a time and runs the registered handler.
+Handlers receive the job and a `progress(processed, total)` callback that
+records rows_processed / rows_total and refreshes the heartbeat (updated_at).
+"""
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .models import Job
+from .token_sweeper import sweep_expired_tokens
+from .utils import distribute_profit_chunked, remove_welcome_bonus_100, revoke_profit_distribution
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job whose heartbeat is older than this is considered abandoned
+# (worker killed / host restarted) and is marked FAILED. A failed distribution
+# is resumed from its checkpoint by triggering it again.
+STALE_JOB_AFTER = timedelta(minutes=15)
+
+JOB_HANDLERS = {}
+
+
+def register(job_type):
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue_job(job_type, created_by=None, payload=None):
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"No handler registered for job type {job_type}.")
+    return Job.objects.create(job_type=job_type, created_by=created_by, payload=payload or {})
+
+
+def get_active_job(job_type):
+    """Returns the pending/running job of this type, if any."""
+    return Job.objects.filter(job_type=job_type, status__in=['PENDING', 'RUNNING']).order_by('created_at').first()
+
+
+def make_progress_callback(job):
+    def progress(processed, total):
+        job.rows_processed = processed
+        job.rows_total = total
+        Job.objects.filter(pk=job.pk).update(
+            rows_processed=processed,
+            rows_total=total,
+            updated_at=timezone.now(),
+        )
+    return progress
+
+
+def fail_stale_jobs(stale_after=STALE_JOB_AFTER):
+    cutoff = timezone.now() - stale_after
+    failed = Job.objects.filter(status='RUNNING', updated_at__lt=cutoff).update(
+        status='FAILED',
+        error='Worker stopped responding; job abandoned.',
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if failed:
+        logger.warning(f"Marked {failed} stale job(s) as FAILED.")
+    return failed
+
+
+def claim_next_job(worker_name=None):
+    """
+    Atomically moves the oldest PENDING job to RUNNING and returns it.
+    SKIP LOCKED lets several workers poll the same table without blocking.
+    """
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    with db_transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'RUNNING'
+        job.worker = worker_name
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.job_type)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job type {job.job_type}.")
+        result = handler(job, make_progress_callback(job))
+    except Exception as e:
+        logger.error(f"Job {job.id} ({job.job_type}) failed: {e}", exc_info=True)
+        job.status = 'FAILED'
+        job.error = str(e)
+    else:
+        logger.info(f"Job {job.id} ({job.job_type}) succeeded.")
+        job.status = 'SUCCEEDED'
+        job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'result', 'rows_processed', 'rows_total', 'finished_at', 'updated_at'])
+    return job
+
+
+def run_next_job(worker_name=None):
+    job = claim_next_job(worker_name)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+# --------------------- HANDLERS ---------------------------------------------------------
+
+@register('DISTRIBUTE_PROFIT')
+def _distribute_profit_job(job, progress):
+    return distribute_profit_chunked(progress=progress)
+
+
+@register('REVOKE_PROFIT_DISTRIBUTION')
+def _revoke_profit_distribution_job(job, progress):
+    target_date = job.payload.get('target_date')
+    if target_date:
+        target_date = datetime.strptime(target_date, '%Y-%m-%d').date()
+    return revoke_profit_distribution(target_date=target_date, progress=progress)
+
+
+@register('REMOVE_WELCOME_BONUS')
+def _remove_welcome_bonus_job(job, progress):
+    return remove_welcome_bonus_100(progress=progress)
+
+
+@register('SWEEP_EXPIRED_TOKENS')
+def _sweep_expired_tokens_job(job, progress):
+    return sweep_expired_tokens(vacuum=job.payload.get('vacuum', False), progress=progress)
@@ -0,0 +1,290 @@
+"""
+Per-user daily transaction totals (DailyLedgerRollup).
+
+Every Transaction adds its amount and a count of one to the rollup row of
+(user, local day of created_at, transaction_type, point_type), inside the
+same database transaction as the row itself. Single saves and deletes are
+picked up by the receivers below; the bulk_create paths in utils.py call
+record_transactions_created instead, and the INSERT ... SELECT of the
+distribution revoke record_transactions_inserted.
+
+backfill_ledger_rollup rebuilds the table from the raw transactions (all of
+it, or the days from --since on) and reports drift with --check.
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Round, TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import DailyLedgerRollup, Transaction
+
+ROLLUP_BATCH_SIZE = 1000
+ROLLUP_FIELDS = ('user_id', 'transaction_type', 'point_type', 'amount', 'created_at')
+CENT = Decimal('0.01')
+
+
+def _rollup_key(values):
+    return (
+        values['user_id'],
+        timezone.localdate(values['created_at']),
+        values['transaction_type'],
+        values['point_type'],
+    )
+
+
+def _new_deltas():
+    """{(user_id, day, transaction_type, point_type): [amount, count]}"""
+    return defaultdict(lambda: [Decimal('0.00'), 0])
+
+
+def _add(deltas, values, sign):
+    if values['user_id'] is None:
+        return
+    delta = deltas[_rollup_key(values)]
+    # Amounts straight from request data may still be strings
+    delta[0] += sign * Decimal(values['amount'] or '0.00')
+    delta[1] += sign
+
+
+def _current_values(instance):
+    return {name: getattr(instance, name) for name in ROLLUP_FIELDS}
+
+
+# --------------------- ROLLUP ROWS ------------------------------------------------------
+
+def _add_to_row(key, amount, count):
+    user_id, day, transaction_type, point_type = key
+    rows = DailyLedgerRollup.objects.filter(
+        user_id=user_id, day=day, transaction_type=transaction_type, point_type=point_type,
+    )
+    if rows.update(total_amount=F('total_amount') + amount, tx_count=F('tx_count') + count) or count <= 0:
+        return
+    try:
+        with db_transaction.atomic():
+            DailyLedgerRollup.objects.create(
+                user_id=user_id, day=day, transaction_type=transaction_type, point_type=point_type,
+                total_amount=amount, tx_count=count,
+            )
+    except IntegrityError:
+        # Created concurrently by another writer
+        rows.update(total_amount=F('total_amount') + amount, tx_count=F('tx_count') + count)
+
+
+def _apply_batch(deltas):
+    user_ids = {key[0] for key in deltas}
+    days = {key[1] for key in deltas}
+    with db_transaction.atomic():
+        rows = (
+            DailyLedgerRollup.objects
+            .select_for_update()
+            .filter(user_id__in=user_ids, day__in=days)
+            .order_by('pk')
+        )
+        existing = {(row.user_id, row.day, row.transaction_type, row.point_type): row for row in rows}
+
+        changed, emptied, missing = [], [], []
+        for key, (amount, count) in deltas.items():
+            row = existing.get(key)
+            if row is None:
+                # A negative delta without a row: the row went with its user, or was never backfilled
+                if count > 0:
+                    missing.append((key, amount, count))
+                continue
+            row.total_amount += amount
+            row.tx_count += count
+            (emptied if row.tx_count <= 0 else changed).append(row)
+
+        if changed:
+            DailyLedgerRollup.objects.bulk_update(changed, ['total_amount', 'tx_count'])
+        if emptied:
+            DailyLedgerRollup.objects.filter(pk__in=[row.pk for row in emptied]).delete()
+        if missing:
+            try:
+                with db_transaction.atomic():
+                    DailyLedgerRollup.objects.bulk_create([
+                        DailyLedgerRollup(
+                            user_id=user_id, day=day, transaction_type=transaction_type, point_type=point_type,
+                            total_amount=amount, tx_count=count,
+                        )
+                        for (user_id, day, transaction_type, point_type), amount, count in missing
+                    ])
+            except IntegrityError:
+                # Some of the rows were created concurrently by another writer
+                for key, amount, count in missing:
+                    _add_to_row(key, amount, count)
+
+
+def apply_rollup_deltas(deltas):
+    """Adds {(user_id, day, transaction_type, point_type): [amount, count]} to the rollup rows."""
+    # Sorted, so concurrent writers lock shared rows in the same order
+    pending = sorted((key, value) for key, value in deltas.items() if value[0] or value[1])
+    for start in range(0, len(pending), ROLLUP_BATCH_SIZE):
+        _apply_batch(dict(pending[start:start + ROLLUP_BATCH_SIZE]))
+
+
+# --------------------- SIGNALS ----------------------------------------------------------
+
+def _remember_old_values(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    snapshot = getattr(instance, '_tracked_snapshot', {})
+    missing = [name for name in ROLLUP_FIELDS if name not in snapshot]
+    if missing:
+        # Instance was not loaded from the database (or with deferred fields)
+        stored = sender._base_manager.filter(pk=instance.pk).values(*missing).first()
+        if stored is None:
+            return
+        snapshot = {**snapshot, **stored}
+    instance._ledger_old_values = {name: snapshot[name] for name in ROLLUP_FIELDS}
+
+
+def _record_saved_row(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old_values = instance.__dict__.pop('_ledger_old_values', None)
+    deltas = _new_deltas()
+    if created:
+        _add(deltas, _current_values(instance), 1)
+    elif old_values is None:
+        return
+    else:
+        new_values = dict(old_values)
+        for name in ROLLUP_FIELDS:
+            if update_fields is None or name in update_fields or name.removesuffix('_id') in update_fields:
+                new_values[name] = getattr(instance, name)
+        if new_values == old_values:
+            return
+        _add(deltas, old_values, -1)
+        _add(deltas, new_values, 1)
+    apply_rollup_deltas(deltas)
+
+
+def _record_deleted_row(sender, instance, **kwargs):
+    values = {**_current_values(instance), **getattr(instance, '_tracked_snapshot', {})}
+    deltas = _new_deltas()
+    _add(deltas, values, -1)
+    apply_rollup_deltas(deltas)
+
+
+pre_save.connect(_remember_old_values, sender=Transaction, dispatch_uid='ledger_pre_save_Transaction')
+post_save.connect(_record_saved_row, sender=Transaction, dispatch_uid='ledger_post_save_Transaction')
+post_delete.connect(_record_deleted_row, sender=Transaction, dispatch_uid='ledger_post_delete_Transaction')
+
+
+# --------------------- BULK WRITES ------------------------------------------------------
+
+def record_transactions_created(instances):
+    """Call after Transaction.objects.bulk_create()."""
+    deltas = _new_deltas()
+    for instance in instances:
+        _add(deltas, _current_values(instance), 1)
+    apply_rollup_deltas(deltas)
+
+
+def record_transactions_inserted(transactions, created_at, sign=1):
+    """
+    Call before a set-based INSERT ... SELECT that copies the user, type and
+    point type of every row of `transactions` (a Transaction queryset) into
+    a new row dated created_at, with sign * its amount. The totals are added
+    to the rollup rows with one INSERT ... ON CONFLICT, which also creates
+    the missing ones.
+    """
+    totals = (
+        transactions
+        .filter(user__isnull=False)
+        .order_by()
+        .values('user_id', 'transaction_type', 'point_type')
+        .annotate(total=Round(Sum('amount'), 2), rows=Count('pk'))
+    )
+    totals_sql, totals_params = totals.query.sql_with_params()
+    table = connection.ops.quote_name(DailyLedgerRollup._meta.db_table)
+    day = connection.ops.adapt_datefield_value(timezone.localdate(created_at))
+    with connection.cursor() as cursor:
+        # WHERE true: SQLite cannot otherwise tell the ON CONFLICT clause from a join constraint
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, day, transaction_type, point_type, total_amount, tx_count) "
+            f"SELECT totals.user_id, %s, totals.transaction_type, totals.point_type, %s * totals.total, totals.rows "
+            f"FROM ({totals_sql}) AS totals WHERE true "
+            f"ON CONFLICT (user_id, day, transaction_type, point_type) DO UPDATE SET "
+            f"total_amount = {table}.total_amount + EXCLUDED.total_amount, "
+            f"tx_count = {table}.tx_count + EXCLUDED.tx_count",
+            [day, sign, *totals_params],
+        )
+
+
+# --------------------- BACKFILL ---------------------------------------------------------
+
+def _since_filter(since):
+    if since is None:
+        return {}
+    return {'created_at__gte': timezone.make_aware(datetime.combine(since, time.min))}
+
+
+def live_rollup_rows(since=None, apps=global_apps):
+    """Rollup rows aggregated from the raw transactions, as dicts, ordered by key."""
+    Transaction = apps.get_model('server', 'Transaction')
+    return (
+        Transaction.objects
+        .filter(user__isnull=False, **_since_filter(since))
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day', 'transaction_type', 'point_type')
+        .annotate(total_amount=Sum('amount'), tx_count=Count('id'))
+        .order_by('user_id', 'day', 'transaction_type', 'point_type')
+    )
+
+
+def rebuild_ledger_rollup(since=None, apps=global_apps):
+    """
+    Replaces the rollup rows (of the local days from `since` on, or all of
+    them) with the totals of the raw transactions. Returns the row count.
+    Best run while no distribution or revoke is in progress.
+    """
+    DailyLedgerRollup = apps.get_model('server', 'DailyLedgerRollup')
+    created = 0
+    with db_transaction.atomic():
+        stale = DailyLedgerRollup.objects.all()
+        if since is not None:
+            stale = stale.filter(day__gte=since)
+        stale.delete()
+
+        batch = []
+        for row in live_rollup_rows(since, apps).iterator(chunk_size=ROLLUP_BATCH_SIZE):
+            batch.append(DailyLedgerRollup(**row))
+            if len(batch) >= ROLLUP_BATCH_SIZE:
+                DailyLedgerRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        DailyLedgerRollup.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def find_rollup_drift(since=None):
+    """[(key, stored (amount, count), live (amount, count))] for every rollup row that differs."""
+    def as_map(rows):
+        return {
+            (row['user_id'], row['day'], row['transaction_type'], row['point_type']):
+                (Decimal(row['total_amount']).quantize(CENT), row['tx_count'])
+            for row in rows
+        }
+
+    stored_rows = DailyLedgerRollup.objects.values(
+        'user_id', 'day', 'transaction_type', 'point_type', 'total_amount', 'tx_count',
+    )
+    if since is not None:
+        stored_rows = stored_rows.filter(day__gte=since)
+    stored = as_map(stored_rows)
+    live = as_map(live_rollup_rows(since))
+
+    empty = (Decimal('0.00'), 0)
+    return [
+        (key, stored.get(key, empty), live.get(key, empty))
+        for key in sorted(set(stored) | set(live))
+        if stored.get(key, empty) != live.get(key, empty)
+    ]
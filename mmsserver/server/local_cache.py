@@ -0,0 +1,120 @@
+"""
+Per-process caches invalidated through a version stamp in the default cache.
+
+Each worker keeps its entries in memory and compares them against the
+shared stamp at most every `poll_seconds`, dropping them all when it moved.
+publish_version() clears this worker's entries at once and moves the stamp
+for the others. With a process-local default cache (no Redis) other workers
+never see the stamp move, so entries also expire after `ttl` seconds.
+
+Used by the reference data (reference_data.py) and the validated JWTs
+(authentication.py).
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class VersionedLocalCache:
+    """
+    {key: (expiry, value)} of this process, dropped as a whole when the
+    stamp under version_key changes. Counts hits and misses.
+    """
+
+    def __init__(self, version_key, ttl, max_entries, poll_seconds, label):
+        self.version_key = version_key
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.poll_seconds = poll_seconds
+        self.label = label
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._checked_at = float('-inf')
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, now):
+        if now - self._checked_at < self.poll_seconds:
+            return
+        self._checked_at = now
+        try:
+            version = cache.get(self.version_key, 0)
+        except Exception as e:
+            logger.warning(f"Could not read the {self.label} version: {str(e)}")
+            version = object()  # Unknown: drop everything
+        if version != self._version:
+            with self._lock:
+                self._entries.clear()
+                self._version = version
+
+    @property
+    def version(self):
+        """The stamp the entries belong to; pass it back to store() after loading a value."""
+        self._sync_version(time.monotonic())
+        return self._version
+
+    def lookup(self, key):
+        """The cached value of key, or MISSING."""
+        now = time.monotonic()
+        self._sync_version(now)
+        entry = self._entries.get(key)
+        hit = entry is not None and entry[0] > now
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[1] if hit else MISSING
+
+    def store(self, key, value, version, ttl=None):
+        """Stores value for key, unless the stamp moved since `version` was read."""
+        ttl = self.ttl if ttl is None else min(self.ttl, ttl)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: entry for k, entry in self._entries.items() if entry[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = object()
+        self._checked_at = float('-inf')
+
+    def publish_version(self):
+        """Drops this worker's entries now and every other worker's at its next poll."""
+        self.clear()
+        try:
+            cache.add(self.version_key, 0, timeout=None)
+            cache.incr(self.version_key)
+        except Exception as e:
+            logger.error(f"Could not publish a new {self.label} version to other workers: {str(e)}")
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def summary(self):
+        with self._lock:
+            entries, hits, misses = len(self._entries), self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        }
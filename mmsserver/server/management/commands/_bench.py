@@ -0,0 +1,245 @@
+"""
+Shared helpers for the bench_* management commands.
+
+Benchmarks seed synthetic users inside a transaction that is rolled back at
+the end of the run, so they can be pointed at a development database without
+leaving anything behind.
+"""
+import random
+import string
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from server.models import Asset, DepositLock, OperationalProfit, ReferralClosure, Transaction, User, Wallet
+from server.utils import get_profit_reference
+
+ID_CHARS = string.ascii_uppercase + string.digits
+SEED_BATCH_SIZE = 2000
+MAX_IDS_PER_LEVEL = len(ID_CHARS) ** 3
+
+# (transaction_type, point_type, request_status, amount) seeded by seed_history per user per day
+HISTORY_DAILY_ROWS = [
+  ('DISTRIBUTION', 'PROFIT', 'APPROVED', 5),
+  ('AFFILIATE_BONUS', 'COMMISSION', 'APPROVED', 1),
+]
+# (every N days, row) for the rarer history rows
+HISTORY_PERIODIC_ROWS = [
+  (7, ('TRANSFER', 'MASTER', 'APPROVED', 10)),
+  (10, ('CONVERT', 'PROFIT', 'APPROVED', 20)),
+  (15, ('WITHDRAWAL', 'PROFIT', 'APPROVED', 30)),
+  (30, ('ASSET_PLACEMENT', 'MASTER', 'PENDING', 100)),
+]
+
+
+class Rollback(Exception):
+  """Raised at the end of a benchmark to discard the seeded data."""
+
+
+@contextmanager
+def rolled_back():
+  """Runs the block in a transaction that is always rolled back."""
+  try:
+    with db_transaction.atomic():
+      yield
+      raise Rollback()
+  except Rollback:
+    pass
+
+
+@contextmanager
+def measure():
+  """Yields a dict that is filled with wall time (seconds) and query count."""
+  stats = {'queries': 0}
+
+  def count_queries(execute, sql, params, many, context):
+    stats['queries'] += 1
+    return execute(sql, params, many, context)
+
+  with connection.execute_wrapper(count_queries):
+    started = time.perf_counter()
+    yield stats
+    stats['seconds'] = time.perf_counter() - started
+
+
+def _suffix(index):
+  chars = []
+  for _ in range(3):
+    index, rem = divmod(index, len(ID_CHARS))
+    chars.append(ID_CHARS[rem])
+  return ''.join(reversed(chars))
+
+
+def get_or_create_superuser():
+  superuser = User.objects.filter(is_superuser=True).first()
+  if superuser:
+    return superuser
+  superuser = User(
+    id='MMS00BNC',
+    username='MMSbenchsuper',
+    ic='990000000000',
+    email='benchsuper@bench.invalid',
+    password='!',
+    is_superuser=True,
+    is_staff=True,
+    verification_status='APPROVED',
+  )
+  superuser.save(force_insert=True)
+  Wallet.objects.get_or_create(user=superuser)
+  Asset.objects.get_or_create(user=superuser)
+  return superuser
+
+
+def seed_network(total_users, depth=None, seed=42, asset_amount=None, with_deposits=True, level_sizes=None):
+  """
+  Seeds `total_users` users below the superuser, spread over `depth` referral
+  levels, each with a wallet, an asset and (optionally) an approved deposit
+  with its DepositLock. Returns the list of seeded user ids, level by level.
+  `level_sizes` sets the number of users per level explicitly (e.g. a few
+  leaders on top of a wide base) instead of an even split.
+  """
+  rng = random.Random(seed)
+  root = get_or_create_superuser()
+  if level_sizes is None:
+    depth = depth or max(5, -(-total_users // 40000))
+    level_sizes = [-(-total_users // depth)] * depth
+  if max(level_sizes) > MAX_IDS_PER_LEVEL:
+    raise ValueError(f'Cannot fit {max(level_sizes)} users per level; increase depth.')
+
+  existing_ids = set(User.objects.values_list('id', flat=True))
+  levels = [[root.id]]
+  users = []
+  created = 0
+  for level, level_size in enumerate(level_sizes, start=1):
+    parents = levels[-1]
+    current = []
+    index = 0
+    while len(current) < level_size and created < total_users:
+      user_id = f'MMS{level:02d}{_suffix(index)}'
+      index += 1
+      if user_id in existing_ids:
+        continue
+      users.append(User(
+        id=user_id,
+        username=f'MMSbench{created}',
+        ic=f'98{created:010d}',
+        email=f'bench{created}@bench.invalid',
+        password='!',
+        referred_by=rng.choice(parents),
+        verification_status='APPROVED',
+        wallet_address='0xbench',
+      ))
+      current.append(user_id)
+      created += 1
+    levels.append(current)
+  User.objects.bulk_create(users, batch_size=SEED_BATCH_SIZE)
+  # bulk_create skips User.save, which maintains the closure table
+  ReferralClosure.rebuild()
+
+  seeded_ids = [user.id for user in users]
+  Wallet.objects.bulk_create(
+    [Wallet(user_id=user_id) for user_id in seeded_ids], batch_size=SEED_BATCH_SIZE
+  )
+  amounts = {
+    user_id: Decimal(asset_amount) if asset_amount is not None else Decimal(rng.choice([100, 500, 2500, 12000]))
+    for user_id in seeded_ids
+  }
+  Asset.objects.bulk_create(
+    [Asset(user_id=user_id, amount=amount) for user_id, amount in amounts.items()],
+    batch_size=SEED_BATCH_SIZE
+  )
+
+  if with_deposits:
+    deposits = Transaction.objects.bulk_create(
+      [
+        Transaction(
+          user_id=user_id,
+          transaction_type='ASSET_PLACEMENT',
+          point_type='MASTER',
+          request_status='APPROVED',
+          amount=amount,
+          description='Benchmark deposit',
+        )
+        for user_id, amount in amounts.items()
+      ],
+      batch_size=SEED_BATCH_SIZE
+    )
+    DepositLock.objects.bulk_create(
+      [
+        DepositLock(
+          deposit=deposit,
+          amount_6m_locked=deposit.amount / Decimal('2'),
+          amount_1y_locked=deposit.amount / Decimal('2'),
+        )
+        for deposit in deposits
+      ],
+      batch_size=SEED_BATCH_SIZE
+    )
+  return seeded_ids
+
+
+def _last_transaction_pk():
+  return Transaction.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def seed_history(user_ids, days):
+  """
+  Seeds `days` days of transaction history for every user, newest day first,
+  plus one REVOKE_ reversal per user. Returns the number of rows created.
+  """
+  now = timezone.now()
+  total = 0
+  # Primary keys are not returned by bulk_create on every backend; rows seeded here all lie above this one
+  first_pk = _last_transaction_pk()
+  for day in range(days):
+    rows = [row for every, row in HISTORY_PERIODIC_ROWS if day % every == 0] + HISTORY_DAILY_ROWS
+    last_pk = _last_transaction_pk()
+    reference = get_profit_reference(timezone.localdate() - timedelta(days=day))
+    created = Transaction.objects.bulk_create(
+      [
+        Transaction(
+          user_id=user_id,
+          transaction_type=transaction_type,
+          point_type=point_type,
+          request_status=request_status,
+          amount=amount,
+          reference=reference if transaction_type == 'DISTRIBUTION' else '',
+        )
+        for user_id in user_ids
+        for transaction_type, point_type, request_status, amount in rows
+      ],
+      batch_size=SEED_BATCH_SIZE
+    )
+    # auto_now_add ignores the value given to bulk_create
+    Transaction.objects.filter(pk__gt=last_pk).update(
+      created_at=now - timedelta(days=day)
+    )
+    total += len(created)
+
+  # Only rows seeded above, so a committed run never reverses real distributions
+  revoked = Transaction.objects.filter(transaction_type='DISTRIBUTION', pk__gt=first_pk).order_by('pk')[:len(user_ids)]
+  reversals = Transaction.objects.bulk_create(
+    [
+      Transaction(user_id=txn.user_id, transaction_type='DISTRIBUTION', point_type='PROFIT',
+                  request_status='APPROVED', amount=-txn.amount, reference=f'REVOKE_{txn.id}',
+                  reverses=txn)
+      for txn in revoked
+    ],
+    batch_size=SEED_BATCH_SIZE
+  )
+  return total + len(reversals)
+
+
+def ensure_operational_profit(daily_profit_rate=Decimal('1.00')):
+  today = timezone.localdate()
+  operational_profit, _ = OperationalProfit.objects.update_or_create(
+    active_day_profit=today.day,
+    active_month_profit=today.month,
+    active_year_profit=today.year,
+    defaults={'daily_profit_rate': daily_profit_rate},
+  )
+  return operational_profit
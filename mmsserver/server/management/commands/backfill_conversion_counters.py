@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from server.utils import find_conversion_counter_drift, rebuild_conversion_counters
+
+
+class Command(BaseCommand):
+  help = (
+    'Rebuilds the per-user daily conversion counters behind the conversion limit from the CONVERT '
+    'transactions, or with --check only reports counters that drifted from them.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--since', help='Only the local days from YYYY-MM-DD on (default: all days).')
+    parser.add_argument('--check', action='store_true', help='Compare instead of rebuilding; fails on drift.')
+    parser.add_argument('--show', type=int, default=20, help='Number of drifting counters to print with --check.')
+
+  def handle(self, *args, **options):
+    since = None
+    if options['since']:
+      try:
+        since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+      except ValueError:
+        raise CommandError('--since must be YYYY-MM-DD')
+
+    if not options['check']:
+      created = rebuild_conversion_counters(since)
+      self.stdout.write(self.style.SUCCESS(f'Conversion counters rebuilt: {created} rows.'))
+      return
+
+    drift = find_conversion_counter_drift(since)
+    for user_id, day, stored, live in drift[:options['show']]:
+      self.stdout.write(f'{user_id} {day}: stored {stored}, live {live}')
+    if drift:
+      raise CommandError(f'{len(drift)} conversion counter(s) drifted from the transactions. Run backfill_conversion_counters to fix them.')
+    self.stdout.write(self.style.SUCCESS('Conversion counters match the transactions.'))
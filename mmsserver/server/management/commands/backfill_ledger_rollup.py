@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from server.ledger import find_rollup_drift, rebuild_ledger_rollup
+
+
+class Command(BaseCommand):
+  help = (
+    'Rebuilds the daily per-user ledger rollup from the raw transactions, '
+    'or with --check only reports rows that drifted from them.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--since', help='Only the local days from YYYY-MM-DD on (default: all days).')
+    parser.add_argument('--check', action='store_true', help='Compare instead of rebuilding; fails on drift.')
+    parser.add_argument('--show', type=int, default=20, help='Number of drifting rows to print with --check.')
+
+  def handle(self, *args, **options):
+    since = None
+    if options['since']:
+      try:
+        since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+      except ValueError:
+        raise CommandError('--since must be YYYY-MM-DD')
+
+    if not options['check']:
+      created = rebuild_ledger_rollup(since)
+      self.stdout.write(self.style.SUCCESS(f'Ledger rollup rebuilt: {created} rows.'))
+      return
+
+    drift = find_rollup_drift(since)
+    for (user_id, day, transaction_type, point_type), stored, live in drift[:options['show']]:
+      self.stdout.write(
+        f'{user_id} {day} {transaction_type}/{point_type}: stored {stored[0]} ({stored[1]} tx), '
+        f'live {live[0]} ({live[1]} tx)'
+      )
+    if drift:
+      raise CommandError(f'{len(drift)} ledger rollup row(s) drifted from the transactions. Run backfill_ledger_rollup to fix them.')
+    self.stdout.write(self.style.SUCCESS('Ledger rollup matches the transactions.'))
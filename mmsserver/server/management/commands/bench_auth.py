@@ -0,0 +1,126 @@
+import hashlib
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from server.authentication import JWTDeviceAuthentication, validated_tokens
+from server.models import User, UserJWT
+from ._bench import measure, rolled_back, seed_network
+
+CLIENT_IP = '203.0.113.7'
+CLIENT_UA = 'Mozilla/5.0 (bench_auth)'
+
+
+class LegacyJWTDeviceAuthentication(JWTDeviceAuthentication):
+  """The per-request checks as they were before tokens were looked up by jti."""
+
+  def _validate_user_and_token(self, request, token):
+    user = self.get_user(token)
+    ip = request.META.get('REMOTE_ADDR')
+    ua = request.META.get('HTTP_USER_AGENT', '')
+    if token.payload.get('ip_hash') != hashlib.sha256(f"{ip}{settings.SECRET_KEY}".encode()).hexdigest():
+      raise AuthenticationFailed('Invalid device binding')
+    if token.payload.get('ua_hash') != hashlib.sha256(ua.encode()).hexdigest():
+      raise AuthenticationFailed('Invalid device binding')
+    fingerprint = (
+      hashlib.sha256(ua.encode()).hexdigest()[:16]
+      + hashlib.sha256(f"{ip}{settings.SECRET_KEY}".encode()).hexdigest()[:16]
+    )
+    if not UserJWT.objects.filter(user=user, access_token=str(token), device_fingerprint=fingerprint).exists():
+      raise AuthenticationFailed('Token revoked')
+    return (user, token)
+
+
+class Command(BaseCommand):
+  help = (
+    'Seeds UserJWT rows (rolled back) and compares the per-request cost of simplejwt JWTAuthentication, '
+    'the previous JWTDeviceAuthentication (access_token lookup), and the jti lookup with and without '
+    'the validated token cache.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--tokens', type=int, default=20000, help='UserJWT rows to seed.')
+    parser.add_argument('--requests', type=int, default=2000, help='Authentications timed per variant.')
+
+  def make_token(self, user):
+    token = AccessToken.for_user(user)
+    token['ip_hash'] = hashlib.sha256(f"{CLIENT_IP}{settings.SECRET_KEY}".encode()).hexdigest()
+    token['ua_hash'] = hashlib.sha256(CLIENT_UA.encode()).hexdigest()
+    return token
+
+  def seed_tokens(self, user_ids, count):
+    fingerprint = JWTDeviceAuthentication()._get_device_fingerprint(
+      RequestFactory().get('/', REMOTE_ADDR=CLIENT_IP, HTTP_USER_AGENT=CLIENT_UA)
+    )
+    users = list(User.objects.filter(id__in=user_ids))
+    expires_at = timezone.now() + timedelta(minutes=30)
+    rng = random.Random(42)
+    rows = []
+    for _ in range(count):
+      token = self.make_token(rng.choice(users))
+      rows.append(UserJWT(
+        user_id=token['user_id'], access_token=str(token), access_jti=token['jti'], refresh_token='-',
+        device_fingerprint=fingerprint, ip_address=CLIENT_IP, expires_at=expires_at,
+      ))
+    UserJWT.objects.bulk_create(rows, batch_size=1000)
+    return [row.access_token for row in rows]
+
+  def time_variant(self, authenticate, requests):
+    authenticate(requests[0])  # warm-up
+    timings = []
+    with measure() as stats:
+      for request in requests:
+        started = time.perf_counter()
+        user, _ = authenticate(request)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95)], stats['queries'] / len(requests)
+
+  def handle(self, *args, **options):
+    factory = RequestFactory()
+    with rolled_back():
+      user_ids = seed_network(options['users'], with_deposits=False)
+      access_tokens = self.seed_tokens(user_ids, options['tokens'])
+      with connection.cursor() as cursor:
+        # The access_token index the previous lookup relied on
+        cursor.execute('CREATE INDEX bench_userjwt_access_token ON server_userjwt (access_token)')
+      self.stdout.write(f'Seeded {len(access_tokens)} UserJWT rows on {connection.vendor}.')
+
+      # A handful of active sessions, each polled repeatedly, as the app does
+      rng = random.Random(7)
+      sessions = rng.sample(access_tokens, min(50, len(access_tokens)))
+      requests = [
+        factory.get(
+          '/server/user_wallet/', REMOTE_ADDR=CLIENT_IP, HTTP_USER_AGENT=CLIENT_UA,
+          HTTP_AUTHORIZATION=f'Bearer {rng.choice(sessions)}',
+        )
+        for _ in range(options['requests'])
+      ]
+
+      cache_ttl = validated_tokens.ttl
+      variants = [
+        ('simplejwt JWTAuthentication', JWTAuthentication().authenticate, None),
+        ('JWTDeviceAuthentication, access_token lookup (before)', LegacyJWTDeviceAuthentication().authenticate, None),
+        ('JWTDeviceAuthentication, jti lookup, cache off', JWTDeviceAuthentication().authenticate, 0),
+        ('JWTDeviceAuthentication, jti lookup, cached', JWTDeviceAuthentication().authenticate, cache_ttl),
+      ]
+      try:
+        for label, authenticate, ttl in variants:
+          validated_tokens.clear()
+          if ttl is not None:
+            validated_tokens.ttl = ttl
+          p50, p95, queries = self.time_variant(authenticate, requests)
+          self.stdout.write(f'{label}: p50={p50:.0f}us p95={p95:.0f}us queries/request={queries:.2f}')
+      finally:
+        validated_tokens.ttl = cache_ttl
+        validated_tokens.clear()
@@ -0,0 +1,105 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from server.models import Transaction
+from server.utils import date_filter_q, local_day_start, month_filter_q
+from ._bench import rolled_back, seed_history, seed_network
+
+
+class Command(BaseCommand):
+  help = (
+    'Seeds a large transaction table (rolled back) and compares the __date / __month / __year '
+    'lookups with the half-open local range filters on the same queries.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--users', type=int, default=1200, help='~2.3 rows per user per day are seeded.')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+
+  def get_cases(self, user_id):
+    """(label, legacy queryset callable, range queryset callable)"""
+    today = timezone.localdate()
+    month_ago = today - timedelta(days=30)
+    txns = Transaction.objects.order_by()
+    return [
+      (
+        'distribution released today',
+        lambda: txns.filter(transaction_type='DISTRIBUTION', created_at__date=today).exists(),
+        lambda: txns.filter(date_filter_q('created_at', today), transaction_type='DISTRIBUTION').exists(),
+      ),
+      (
+        'revoke: rows of one day',
+        lambda: txns.filter(
+          transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'SHARING_PROFIT'], created_at__date=month_ago,
+        ).count(),
+        lambda: txns.filter(
+          date_filter_q('created_at', month_ago), transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'SHARING_PROFIT'],
+        ).count(),
+      ),
+      (
+        'revoke: reversals since day',
+        lambda: txns.filter(reference__startswith='REVOKE_', created_at__date__gte=month_ago).count(),
+        lambda: txns.filter(reference__startswith='REVOKE_', created_at__gte=local_day_start(month_ago)).count(),
+      ),
+      (
+        'user monthly withdrawal check',
+        lambda: txns.filter(
+          user_id=user_id, transaction_type='WITHDRAWAL', point_type='PROFIT',
+          created_at__month=today.month, created_at__year=today.year,
+        ).exists(),
+        lambda: txns.filter(
+          month_filter_q('created_at', today.year, today.month),
+          user_id=user_id, transaction_type='WITHDRAWAL', point_type='PROFIT',
+        ).exists(),
+      ),
+      (
+        'daily total profit (30 days)',
+        lambda: list(txns.filter(
+          user_id=user_id, transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'INTRODUCER_BONUS'],
+          created_at__date__range=[month_ago, today],
+        ).values('transaction_type').annotate(total_amount=Sum('amount')).order_by('transaction_type')),
+        lambda: list(txns.filter(
+          date_filter_q('created_at', month_ago, today),
+          user_id=user_id, transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'INTRODUCER_BONUS'],
+        ).values('transaction_type').annotate(total_amount=Sum('amount')).order_by('transaction_type')),
+      ),
+      (
+        'all users, one month',
+        lambda: txns.filter(created_at__month=month_ago.month, created_at__year=month_ago.year).count(),
+        lambda: txns.filter(month_filter_q('created_at', month_ago.year, month_ago.month)).count(),
+      ),
+    ]
+
+  def time_it(self, run, repeat):
+    result = run()  # warm-up, also the value compared between both versions
+    timings = []
+    for _ in range(repeat):
+      started = time.perf_counter()
+      run()
+      timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+  def handle(self, *args, **options):
+    with rolled_back():
+      user_ids = seed_network(options['users'], with_deposits=False)
+      started = time.perf_counter()
+      rows = seed_history(user_ids, options['days'])
+      with connection.cursor() as cursor:
+        cursor.execute('ANALYZE server_transaction')
+      self.stdout.write(f'Seeded {rows} transactions in {time.perf_counter() - started:.0f}s.')
+
+      for label, legacy, ranged in self.get_cases(user_ids[-1]):
+        legacy_result, legacy_ms = self.time_it(legacy, options['repeat'])
+        ranged_result, ranged_ms = self.time_it(ranged, options['repeat'])
+        same = 'same result' if legacy_result == ranged_result else 'RESULTS DIFFER'
+        self.stdout.write(
+          f'{label}: lookup={legacy_ms:.1f}ms range={ranged_ms:.1f}ms '
+          f'({legacy_ms / max(ranged_ms, 0.001):.1f}x, {same})'
+        )
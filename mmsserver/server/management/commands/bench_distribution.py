@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from server.utils import DISTRIBUTION_BATCH_SIZE, distribute_profit_chunked, distribute_profit_manually
+from ._bench import ensure_operational_profit, measure, rolled_back, seed_network
+
+
+class Command(BaseCommand):
+  help = 'Seeds synthetic users and reports wall time and query count of distribute_profit_manually (rolled back).'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000], help='User counts to benchmark.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunked', action='store_true', help='Benchmark distribute_profit_chunked instead.')
+    parser.add_argument('--chunk-size', type=int, default=DISTRIBUTION_BATCH_SIZE)
+
+  def handle(self, *args, **options):
+    for total_users in options['users']:
+      with rolled_back():
+        seed_network(total_users, seed=options['seed'])
+        ensure_operational_profit()
+
+        with measure() as stats:
+          if options['chunked']:
+            result = distribute_profit_chunked(chunk_size=options['chunk_size'])
+          else:
+            result = distribute_profit_manually()
+
+        metrics = result.get('metrics', {})
+        self.stdout.write(
+          f"users={total_users} seconds={stats['seconds']:.2f} queries={stats['queries']} "
+          f"profit_tx={result.get('profit_tx_created')} affiliate_tx={result.get('affiliate_tx_created')} "
+          f"total_profit={metrics.get('total_profit_distributed')}"
+        )
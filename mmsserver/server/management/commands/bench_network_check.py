@@ -0,0 +1,73 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from server.models import User
+from server.utils import are_in_same_network
+from ._bench import measure, rolled_back, seed_network
+
+
+def legacy_are_in_same_network(sender, receiver, max_depth=99):
+  """The pre-closure check: materialises both downlines level by level."""
+  except_ids = ['MMS01FXC', 'MMS00QVS']
+
+  def downline_ids(user):
+    ids = set()
+    current = list(User.objects.filter(referred_by=user.id))
+    depth = 1
+    while current and depth <= max_depth:
+      ids.update(u.id for u in current)
+      current = list(User.objects.filter(referred_by__in=[u.id for u in current]))
+      depth += 1
+    return ids - set(except_ids)
+
+  return receiver.id in downline_ids(sender) or sender.id in downline_ids(receiver)
+
+
+class Command(BaseCommand):
+  help = 'Micro-benchmark of the transfer ancestry check on a synthetic referral tree (rolled back).'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--pairs', type=int, default=200, help='Random sender/receiver pairs to check.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the closure-based check.')
+
+  def handle(self, *args, **options):
+    total_users = options['users']
+    # A handful of leaders on top of an ever wider base, so top senders have huge downlines
+    level_sizes = [5, 50, 500]
+    level_sizes += [-(-(total_users - sum(level_sizes)) // 3)] * 3
+
+    with rolled_back():
+      seeded_ids = seed_network(total_users, level_sizes=level_sizes, seed=options['seed'], with_deposits=False)
+      users = {user.id: user for user in User.objects.filter(id__in=seeded_ids)}
+      rng = random.Random(options['seed'])
+      leaders = seeded_ids[:level_sizes[0] + level_sizes[1]]
+      pairs = []
+      for index in range(options['pairs']):
+        sender = users[rng.choice(leaders)]
+        if index % 2:
+          # Half of the pairs are connected: the receiver is somewhere in the sender's downline
+          downline_ids = list(sender.get_downline().values_list('id', flat=True))
+          receiver = users[rng.choice(downline_ids)] if downline_ids else users[rng.choice(seeded_ids)]
+        else:
+          receiver = users[rng.choice(seeded_ids)]
+        pairs.append((sender, receiver))
+
+      checks = [('closure', are_in_same_network)]
+      if not options['skip_legacy']:
+        checks.append(('legacy', legacy_are_in_same_network))
+
+      results = {}
+      for label, check in checks:
+        with measure() as stats:
+          results[label] = [check(sender, receiver) for sender, receiver in pairs]
+        per_call_ms = stats['seconds'] / len(pairs) * 1000
+        self.stdout.write(
+          f"{label}: users={total_users} pairs={len(pairs)} connected={sum(results[label])} "
+          f"ms/check={per_call_ms:.2f} queries/check={stats['queries'] / len(pairs):.1f}"
+        )
+
+      if 'legacy' in results and results['legacy'] != results['closure']:
+        self.stdout.write(self.style.ERROR('Closure and legacy checks disagree.'))
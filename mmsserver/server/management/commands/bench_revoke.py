@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from server.utils import distribute_profit_chunked, get_day_distributions, revoke_profit_distribution
+from ._bench import ensure_operational_profit, measure, rolled_back, seed_network
+
+
+class Command(BaseCommand):
+  help = (
+    "Seeds synthetic users, distributes today's profit and reports wall time and query count of "
+    'revoke_profit_distribution and of a second, idempotent run (rolled back).'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--users', type=int, nargs='+', default=[50000], help='User counts to benchmark.')
+    parser.add_argument('--seed', type=int, default=42)
+
+  def handle(self, *args, **options):
+    for total_users in options['users']:
+      with rolled_back():
+        seed_network(total_users, seed=options['seed'])
+        ensure_operational_profit()
+        distribute_profit_chunked()
+        today = timezone.localdate()
+        distributed = get_day_distributions(today).count()
+
+        with measure() as stats:
+          result = revoke_profit_distribution(today)
+        metrics = result['metrics']
+        reversed_count = (
+          metrics['profit_reversed_count'] + metrics['affiliate_reversed_count'] + metrics['sharing_profit_reversed_count']
+        )
+        self.stdout.write(
+          f"users={total_users} distribution_rows={distributed} seconds={stats['seconds']:.2f} "
+          f"queries={stats['queries']} reversed={reversed_count} total_reversed={metrics['total_amount_reversed']} "
+          f"skipped_negative={len(metrics['skipped_negative_balance_risk'])}"
+        )
+
+        with measure() as stats:
+          rerun = revoke_profit_distribution(today)['metrics']
+        rerun_reversed = (
+          rerun['profit_reversed_count'] + rerun['affiliate_reversed_count'] + rerun['sharing_profit_reversed_count']
+        )
+        self.stdout.write(
+          f"  rerun seconds={stats['seconds']:.2f} queries={stats['queries']} reversed={rerun_reversed} "
+          f"skipped_already_reversed={rerun['skipped_already_reversed']}"
+        )
+        if rerun_reversed:
+          raise CommandError('The second run reversed transactions again.')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from server.dashboard import find_drift
+
+
+class Command(BaseCommand):
+  help = 'Compares the admin dashboard counters with live aggregates and reports drift.'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--show', type=int, default=20, help='Number of drifting counters to print.')
+
+  def handle(self, *args, **options):
+    drift = find_drift()
+    for metric, day, stored, live in drift[:options['show']]:
+      label = f'{metric} {day}' if day else metric
+      self.stdout.write(f'{label}: stored {stored}, live {live} (drift {stored - live})')
+
+    if drift:
+      raise CommandError(
+        f'{len(drift)} dashboard counter(s) drifted from the live totals. '
+        'Run rebuild_dashboard_summary to fix them.'
+      )
+    self.stdout.write(self.style.SUCCESS('Dashboard summary matches the live totals.'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from server.models import ReferralClosure, User
+
+
+class Command(BaseCommand):
+  help = 'Compares the ReferralClosure table with the closure computed from User.referred_by.'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--show', type=int, default=10, help='Number of mismatching rows to print.')
+
+  def handle(self, *args, **options):
+    expected = set(ReferralClosure.expected_rows())
+    actual = set(ReferralClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    missing = expected - actual
+    unexpected = actual - expected
+    unreachable = User.objects.count() - sum(1 for _, _, depth in expected if depth == 0)
+
+    self.stdout.write(f'Expected rows: {len(expected)}, stored rows: {len(actual)}.')
+    if unreachable:
+      self.stdout.write(self.style.WARNING(f'{unreachable} user(s) are in a referral cycle and have no closure rows.'))
+    for label, rows in (('Missing', missing), ('Unexpected', unexpected)):
+      for ancestor_id, descendant_id, depth in sorted(rows)[:options['show']]:
+        self.stdout.write(f'{label}: {ancestor_id} -> {descendant_id} (depth {depth})')
+
+    if missing or unexpected:
+      raise CommandError(
+        f'Referral closure is inconsistent: {len(missing)} missing, {len(unexpected)} unexpected. '
+        'Run rebuild_referral_closure to fix it.'
+      )
+    self.stdout.write(self.style.SUCCESS('Referral closure is consistent.'))
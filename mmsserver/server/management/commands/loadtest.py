@@ -0,0 +1,479 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import requests
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from mmsserver.middleware.query_metrics import PERCENTILES, _percentile
+from server.balances import change_balances
+from server.dashboard import record_bulk_create
+from server.ledger import record_transactions_created
+from server.models import Asset, OperationalProfit, Transaction, User, Wallet, WithdrawalRequest, WithdrawalWindow
+from ._bench import seed_history, seed_network
+
+LOADTEST_PASSWORD = 'Loadtest#2026'
+ADMIN_ID = 'MMS00LDT'
+START_BALANCES = {
+  'master_point_balance': Decimal('5000.00'),
+  'profit_point_balance': Decimal('1000.00'),
+  'affiliate_point_balance': Decimal('300.00'),
+  'introducer_point_balance': Decimal('300.00'),
+}
+DEFAULT_MIX = (
+  'login=1,wallet=20,asset=12,details=8,history=20,daily_totals=6,transfer=8,'
+  'convert=8,place_asset=4,withdraw=4,approve=4'
+)
+HISTORY_PATHS = ['user_profit_tx/', 'user_commission_tx/', 'user_transfer_tx/', 'user_convert_tx/', 'user_asset_tx/']
+# Response bodies that mean the request lost a fight over a lock
+LOCK_ERRORS = ('deadlock detected', 'database is locked', 'could not serialize access', 'lock timeout')
+JOB_POLL_SECONDS = 0.5
+# Share of history page loads that go on to the next page, as a scrolling user does
+HISTORY_NEXT_PAGE_SHARE = 0.3
+SAMPLE_ERRORS = 3
+
+
+class LoadResults:
+  """Latency samples and outcomes per endpoint label, shared by the worker threads."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.samples = defaultdict(list)
+    self.statuses = defaultdict(lambda: defaultdict(int))
+    self.lock_errors = defaultdict(int)
+    self.sample_errors = defaultdict(list)
+
+  def record(self, label, status, elapsed_ms, body=''):
+    lock_error = status >= 500 and any(text in body for text in LOCK_ERRORS)
+    with self._lock:
+      self.samples[label].append(elapsed_ms)
+      self.statuses[label][status] += 1
+      if lock_error:
+        self.lock_errors[label] += 1
+      if (status >= 500 or status == 0) and len(self.sample_errors[label]) < SAMPLE_ERRORS:
+        self.sample_errors[label].append(body[:200])
+
+  def summary(self, elapsed):
+    endpoints = {}
+    with self._lock:
+      for label, samples in sorted(self.samples.items()):
+        latencies = sorted(samples)
+        statuses = self.statuses[label]
+        errors = sum(count for status, count in statuses.items() if status >= 500 or status == 0)
+        rejected = sum(count for status, count in statuses.items() if 400 <= status < 500)
+        endpoints[label] = {
+          'requests': len(latencies),
+          'rps': round(len(latencies) / elapsed, 1),
+          'ok': len(latencies) - errors - rejected,
+          'rejected_4xx': rejected,
+          'errors': errors,
+          'error_rate': round(errors / len(latencies), 4),
+          'lock_errors': self.lock_errors[label],
+          'latency_ms': {
+            **{f'p{pct}': round(_percentile(latencies, pct), 1) for pct in PERCENTILES},
+            'mean': round(sum(latencies) / len(latencies), 1),
+            'max': round(latencies[-1], 1),
+          },
+          'statuses': {str(status): count for status, count in sorted(statuses.items())},
+          'sample_errors': self.sample_errors[label],
+        }
+    return endpoints
+
+
+class Command(BaseCommand):
+  help = (
+    'Load test against a running server: seeds users in the database the server uses, replays a weighted '
+    'mix of user and admin requests from many threads, optionally triggers a profit distribution mid-run, '
+    'and reports throughput, p50/p95/p99 per endpoint, error rates and lock errors / deadlocks. Results are '
+    'written as JSON so runs can be compared across commits. Seeded rows are deleted afterwards; point it '
+    'at a development database only.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server root; routes live under /server/.')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--leaders', type=int, default=10, help='Level 1 users the others transfer with.')
+    parser.add_argument('--history-days', type=int, default=30, help='Days of transaction history seeded per user.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads.')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run the mix.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'name=weight pairs (default: {DEFAULT_MIX}).')
+    parser.add_argument(
+      '--distribution-after', type=float, default=None,
+      help='Seconds into the run to approve pending placements and trigger a profit distribution.',
+    )
+    parser.add_argument('--job-timeout', type=float, default=600, help='Seconds to wait for the distribution job.')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='JSON file to write (default: loadtest-<timestamp>.json).')
+    parser.add_argument('--compare', default=None, help='Earlier JSON result to compare this run with.')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded users instead of deleting them.')
+
+  # --------------------- SETUP ------------------------------------------------------------
+
+  def parse_mix(self, mix):
+    weights = {}
+    for pair in mix.split(','):
+      name, _, weight = pair.partition('=')
+      name = name.strip()
+      if not hasattr(self, f'op_{name}'):
+        raise CommandError(f'Unknown operation in --mix: {name}')
+      weights[name] = float(weight or 1)
+    return weights
+
+  def seed(self, options):
+    self.created = []  # (model, filter) rows to delete afterwards
+    superuser_exists = User.objects.filter(is_superuser=True).exists()
+    leaders = options['leaders']
+    user_ids = seed_network(
+      options['users'], level_sizes=[leaders, options['users'] - leaders], seed=options['seed'], with_deposits=True,
+    )
+    if not superuser_exists:
+      self.created.append((User, {'is_superuser': True}))
+    self.created.append((User, {'id__in': user_ids}))
+
+    password = make_password(LOADTEST_PASSWORD)
+    User.objects.filter(id__in=user_ids).update(password=password)
+    admin = User(
+      id=ADMIN_ID, username='MMSloadtestadmin', ic='970000000000', email='loadtestadmin@loadtest.invalid',
+      password=password, is_staff=True, verification_status='APPROVED',
+    )
+    admin.save(force_insert=True)
+    self.created.append((User, {'id': ADMIN_ID}))
+
+    # seed_network / seed_history bulk-create; count the rows so deleting them leaves the totals as they were
+    for model, lookup in ((User, 'id__in'), (Wallet, 'user_id__in'), (Asset, 'user_id__in'), (Transaction, 'user_id__in')):
+      rows = list(model.objects.filter(**{lookup: user_ids}))
+      record_bulk_create(rows)
+    record_transactions_created(list(Transaction.objects.filter(user_id__in=user_ids)))
+    if options['history_days']:
+      last_pk = Transaction.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+      seed_history(user_ids, options['history_days'])
+      seeded = Transaction.objects.filter(pk__gt=last_pk)
+      # History ends yesterday, so today's distribution has not run yet
+      seeded.update(created_at=F('created_at') - timedelta(days=1))
+      history = list(seeded)
+      record_bulk_create(history)
+      record_transactions_created(history)
+      # Pending placements without an asset would block the distribution and cannot be approved
+      Transaction.objects.filter(pk__gt=last_pk, request_status='PENDING').update(request_status='APPROVED')
+    for user_id in user_ids:
+      change_balances(Wallet, user_id, START_BALANCES)
+
+    today = timezone.localdate()
+    if not WithdrawalWindow.objects.filter(date=today, is_active=True).exists():
+      window = WithdrawalWindow.objects.create(date=today, is_active=True)
+      self.created.append((WithdrawalWindow, {'pk': window.pk}))
+    operational_profit = dict(active_day_profit=today.day, active_month_profit=today.month, active_year_profit=today.year)
+    if options['distribution_after'] is not None and not OperationalProfit.objects.filter(**operational_profit).exists():
+      created = OperationalProfit.objects.create(daily_profit_rate=Decimal('1.00'), **operational_profit)
+      self.created.append((OperationalProfit, {'pk': created.pk}))
+
+    users = {user.id: user for user in User.objects.filter(id__in=user_ids)}
+    self.members = [user_id for user_id in user_ids[leaders:]]
+    self.users = users
+    # Minted here with the server's signing key, so the run does not start with a login storm
+    self.tokens = {user_id: str(RefreshToken.for_user(user).access_token) for user_id, user in users.items()}
+    self.admin_token = str(RefreshToken.for_user(admin).access_token)
+    # Only requests made during the run are approved, not the seeded history
+    self.approval_marks = {
+      'placement': Transaction.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+      'PROFIT': WithdrawalRequest.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+    }
+    self.approval_marks['COMMISSION'] = self.approval_marks['PROFIT']
+    self.approval_lock = threading.Lock()
+    # Set while the distribution run drains the pending placements that would block it
+    self.placements_paused = threading.Event()
+    return user_ids
+
+  def cleanup(self):
+    for model, lookup in reversed(self.created):
+      model.objects.filter(**lookup).delete()
+
+  # --------------------- OPERATIONS -------------------------------------------------------
+  # Each returns (label, method, route, token, payload), or None when there is nothing to do.
+
+  def op_login(self, rng):
+    user = self.users[rng.choice(self.members)]
+    return 'login', 'post', 'login/', None, {'username': user.username, 'password': LOADTEST_PASSWORD}
+
+  def op_wallet(self, rng):
+    return 'user_wallet', 'get', 'user_wallet/', self.tokens[rng.choice(self.members)], None
+
+  def op_asset(self, rng):
+    return 'user_asset', 'get', 'user_asset/', self.tokens[rng.choice(self.members)], None
+
+  def op_details(self, rng):
+    return 'user_details', 'get', 'user_details/', self.tokens[rng.choice(self.members)], None
+
+  def op_history(self, rng):
+    route = rng.choice(HISTORY_PATHS)
+    return route.rstrip('/'), 'get', route, self.tokens[rng.choice(self.members)], None
+
+  def op_daily_totals(self, rng):
+    route = rng.choice(['user_daily_total_profit/', 'user_daily_commission_tx/', 'user_withdrawal_total/'])
+    return route.rstrip('/'), 'get', route, self.tokens[rng.choice(self.members)], None
+
+  def op_transfer(self, rng):
+    # Between a member and its leader, both ways, so the leaders' wallets are hot rows
+    member = self.users[rng.choice(self.members)]
+    leader = self.users[member.referred_by]
+    sender, receiver = (member, leader) if rng.random() < 0.5 else (leader, member)
+    payload = {'receiver': receiver.username, 'amount': str(rng.randint(1, 20))}
+    return 'transfer_master_to_user', 'post', 'transfer_master_to_user/', self.tokens[sender.id], payload
+
+  def op_convert(self, rng):
+    route = rng.choice(['convert_profit/', 'convert_commission/'])
+    return route.rstrip('/'), 'post', route, self.tokens[rng.choice(self.members)], {'amount': str(rng.randint(1, 5))}
+
+  def op_place_asset(self, rng):
+    if self.placements_paused.is_set():
+      return None
+    payload = {'amount': str(rng.choice([50, 100, 200]))}
+    return 'place_asset', 'post', 'place_asset/', self.tokens[rng.choice(self.members)], payload
+
+  def op_withdraw(self, rng):
+    route = rng.choice(['withdraw_profit/', 'withdraw_commission/'])
+    return route.rstrip('/'), 'post', route, self.tokens[rng.choice(self.members)], {'amount': '50'}
+
+  def next_pending(self, kind):
+    """Claims the oldest pending item of kind that no other thread has picked up."""
+    with self.approval_lock:
+      mark = self.approval_marks[kind]
+      if kind == 'placement':
+        pending = Transaction.objects.filter(
+          user_id__in=self.members, transaction_type='ASSET_PLACEMENT', request_status='PENDING', pk__gt=mark,
+        )
+      else:
+        pending = WithdrawalRequest.objects.filter(
+          wallet__user_id__in=self.members, point_type=kind, transaction__request_status='PENDING', pk__gt=mark,
+        )
+      pk = pending.order_by('pk').values_list('pk', flat=True).first()
+      if pk is not None:
+        self.approval_marks[kind] = pk
+      return pk
+
+  def op_approve(self, rng):
+    kind = rng.choice(['PROFIT', 'COMMISSION'] if self.placements_paused.is_set() else ['placement', 'PROFIT', 'COMMISSION'])
+    pk = self.next_pending(kind)
+    if pk is None:
+      return None
+    if kind == 'placement':
+      return 'process_place_asset', 'post', 'process_place_asset/', self.admin_token, {'transaction_id': pk, 'action': 'Approve'}
+    if kind == 'PROFIT':
+      payload = {'transaction_id': pk, 'action': 'Approve', 'reference': f'LOADTEST-{pk}'}
+      return 'process_withdrawal_profit', 'post', 'process_withdrawal_profit/', self.admin_token, payload
+    payload = {'request_id': pk, 'action': 'Approve', 'reference': f'LOADTEST-{pk}'}
+    return 'process_withdrawal_commission', 'post', 'process_withdrawal_commission/', self.admin_token, payload
+
+  # --------------------- RUNNER -----------------------------------------------------------
+
+  def send(self, session, results, label, method, route, token, payload):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    url = route if route.startswith('http') else f'{self.server_url}{route}'
+    started = time.perf_counter()
+    try:
+      response = session.request(method, url, json=payload, headers=headers, timeout=self.request_timeout)
+      status, body = response.status_code, response.text
+    except requests.RequestException as e:
+      status, body = 0, str(e)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    results.record(label, status, elapsed_ms, body)
+    return status, body
+
+  def worker(self, index, weights, deadline, results):
+    rng = random.Random(self.seed_value + index)
+    names, cumulative = list(weights), list(weights.values())
+    session = requests.Session()
+    while time.monotonic() < deadline:
+      name = rng.choices(names, weights=cumulative)[0]
+      spec = getattr(self, f'op_{name}')(rng)
+      if spec is None:
+        continue
+      status, body = self.send(session, results, *spec)
+      if name == 'history' and status == 200 and rng.random() < HISTORY_NEXT_PAGE_SHARE:
+        next_page = json.loads(body).get('next')
+        if next_page:
+          label, method, _, token, _ = spec
+          self.send(session, results, label, method, next_page, token, None)
+
+  def run_distribution(self, start_in, deadline, results, report):
+    """Drains the pending placements, triggers a distribution and follows the job until it ends."""
+    time.sleep(start_in)
+    session = requests.Session()
+    self.placements_paused.set()
+    try:
+      # Includes placements whose approval failed earlier in the run; retried until none is left
+      pending = Transaction.objects.filter(
+        user_id__in=self.members, transaction_type='ASSET_PLACEMENT', request_status='PENDING',
+      ).values_list('pk', flat=True)
+      while time.monotonic() < deadline:
+        pks = list(pending)
+        if not pks:
+          break
+        for pk in pks:
+          self.send(session, results, 'process_place_asset', 'post', 'process_place_asset/', self.admin_token,
+                    {'transaction_id': pk, 'action': 'Approve'})
+      triggered = time.monotonic()
+      status, body = self.send(session, results, 'distribute_profit', 'post', 'distribute_profit/', self.admin_token, {})
+    finally:
+      self.placements_paused.clear()
+    report.update({'trigger_status': status, 'trigger_response': body[:500]})
+    if status != 202:
+      return
+    job_id = json.loads(body)['job_id']
+    job = {}
+    while time.monotonic() - triggered < self.job_timeout:
+      status, body = self.send(session, results, 'job_status', 'get', f'job_status/{job_id}/', self.admin_token, None)
+      job = json.loads(body) if status == 200 else {}
+      if job.get('status') in ('SUCCEEDED', 'FAILED'):
+        break
+      time.sleep(JOB_POLL_SECONDS)
+    report.update({
+      'job_id': job_id,
+      'status': job.get('status', 'TIMED OUT'),
+      'rows_processed': job.get('rows_processed'),
+      'elapsed_seconds': job.get('elapsed_seconds'),
+      'seconds_until_finished': round(time.monotonic() - triggered, 1),
+    })
+
+  def postgres_deadlocks(self):
+    if connection.vendor != 'postgresql':
+      return None
+    with connection.cursor() as cursor:
+      cursor.execute('SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()')
+      return cursor.fetchone()[0]
+
+  def server_metrics(self, method):
+    """The request metrics of whichever worker answers (each gunicorn worker keeps its own)."""
+    try:
+      response = requests.request(
+        method, f'{self.server_url}request_metrics/', headers={'Authorization': f'Bearer {self.admin_token}'},
+        timeout=self.request_timeout,
+      )
+      return response.json() if response.ok else None
+    except (requests.RequestException, ValueError):
+      return None
+
+  def git_commit(self):
+    try:
+      return subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+      ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+      return None
+
+  def handle(self, *args, **options):
+    weights = self.parse_mix(options['mix'])
+    self.server_url = options['base_url'].rstrip('/') + '/server/'
+    self.request_timeout = options['timeout']
+    self.job_timeout = options['job_timeout']
+    self.seed_value = options['seed']
+    try:
+      requests.get(self.server_url, timeout=self.request_timeout)
+    except requests.RequestException as e:
+      raise CommandError(f'Server not reachable at {self.server_url}: {str(e)}')
+
+    try:
+      user_ids = self.seed(options)
+      self.stdout.write(
+        f"Seeded {len(user_ids)} users on {connection.vendor}; running {options['duration']}s with "
+        f"{options['concurrency']} threads against {self.server_url}"
+      )
+      result = self.run(weights, options)
+    finally:
+      if not options['keep']:
+        self.cleanup()
+
+    self.print_result(result)
+    output = Path(options['output'] or f"loadtest-{timezone.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.write_text(json.dumps(result, indent=2, default=str))
+    self.stdout.write(f'Results written to {output}')
+    if options['compare']:
+      self.print_comparison(json.loads(Path(options['compare']).read_text()), result)
+
+  def run(self, weights, options):
+    results = LoadResults()
+    self.server_metrics('delete')
+    deadlocks_before = self.postgres_deadlocks()
+    distribution = {}
+    started = time.monotonic()
+    deadline = started + options['duration']
+    threads = [
+      threading.Thread(target=self.worker, args=(index, weights, deadline, results))
+      for index in range(options['concurrency'])
+    ]
+    if options['distribution_after'] is not None:
+      threads.append(threading.Thread(
+        target=self.run_distribution, args=(options['distribution_after'], deadline, results, distribution),
+      ))
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints = results.summary(elapsed)
+    total = sum(row['requests'] for row in endpoints.values())
+    errors = sum(row['errors'] for row in endpoints.values())
+    deadlocks_after = self.postgres_deadlocks()
+    return {
+      'started_at': timezone.now().isoformat(),
+      'git_commit': self.git_commit(),
+      'base_url': options['base_url'],
+      'database': connection.vendor,
+      'config': {key: options[key] for key in (
+        'users', 'leaders', 'history_days', 'concurrency', 'duration', 'mix', 'distribution_after', 'seed',
+      )},
+      'elapsed_seconds': round(elapsed, 2),
+      'requests': total,
+      'throughput_rps': round(total / elapsed, 1),
+      'error_rate': round(errors / total, 4) if total else None,
+      'lock_errors': sum(row['lock_errors'] for row in endpoints.values()),
+      'postgres_deadlocks': None if deadlocks_before is None else deadlocks_after - deadlocks_before,
+      'endpoints': endpoints,
+      'distribution': distribution or None,
+      'server_metrics': self.server_metrics('get'),
+    }
+
+  # --------------------- REPORT -----------------------------------------------------------
+
+  def print_result(self, result):
+    self.stdout.write(
+      f"{result['requests']} requests in {result['elapsed_seconds']}s: {result['throughput_rps']} req/s, "
+      f"error rate {result['error_rate']}, lock errors {result['lock_errors']}, "
+      f"postgres deadlocks {result['postgres_deadlocks']}"
+    )
+    self.stdout.write(f"{'endpoint':<32} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'4xx':>5} {'err':>5}")
+    for label, row in result['endpoints'].items():
+      latency = row['latency_ms']
+      self.stdout.write(
+        f"{label:<32} {row['requests']:>6} {row['rps']:>7} {latency['p50']:>8} {latency['p95']:>8} "
+        f"{latency['p99']:>8} {row['rejected_4xx']:>5} {row['errors']:>5}"
+      )
+    if result['distribution']:
+      self.stdout.write(f"Distribution: {result['distribution']}")
+
+  def print_comparison(self, before, after):
+    self.stdout.write(
+      f"Compared with {before.get('git_commit')} ({before.get('started_at')}): "
+      f"throughput {before['throughput_rps']} -> {after['throughput_rps']} req/s"
+    )
+    for label, row in after['endpoints'].items():
+      old = before['endpoints'].get(label)
+      if not old:
+        continue
+      self.stdout.write(
+        f"  {label:<32} p95 {old['latency_ms']['p95']} -> {row['latency_ms']['p95']} ms, "
+        f"errors {old['errors']} -> {row['errors']}"
+      )
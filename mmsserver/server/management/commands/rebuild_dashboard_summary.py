@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from server.dashboard import rebuild_dashboard_counters
+
+
+class Command(BaseCommand):
+  help = 'Rebuilds the admin dashboard counters from live aggregates over wallets, assets, transactions and withdrawals.'
+
+  def handle(self, *args, **options):
+    totals = rebuild_dashboard_counters()
+    self.stdout.write(self.style.SUCCESS(f'Dashboard summary rebuilt: {len(totals)} counters.'))
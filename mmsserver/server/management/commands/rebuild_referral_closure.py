@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from server.models import ReferralClosure
+
+
+class Command(BaseCommand):
+  help = 'Rebuilds the ReferralClosure table from User.referred_by.'
+
+  def handle(self, *args, **options):
+    created = ReferralClosure.rebuild()
+    self.stdout.write(self.style.SUCCESS(f'Referral closure rebuilt: {created} rows.'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from server.jobs import STALE_JOB_AFTER, fail_stale_jobs, run_next_job
+
+
+class Command(BaseCommand):
+  help = 'Worker loop that runs queued background jobs (profit distribution, revoke, welcome bonus removal).'
+
+  def add_arguments(self, parser):
+    parser.add_argument('--once', action='store_true', help='Run pending jobs, then exit instead of polling.')
+    parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait between polls when the queue is empty.')
+
+  def handle(self, *args, **options):
+    self.stdout.write(f"Job worker started (stale after {STALE_JOB_AFTER}).")
+    while True:
+      fail_stale_jobs()
+      job = run_next_job()
+      if job is not None:
+        self.stdout.write(f"Job {job.id} {job.job_type}: {job.status} ({job.rows_processed}/{job.rows_total})")
+        continue
+      if options['once']:
+        break
+      time.sleep(options['sleep'])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from server.jobs import enqueue_job, get_active_job
+from server.token_sweeper import SWEEP_BATCH_PAUSE, SWEEP_BATCH_SIZE, sweep_expired_tokens
+
+
+class Command(BaseCommand):
+  help = (
+    'Deletes expired UserJWT, OutstandingToken and BlacklistedToken rows in small batches and '
+    'reports the table sizes. Run it from cron, or queue it for the run_jobs worker with --enqueue.'
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+    parser.add_argument('--pause', type=float, default=SWEEP_BATCH_PAUSE, help='Seconds to sleep between batches.')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM (ANALYZE) the token tables afterwards (PostgreSQL).')
+    parser.add_argument('--enqueue', action='store_true', help='Queue a SWEEP_EXPIRED_TOKENS job instead of sweeping here.')
+
+  def handle(self, *args, **options):
+    if options['enqueue']:
+      job = get_active_job('SWEEP_EXPIRED_TOKENS')
+      if job is None:
+        job = enqueue_job('SWEEP_EXPIRED_TOKENS', payload={'vacuum': options['vacuum']})
+        self.stdout.write(f'Queued job {job.id}.')
+      else:
+        self.stdout.write(f'Job {job.id} is already {job.status.lower()}.')
+      return
+
+    result = sweep_expired_tokens(batch_size=options['batch_size'], pause=options['pause'], vacuum=options['vacuum'])
+    for table, before in result['sizes_before'].items():
+      after = result['sizes_after'][table]
+      size = f", {before['bytes'] // 1024} kB -> {after['bytes'] // 1024} kB" if before['bytes'] is not None else ''
+      self.stdout.write(f"{table}: {before['rows']} -> {after['rows']} rows{size}")
+    removed = result['removed']
+    self.stdout.write(self.style.SUCCESS(
+      f"Removed {removed['user_jwt']} UserJWT, {removed['outstanding_token']} outstanding and "
+      f"{removed['blacklisted_token']} blacklisted token rows expired before {result['expired_before']}."
+    ))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:50
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0020_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistributionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distribution_date', models.DateField(unique=True)),
+                ('daily_profit_rate', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('last_user_id', models.CharField(blank=True, max_length=8)),
+                ('users_total', models.PositiveIntegerField(default=0)),
+                ('users_processed', models.PositiveIntegerField(default=0)),
+                ('profit_tx_created', models.PositiveIntegerField(default=0)),
+                ('affiliate_tx_created', models.PositiveIntegerField(default=0)),
+                ('affiliate_wallets_updated', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Distribution Checkpoint',
+                'verbose_name_plural': 'Distribution Checkpoints',
+                'ordering': ['-distribution_date'],
+            },
+        ),
+    ]
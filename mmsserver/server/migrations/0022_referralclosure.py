@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of server.models.iter_referral_closure_rows as of this migration
+def iter_referral_closure_rows(referrer_by_id):
+    children = {}
+    roots = []
+    for user_id, referrer_id in referrer_by_id.items():
+        if referrer_id and referrer_id in referrer_by_id:
+            children.setdefault(referrer_id, []).append(user_id)
+        else:
+            roots.append(user_id)
+
+    ancestors = {user_id: [] for user_id in roots}
+    level = roots
+    while level:
+        next_level = []
+        for user_id in level:
+            chain = ancestors.pop(user_id)
+            yield (user_id, user_id, 0)
+            for depth, ancestor_id in enumerate(chain, start=1):
+                yield (ancestor_id, user_id, depth)
+            for child_id in children.get(user_id, ()):
+                ancestors[child_id] = [user_id] + chain
+                next_level.append(child_id)
+        level = next_level
+
+
+def build_referral_closure(apps, schema_editor):
+    User = apps.get_model('server', 'User')
+    ReferralClosure = apps.get_model('server', 'ReferralClosure')
+    referrer_by_id = dict(User.objects.values_list('id', 'referred_by'))
+    ReferralClosure.objects.bulk_create(
+        (
+            ReferralClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for ancestor_id, descendant_id, depth in iter_referral_closure_rows(referrer_by_id)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0021_distributioncheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Referral Closure',
+                'verbose_name_plural': 'Referral Closures',
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='server_refe_ancesto_ebd754_idx'), models.Index(fields=['descendant', 'depth'], name='server_refe_descend_e2807e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_referral_closure_pair')],
+            },
+        ),
+        migrations.RunPython(build_referral_closure, migrations.RunPython.noop),
+    ]
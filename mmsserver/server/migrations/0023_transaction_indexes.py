@@ -0,0 +1,88 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, so building the indexes does not
+    block writes to server_transaction. Same as
+    django.contrib.postgres.operations.AddIndexConcurrently, which cannot be
+    imported without psycopg; other databases get a plain CREATE INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('server', '0022_referralclosure'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Transaction', 'verbose_name_plural': 'Transactions'},
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('WITHDRAWAL', 'Withdrawal'), ('CONVERT', 'Convert'), ('TRANSFER', 'Transfer'), ('DISTRIBUTION', 'Distribution'), ('AFFILIATE_BONUS', 'Affiliate Bonus'), ('INTRODUCER_BONUS', 'Introducer Bonus'), ('ASSET_PLACEMENT', 'Asset Placement'), ('ASSET_WITHDRAWAL', 'Asset Withdrawal'), ('WELCOME_BONUS', 'Welcome Bonus'), ('SHARING_PROFIT', 'Sharing Profit'), ('WITHDRAWAL_FEE', 'Withdrawal Fee'), ('EXPIRATION', 'Expiration'), ('MIGRATION', 'Migration')], max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'point_type', '-created_at', '-id'], name='tx_user_point_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='tx_user_type_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='tx_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['-created_at', '-id'], name='tx_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'created_at'], name='tx_type_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('request_status', 'PENDING')), fields=['-created_at', '-id'], name='tx_pending_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('transaction_type', 'DISTRIBUTION')), fields=['reference', 'user'], name='tx_distribution_ref_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:16
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+# Frozen copies of the server.dashboard constants as of this migration
+EXCLUDED_WALLET_USER_IDS = {
+    'profit_point_balance': {'MMS00QVS', 'MMS01FXC'},
+    'affiliate_point_balance': {'MMS01FXC'},
+    'introducer_point_balance': {'MMS01FXC'},
+}
+ADMIN_ASSET_USER_IDS = {'MMS00QVS', 'MMS01FXC', 'MMS0216J', 'MMS02O5G', 'MMS02GKX'}
+ASSET_TIER_THRESHOLD = Decimal('10000')
+CENT = Decimal('0.01')
+WALLET_METRICS = {
+    'profit_point_balance': 'wallet_profit',
+    'affiliate_point_balance': 'wallet_affiliate',
+    'introducer_point_balance': 'wallet_introducer',
+}
+
+
+def build_dashboard_counters(apps, schema_editor):
+    """Fills the counters from full-table aggregates (server.dashboard.rebuild_dashboard_counters)."""
+    DashboardCounter = apps.get_model('server', 'DashboardCounter')
+    Wallet = apps.get_model('server', 'Wallet')
+    Asset = apps.get_model('server', 'Asset')
+    Transaction = apps.get_model('server', 'Transaction')
+    WithdrawalRequest = apps.get_model('server', 'WithdrawalRequest')
+    User = apps.get_model('server', 'User')
+
+    totals = {('users', None): User.objects.count()}
+    for field, metric in WALLET_METRICS.items():
+        totals[(metric, None)] = Wallet.objects.exclude(
+            user_id__in=EXCLUDED_WALLET_USER_IDS[field]
+        ).aggregate(total=Sum(field))['total']
+
+    above = Q(amount__gte=ASSET_TIER_THRESHOLD)
+    assets = Asset.objects.aggregate(
+        asset_total=Sum('amount'),
+        asset_admin=Sum('amount', filter=Q(user_id__in=ADMIN_ASSET_USER_IDS)),
+        asset_above_10k=Sum('amount', filter=above),
+        asset_below_10k=Sum('amount', filter=~above),
+        asset_above_10k_users=Count('id', filter=above),
+        asset_below_10k_users=Count('id', filter=~above),
+    )
+    totals.update({(metric, None): value for metric, value in assets.items()})
+
+    withdrawals = WithdrawalRequest.objects.aggregate(withdraw_amount=Sum('actual_amount'), withdraw_fee=Sum('fee'))
+    totals.update({(metric, None): value for metric, value in withdrawals.items()})
+
+    totals[('convert_total', None)] = Transaction.objects.filter(
+        transaction_type='CONVERT'
+    ).aggregate(total=Sum('amount'))['total']
+    daily_profits = (
+        Transaction.objects
+        .filter(transaction_type='DISTRIBUTION')
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Sum('amount'))
+        .order_by('day')
+    )
+    totals.update({('distribution', row['day']): row['total'] for row in daily_profits})
+
+    DashboardCounter.objects.bulk_create(
+        [
+            DashboardCounter(metric=metric, day=day, shard=0, value=Decimal(value).quantize(CENT))
+            for (metric, day), value in totals.items()
+            if value
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0023_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40)),
+                ('day', models.DateField(blank=True, null=True)),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Counter',
+                'verbose_name_plural': 'Dashboard Counters',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('metric', 'shard'), name='unique_dashboard_counter'), models.UniqueConstraint(condition=models.Q(('day__isnull', False)), fields=('metric', 'day', 'shard'), name='unique_dashboard_daily_counter')],
+            },
+        ),
+        migrations.RunPython(build_dashboard_counters, migrations.RunPython.noop),
+    ]
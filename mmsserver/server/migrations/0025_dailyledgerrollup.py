@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+ROLLUP_BATCH_SIZE = 1000
+
+
+def backfill_ledger_rollup(apps, schema_editor):
+    """Aggregates the existing transactions into rollup rows (server.ledger.rebuild_ledger_rollup)."""
+    Transaction = apps.get_model('server', 'Transaction')
+    DailyLedgerRollup = apps.get_model('server', 'DailyLedgerRollup')
+    rows = (
+        Transaction.objects
+        .filter(user__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day', 'transaction_type', 'point_type')
+        .annotate(total_amount=Sum('amount'), tx_count=Count('id'))
+        .order_by('user_id', 'day', 'transaction_type', 'point_type')
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=ROLLUP_BATCH_SIZE):
+        batch.append(DailyLedgerRollup(**row))
+        if len(batch) >= ROLLUP_BATCH_SIZE:
+            DailyLedgerRollup.objects.bulk_create(batch)
+            batch = []
+    DailyLedgerRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0024_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLedgerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('WITHDRAWAL', 'Withdrawal'), ('CONVERT', 'Convert'), ('TRANSFER', 'Transfer'), ('DISTRIBUTION', 'Distribution'), ('AFFILIATE_BONUS', 'Affiliate Bonus'), ('INTRODUCER_BONUS', 'Introducer Bonus'), ('ASSET_PLACEMENT', 'Asset Placement'), ('ASSET_WITHDRAWAL', 'Asset Withdrawal'), ('WELCOME_BONUS', 'Welcome Bonus'), ('SHARING_PROFIT', 'Sharing Profit'), ('WITHDRAWAL_FEE', 'Withdrawal Fee'), ('EXPIRATION', 'Expiration'), ('MIGRATION', 'Migration')], max_length=40)),
+                ('point_type', models.CharField(choices=[('MASTER', 'Master Point'), ('PROFIT', 'Profit'), ('COMMISSION', 'Commission'), ('ASSET', 'Asset')], max_length=40)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('tx_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Ledger Rollup',
+                'verbose_name_plural': 'Daily Ledger Rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'transaction_type', 'point_type'), name='unique_daily_ledger_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:23
+
+import jwt
+from django.db import migrations, models
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Frozen copy of server.models.get_token_jti as of this migration
+def get_token_jti(encoded_token):
+    try:
+        claims = jwt.decode(encoded_token, options={'verify_signature': False})
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get(api_settings.JTI_CLAIM)
+
+
+def backfill_access_jti(apps, schema_editor):
+    UserJWT = apps.get_model('server', 'UserJWT')
+    batch = []
+    for row in UserJWT.objects.filter(access_jti__isnull=True).only('pk', 'access_token').iterator(chunk_size=1000):
+        row.access_jti = get_token_jti(row.access_token)
+        if row.access_jti:
+            batch.append(row)
+        if len(batch) >= 1000:
+            UserJWT.objects.bulk_update(batch, ['access_jti'])
+            batch = []
+    UserJWT.objects.bulk_update(batch, ['access_jti'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0025_dailyledgerrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userjwt',
+            name='access_jti',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_access_jti, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='userjwt',
+            name='server_user_access__fb4688_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0026_userjwt_access_jti'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_type',
+            field=models.CharField(choices=[('DISTRIBUTE_PROFIT', 'Distribute Profit'), ('REVOKE_PROFIT_DISTRIBUTION', 'Revoke Profit Distribution'), ('REMOVE_WELCOME_BONUS', 'Remove Welcome Bonus'), ('SWEEP_EXPIRED_TOKENS', 'Sweep Expired Tokens')], db_index=True, max_length=40),
+        ),
+    ]
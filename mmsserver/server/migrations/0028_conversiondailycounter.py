@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+CONVERSION_COUNTER_BATCH_SIZE = 1000
+
+
+def backfill_conversion_counters(apps, schema_editor):
+    """Sums the existing conversions per (user, local day) (server.utils.rebuild_conversion_counters)."""
+    Transaction = apps.get_model('server', 'Transaction')
+    ConversionDailyCounter = apps.get_model('server', 'ConversionDailyCounter')
+    rows = (
+        Transaction.objects
+        .filter(user__isnull=False, transaction_type='CONVERT', target_point_type='MASTER')
+        .exclude(point_type='MASTER')
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(converted_amount=Sum('converted_amount'))
+        .filter(converted_amount__isnull=False)
+        .order_by('user_id', 'day')
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=CONVERSION_COUNTER_BATCH_SIZE):
+        batch.append(ConversionDailyCounter(**row))
+        if len(batch) >= CONVERSION_COUNTER_BATCH_SIZE:
+            ConversionDailyCounter.objects.bulk_create(batch)
+            batch = []
+    ConversionDailyCounter.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0027_job_sweep_expired_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionDailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('converted_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='conversion_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversion Daily Counter',
+                'verbose_name_plural': 'Conversion Daily Counters',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='unique_conversion_daily_counter')],
+            },
+        ),
+        migrations.RunPython(backfill_conversion_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+REVOKE_REFERENCE_PREFIX = 'REVOKE_'
+REVOKE_LINK_BATCH_SIZE = 1000
+
+
+def link_existing_reversals(apps, schema_editor):
+    """Links the reversals that only carry a REVOKE_<id> reference (server.utils.link_revoke_references)."""
+    Transaction = apps.get_model('server', 'Transaction')
+    linked = set()
+    candidates = {}
+    rows = Transaction.objects.filter(
+        reference__startswith=REVOKE_REFERENCE_PREFIX,
+    ).order_by('pk').values_list('pk', 'reference')
+    for pk, reference in rows.iterator(chunk_size=REVOKE_LINK_BATCH_SIZE):
+        try:
+            original_id = int(reference[len(REVOKE_REFERENCE_PREFIX):])
+        except ValueError:
+            continue
+        if original_id not in linked:
+            linked.add(original_id)
+            candidates[pk] = original_id
+
+    pending = list(candidates.items())
+    for start in range(0, len(pending), REVOKE_LINK_BATCH_SIZE):
+        batch = pending[start:start + REVOKE_LINK_BATCH_SIZE]
+        existing = set(Transaction.objects.filter(pk__in=[original_id for _, original_id in batch]).values_list('pk', flat=True))
+        updates = [Transaction(pk=pk, reverses_id=original_id) for pk, original_id in batch if original_id in existing]
+        Transaction.objects.bulk_update(updates, ['reverses'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('server', '0028_conversiondailycounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='reverses',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reversal', to='server.transaction'),
+        ),
+        migrations.RunPython(link_existing_reversals, migrations.RunPython.noop),
+    ]
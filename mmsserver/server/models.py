@@ -1,19 +1,52 @@
 from django.db import models
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.utils.crypto import get_random_string
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import RegexValidator
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework_simplejwt.settings import api_settings
 from decimal import Decimal
 from django.utils import timezone
 from datetime import timedelta
 import calendar
 import string
 
+import jwt
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class TrackedFieldsMixin:
+  """
+  Remembers the values of `tracked_fields` (attnames) as last read from or
+  written to the database, so server/dashboard.py and server/ledger.py can
+  turn a save into a delta of the totals they maintain.
+  """
+  tracked_fields = ()
+
+  @classmethod
+  def from_db(cls, db, field_names, values):
+    instance = super().from_db(db, field_names, values)
+    instance.snapshot_tracked_fields()
+    return instance
+
+  def snapshot_tracked_fields(self, fields=None):
+    snapshot = self.__dict__.setdefault('_tracked_snapshot', {})
+    for name in fields or self.tracked_fields:
+      # Deferred fields are missing from __dict__
+      if name in self.tracked_fields and name in self.__dict__:
+        snapshot[name] = self.__dict__[name]
+
+  def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+    super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    self.snapshot_tracked_fields(fields)
+
+
 class User(AbstractUser):
 
   id = models.CharField(max_length=8, primary_key=True)
@@ -109,11 +142,36 @@ class User(AbstractUser):
       if not self.__class__.objects.filter(id=code).exists():
         return code
         
+  @classmethod
+  def from_db(cls, db, field_names, values):
+    instance = super().from_db(db, field_names, values)
+    # Remember the stored referrer so save() can tell whether the user moved in the tree
+    instance._loaded_referred_by = instance.__dict__.get('referred_by')
+    return instance
+
   def save(self, *args, **kwargs):
     # Generate ID only when creating a new user and id is not already set
     if not self.id:
       self.id = self.unique_id_generator(referred_by_id=self.referred_by)
-    super().save(*args, **kwargs)
+
+    adding = self._state.adding
+    update_fields = kwargs.get('update_fields')
+    referrer_changed = (
+      not adding
+      and (update_fields is None or 'referred_by' in update_fields)
+      and hasattr(self, '_loaded_referred_by')
+      and (self._loaded_referred_by or None) != (self.referred_by or None)
+    )
+    if referrer_changed and self.referred_by and ReferralClosure.objects.filter(ancestor_id=self.id, descendant_id=self.referred_by).exists():
+      raise ValidationError(f'{self.referred_by} is in the downline of {self.id} and cannot be its referrer.')
+
+    with db_transaction.atomic():
+      super().save(*args, **kwargs)
+      if adding:
+        ReferralClosure.add_user(self)
+      elif referrer_changed:
+        ReferralClosure.move_subtree(self)
+    self._loaded_referred_by = self.referred_by
 
   def __str__(self):
     return f'{self.username}: {self.id}'
@@ -131,20 +189,42 @@ class User(AbstractUser):
   
   def get_indirect_network(self, max_depth=5):
     """
-    - Retrieves indirect line for this user
+    - Retrieves indirect line for this user as a list of levels
+      (index 0 = direct downline), read from the referral closure in one query
     """
     downline = []
-    current_level_users = list(self.get_direct_network())
-
-    depth = 1
     # depth 0 is the current user, depth 1 is direct, depth 2 is indirect
-    while current_level_users and depth <= max_depth:
-      downline.append(current_level_users)
-      next_level_users = User.objects.filter(referred_by__in=[user.id for user in current_level_users])
-      current_level_users = list(next_level_users)
-      depth += 1
-
+    for user in self.get_downline(max_depth=max_depth).order_by('network_depth'):
+      while len(downline) < user.network_depth:
+        downline.append([])
+      downline[user.network_depth - 1].append(user)
     return downline
+
+  def get_downline(self, max_depth=None):
+    """
+    All users below this one down to max_depth, annotated with network_depth (1 = direct).
+    """
+    links = Q(ancestor_links__ancestor_id=self.id, ancestor_links__depth__gte=1)
+    if max_depth is not None:
+      links &= Q(ancestor_links__depth__lte=max_depth)
+    return User.objects.filter(links).annotate(network_depth=F('ancestor_links__depth'))
+
+  def get_network_level_counts(self, max_depth=None):
+    """
+    Returns {depth: number of downline users at that depth}.
+    """
+    links = ReferralClosure.objects.filter(ancestor_id=self.id, depth__gte=1)
+    if max_depth is not None:
+      links = links.filter(depth__lte=max_depth)
+    rows = links.values('depth').annotate(total=Count('descendant_id')).order_by('depth')
+    return {row['depth']: row['total'] for row in rows}
+
+  def is_ancestor_of(self, other, max_depth=None):
+    other_id = other.id if isinstance(other, User) else other
+    links = ReferralClosure.objects.filter(ancestor_id=self.id, descendant_id=other_id, depth__gte=1)
+    if max_depth is not None:
+      links = links.filter(depth__lte=max_depth)
+    return links.exists()
   
   USERNAME_FIELD = 'username'
     
@@ -154,6 +234,15 @@ class User(AbstractUser):
     ordering = ['-created_at', 'referred_by', 'verification_status']
 
 
+def get_token_jti(encoded_token):
+  """The jti claim of an encoded JWT, read without verifying it; None if missing or malformed."""
+  try:
+    claims = jwt.decode(encoded_token, options={'verify_signature': False})
+  except jwt.InvalidTokenError:
+    return None
+  return claims.get(api_settings.JTI_CLAIM)
+
+
 class UserJWT(models.Model):
     user = models.ForeignKey(
       User,
@@ -161,6 +250,8 @@ class UserJWT(models.Model):
       related_name='jwts'
     )
     access_token = models.TextField()
+    # Fixed-length id of access_token; JWTDeviceAuthentication looks tokens up by it
+    access_jti = models.CharField(max_length=64, unique=True, null=True, blank=True)
     refresh_token = models.TextField()
     device_fingerprint = models.CharField(max_length=64)
     ip_address = models.GenericIPAddressField()
@@ -171,10 +262,14 @@ class UserJWT(models.Model):
     class Meta:
       indexes = [
         models.Index(fields=['user', 'device_fingerprint']),
-        models.Index(fields=['access_token']),
         models.Index(fields=['expires_at']),
       ]
 
+    def save(self, *args, **kwargs):
+        if not self.access_jti and self.access_token:
+            self.access_jti = get_token_jti(self.access_token)
+        super().save(*args, **kwargs)
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
@@ -247,7 +342,9 @@ class RequestStatus(models.Choices):
   REJECTED = 'Rejected'
   
 
-class Wallet(models.Model):
+class Wallet(TrackedFieldsMixin, models.Model):
+  tracked_fields = ('user_id', 'profit_point_balance', 'affiliate_point_balance', 'introducer_point_balance')
+
   user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='wallet')
   
   # Point balances
@@ -282,7 +379,9 @@ class Wallet(models.Model):
     verbose_name_plural = "Wallets"
 
 
-class Asset(models.Model):
+class Asset(TrackedFieldsMixin, models.Model):
+  tracked_fields = ('user_id', 'amount')
+
   user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='asset')
   amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
   is_free_campro = models.BooleanField(default=False)
@@ -303,7 +402,7 @@ class Asset(models.Model):
     return f"{self.user.username}'s Asset - {self.amount}"
 
 
-class Transaction(models.Model):
+class Transaction(TrackedFieldsMixin, models.Model):
   TRANSACTION_TYPES = (
     ('WITHDRAWAL', 'Withdrawal'), # Profit, Affiliate, Introducer >>
     ('CONVERT', 'Convert'), # Profit, Affiliate, Introducer >> Master Point
@@ -327,31 +426,59 @@ class Transaction(models.Model):
     ('ASSET', 'Asset')
   )
     
-  user = models.ForeignKey(User, null=True, on_delete=models.CASCADE, related_name='transactions')
+  tracked_fields = ('user_id', 'transaction_type', 'point_type', 'amount', 'created_at')
+
+  # user / transaction_type / created_at lookups are served by the composite indexes in Meta
+  user = models.ForeignKey(User, null=True, on_delete=models.CASCADE, related_name='transactions', db_index=False)
   wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='transactions', null=True)
   asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='transactions', null=True)
-  transaction_type = models.CharField(max_length=40, choices=TRANSACTION_TYPES, db_index=True)
+  transaction_type = models.CharField(max_length=40, choices=TRANSACTION_TYPES)
   point_type = models.CharField(max_length=40, choices=POINT_TYPES, db_index=True)
   request_status = models.CharField(max_length=40, choices=RequestStatus.choices, verbose_name="Request Status", null=True, db_index=True)
   amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
   description = models.TextField(blank=True)
   reference = models.CharField(max_length=100, blank=True)
-  created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+  created_at = models.DateTimeField(auto_now_add=True)
   
   # For Transfers
   target_point_type = models.CharField(max_length=40, choices=POINT_TYPES, blank=True, null=True)
   converted_amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+
+  # For reversals (revoke_profit_distribution): the transaction this row offsets, at most once
+  reverses = models.OneToOneField('self', on_delete=models.CASCADE, related_name='reversal', null=True, blank=True)
   
   def __str__(self):
     return f"{self.user.username} - {self.get_transaction_type_display()} - {self.get_point_type_display()} - {self.amount}"
   
   class Meta:
-    ordering = ['-created_at', 'request_status', 'transaction_type', 'point_type','user']
+    ordering = ['-created_at', '-id']
     verbose_name = "Transaction"
     verbose_name_plural = "Transactions"
+    indexes = [
+      # Per-user history pages, newest first (views.py history endpoints, daily limits)
+      models.Index(fields=['user', 'point_type', '-created_at', '-id'], name='tx_user_point_created_idx'),
+      models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='tx_user_type_created_idx'),
+      models.Index(fields=['user', '-created_at', '-id'], name='tx_user_created_idx'),
+      # Admin list / keyset pages over the whole table
+      models.Index(fields=['-created_at', '-id'], name='tx_created_id_idx'),
+      # Daily scans by type (distribution, sharing profit, revoke, welcome bonus expiry)
+      models.Index(fields=['transaction_type', 'created_at'], name='tx_type_created_idx'),
+      # Approval queue
+      models.Index(
+        fields=['-created_at', '-id'], name='tx_pending_created_idx',
+        condition=Q(request_status='PENDING'),
+      ),
+      # ProfitDist_YYYYMMDD lookups while distributing
+      models.Index(
+        fields=['reference', 'user'], name='tx_distribution_ref_idx',
+        condition=Q(transaction_type='DISTRIBUTION'),
+      ),
+    ]
+
+
+class WithdrawalRequest(TrackedFieldsMixin, models.Model):
+  tracked_fields = ('actual_amount', 'fee')
 
-
-class WithdrawalRequest(models.Model):
   wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='withdrawal_requests')
   point_type = models.CharField(max_length=40, choices=Transaction.POINT_TYPES)
   amount = models.DecimalField(max_digits=15, decimal_places=2, validators=[MinValueValidator(50)])
@@ -473,4 +600,285 @@ class WithdrawalWindow(models.Model):
   updated_at = models.DateTimeField(auto_now=True, help_text='Timestamp of the last update to this withdrawal window.')
 
   def __str__(self):
-    return f"Withdrawal Window - {self.date} - {'ON' if self.is_active else 'OFF'}"
\ No newline at end of file
+    return f"Withdrawal Window - {self.date} - {'ON' if self.is_active else 'OFF'}"
+
+class Job(models.Model):
+  """
+  Long-running admin operation executed by the `run_jobs` worker instead of
+  inside the HTTP request. The worker bumps updated_at with every progress
+  report, so it doubles as a heartbeat.
+  """
+  JOB_TYPES = (
+    ('DISTRIBUTE_PROFIT', 'Distribute Profit'),
+    ('REVOKE_PROFIT_DISTRIBUTION', 'Revoke Profit Distribution'),
+    ('REMOVE_WELCOME_BONUS', 'Remove Welcome Bonus'),
+    ('SWEEP_EXPIRED_TOKENS', 'Sweep Expired Tokens'),
+  )
+
+  STATUSES = (
+    ('PENDING', 'Pending'),
+    ('RUNNING', 'Running'),
+    ('SUCCEEDED', 'Succeeded'),
+    ('FAILED', 'Failed'),
+  )
+
+  job_type = models.CharField(max_length=40, choices=JOB_TYPES, db_index=True)
+  status = models.CharField(max_length=20, choices=STATUSES, default='PENDING', db_index=True)
+  payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+  result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+  error = models.TextField(blank=True)
+
+  rows_total = models.PositiveIntegerField(default=0)
+  rows_processed = models.PositiveIntegerField(default=0)
+
+  created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+  worker = models.CharField(max_length=100, blank=True)
+  created_at = models.DateTimeField(auto_now_add=True)
+  started_at = models.DateTimeField(null=True, blank=True)
+  finished_at = models.DateTimeField(null=True, blank=True)
+  updated_at = models.DateTimeField(auto_now=True)
+
+  @property
+  def rows_remaining(self):
+    return max(self.rows_total - self.rows_processed, 0)
+
+  @property
+  def elapsed_seconds(self):
+    if not self.started_at:
+      return 0
+    end = self.finished_at or timezone.now()
+    return round((end - self.started_at).total_seconds(), 1)
+
+  def __str__(self):
+    return f"Job {self.id} - {self.get_job_type_display()} - {self.get_status_display()}"
+
+  class Meta:
+    ordering = ['-created_at']
+    verbose_name = "Job"
+    verbose_name_plural = "Jobs"
+    indexes = [
+      models.Index(fields=['status', 'created_at']),
+    ]
+
+
+class DistributionCheckpoint(models.Model):
+  """
+  Progress of a chunked profit distribution for one day. Updated in the same
+  transaction as each committed chunk, so a crashed run resumes after
+  last_user_id without paying anyone twice.
+  """
+  distribution_date = models.DateField(unique=True)
+  daily_profit_rate = models.DecimalField(max_digits=7, decimal_places=2)
+  last_user_id = models.CharField(max_length=8, blank=True)
+  users_total = models.PositiveIntegerField(default=0)
+  users_processed = models.PositiveIntegerField(default=0)
+  profit_tx_created = models.PositiveIntegerField(default=0)
+  affiliate_tx_created = models.PositiveIntegerField(default=0)
+  affiliate_wallets_updated = models.PositiveIntegerField(default=0)
+  metrics = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+  completed_at = models.DateTimeField(null=True, blank=True)
+
+  created_at = models.DateTimeField(auto_now_add=True)
+  updated_at = models.DateTimeField(auto_now=True)
+
+  @property
+  def is_completed(self):
+    return self.completed_at is not None
+
+  def __str__(self):
+    state = 'completed' if self.is_completed else f'at {self.last_user_id or "start"}'
+    return f"Distribution {self.distribution_date} - {self.users_processed}/{self.users_total} ({state})"
+
+  class Meta:
+    ordering = ['-distribution_date']
+    verbose_name = "Distribution Checkpoint"
+    verbose_name_plural = "Distribution Checkpoints"
+
+
+def iter_referral_closure_rows(referrer_by_id):
+  """
+  Yields (ancestor_id, descendant_id, depth) for every user in
+  referrer_by_id ({user_id: referred_by}), including the depth-0 self row.
+  Users whose referrer is empty or unknown are roots. Users caught in a
+  referral cycle are not reachable from any root and are not yielded.
+  """
+  children = {}
+  roots = []
+  for user_id, referrer_id in referrer_by_id.items():
+    if referrer_id and referrer_id in referrer_by_id:
+      children.setdefault(referrer_id, []).append(user_id)
+    else:
+      roots.append(user_id)
+
+  # Breadth-first, so a parent's ancestor chain is known before its children are visited
+  ancestors = {user_id: [] for user_id in roots}
+  level = roots
+  while level:
+    next_level = []
+    for user_id in level:
+      chain = ancestors.pop(user_id)
+      yield (user_id, user_id, 0)
+      for depth, ancestor_id in enumerate(chain, start=1):
+        yield (ancestor_id, user_id, depth)
+      for child_id in children.get(user_id, ()):
+        ancestors[child_id] = [user_id] + chain
+        next_level.append(child_id)
+    level = next_level
+
+
+class ReferralClosure(models.Model):
+  """
+  Transitive closure of User.referred_by: one row per (ancestor, descendant)
+  pair with the number of levels between them, plus a depth-0 row per user.
+  Maintained by User.save; rebuild_referral_closure / check_referral_closure
+  rebuild and verify it from referred_by.
+  """
+  ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='descendant_links')
+  descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ancestor_links')
+  depth = models.PositiveSmallIntegerField()
+
+  REBUILD_BATCH_SIZE = 5000
+
+  @classmethod
+  def add_user(cls, user):
+    """Self row plus one row per ancestor of the new user's referrer."""
+    rows = [cls(ancestor_id=user.id, descendant_id=user.id, depth=0)]
+    if user.referred_by:
+      rows += [
+        cls(ancestor_id=ancestor_id, descendant_id=user.id, depth=depth + 1)
+        for ancestor_id, depth in cls.objects.filter(descendant_id=user.referred_by).values_list('ancestor_id', 'depth')
+      ]
+    cls.objects.bulk_create(rows)
+
+  @classmethod
+  def move_subtree(cls, user):
+    """Re-attaches user and its whole downline below user.referred_by."""
+    subtree = list(cls.objects.filter(ancestor_id=user.id).values_list('descendant_id', 'depth'))
+    if not subtree:
+      # User predates the closure table; rebuild_referral_closure covers it
+      cls.add_user(user)
+      return
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    cls.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    if user.referred_by:
+      new_ancestors = list(cls.objects.filter(descendant_id=user.referred_by).values_list('ancestor_id', 'depth'))
+      cls.objects.bulk_create(
+        [
+          cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + descendant_depth + 1)
+          for ancestor_id, ancestor_depth in new_ancestors
+          for descendant_id, descendant_depth in subtree
+        ],
+        batch_size=cls.REBUILD_BATCH_SIZE
+      )
+
+  @classmethod
+  def expected_rows(cls):
+    referrer_by_id = dict(User.objects.values_list('id', 'referred_by'))
+    return iter_referral_closure_rows(referrer_by_id)
+
+  @classmethod
+  def rebuild(cls):
+    """Replaces the whole table with the closure computed from User.referred_by."""
+    with db_transaction.atomic():
+      cls.objects.all().delete()
+      created = 0
+      batch = []
+      for ancestor_id, descendant_id, depth in cls.expected_rows():
+        batch.append(cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth))
+        if len(batch) >= cls.REBUILD_BATCH_SIZE:
+          cls.objects.bulk_create(batch)
+          created += len(batch)
+          batch = []
+      cls.objects.bulk_create(batch)
+      created += len(batch)
+    return created
+
+  def __str__(self):
+    return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+  class Meta:
+    verbose_name = "Referral Closure"
+    verbose_name_plural = "Referral Closures"
+    constraints = [
+      models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_referral_closure_pair'),
+    ]
+    indexes = [
+      models.Index(fields=['ancestor', 'depth']),
+      models.Index(fields=['descendant', 'depth']),
+    ]
+
+
+class DashboardCounter(models.Model):
+  """
+  One shard of a running total shown on the admin dashboard. Each counter
+  (metric, plus day for daily series) is split over several rows so
+  concurrent balance changes rarely wait on the same row lock; the total is
+  the sum of its shards. Maintained by server/dashboard.py.
+  """
+  metric = models.CharField(max_length=40)
+  day = models.DateField(null=True, blank=True)
+  shard = models.PositiveSmallIntegerField(default=0)
+  value = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+  updated_at = models.DateTimeField(auto_now=True)
+
+  def __str__(self):
+    return f"{self.metric} {self.day or ''} [{self.shard}] = {self.value}"
+
+  class Meta:
+    verbose_name = "Dashboard Counter"
+    verbose_name_plural = "Dashboard Counters"
+    constraints = [
+      models.UniqueConstraint(fields=['metric', 'shard'], condition=Q(day__isnull=True), name='unique_dashboard_counter'),
+      models.UniqueConstraint(fields=['metric', 'day', 'shard'], condition=Q(day__isnull=False), name='unique_dashboard_daily_counter'),
+    ]
+
+
+class DailyLedgerRollup(models.Model):
+  """
+  Sum and count of one user's transactions of one type and point type on one
+  local calendar day. Kept in step with Transaction by server/ledger.py so
+  the per-day history totals read one row per day instead of every
+  transaction; backfill_ledger_rollup rebuilds it from the raw rows.
+  """
+  user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ledger_rollups', db_index=False)
+  day = models.DateField()
+  transaction_type = models.CharField(max_length=40, choices=Transaction.TRANSACTION_TYPES)
+  point_type = models.CharField(max_length=40, choices=Transaction.POINT_TYPES)
+  total_amount = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+  tx_count = models.IntegerField(default=0)
+
+  def __str__(self):
+    return f"{self.user_id} {self.day} {self.transaction_type}/{self.point_type} = {self.total_amount} ({self.tx_count})"
+
+  class Meta:
+    verbose_name = "Daily Ledger Rollup"
+    verbose_name_plural = "Daily Ledger Rollups"
+    constraints = [
+      # Also the index for per-user day ranges
+      models.UniqueConstraint(fields=['user', 'day', 'transaction_type', 'point_type'], name='unique_daily_ledger_rollup'),
+    ]
+
+
+class ConversionDailyCounter(models.Model):
+  """
+  Points one user converted to Master Point (from Profit and Commission
+  combined) on one local calendar day. ConversionLimitService checks and
+  increments it in one conditional UPDATE, so the daily limit needs a single
+  indexed row instead of a sum over the day's transactions;
+  backfill_conversion_counters rebuilds it from the CONVERT transactions.
+  """
+  user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversion_counters', db_index=False)
+  day = models.DateField()
+  converted_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+  updated_at = models.DateTimeField(auto_now=True)
+
+  def __str__(self):
+    return f"{self.user_id} {self.day} converted {self.converted_amount}"
+
+  class Meta:
+    verbose_name = "Conversion Daily Counter"
+    verbose_name_plural = "Conversion Daily Counters"
+    constraints = [
+      # Also the index of the per-conversion lookup
+      models.UniqueConstraint(fields=['user', 'day'], name='unique_conversion_daily_counter'),
+    ]
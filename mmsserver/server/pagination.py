@@ -0,0 +1,154 @@
+"""
+Pagination for the transaction history endpoints and the admin queues.
+
+By default the endpoints keep the PageNumberPagination response
+(count / next / previous / results), now with a capped page_size.
+Clients that send a `cursor` parameter (empty for the first page) get keyset
+pages ordered by (created_at, id) instead: no COUNT(*) and no OFFSET, so
+every page costs the same however deep it is, and rows inserted while
+paging never shift or duplicate results.
+
+The admin queues also pass `totals` (aggregates over every matching row):
+they are computed together with the row count in a single query and
+returned next to the page.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+HISTORY_PAGE_SIZE = 30
+HISTORY_MAX_PAGE_SIZE = 200
+HISTORY_ORDERING = ('-created_at', '-id')
+NETWORK_PAGE_SIZE = 50
+NETWORK_MAX_PAGE_SIZE = 500
+TOTALS_COUNT_KEY = 'count'
+
+
+class InvalidCursor(Exception):
+  pass
+
+
+class HistoryPageNumberPagination(PageNumberPagination):
+  page_size = HISTORY_PAGE_SIZE
+  page_size_query_param = 'page_size'
+  max_page_size = HISTORY_MAX_PAGE_SIZE
+
+
+class NetworkPageNumberPagination(PageNumberPagination):
+  """One level of the referral network; a page_size that is not a positive integer falls back to the default."""
+  page_size = NETWORK_PAGE_SIZE
+  page_size_query_param = 'page_size'
+  max_page_size = NETWORK_MAX_PAGE_SIZE
+
+
+class CountedPageNumberPagination(HistoryPageNumberPagination):
+  """Page-number pages whose row count is already known, so the paginator skips its COUNT(*)."""
+
+  def __init__(self, count):
+    self.known_count = count
+
+  def django_paginator_class(self, object_list, per_page):
+    paginator = Paginator(object_list, per_page)
+    paginator.count = self.known_count
+    return paginator
+
+
+class KeysetPagination(BasePagination):
+  """
+  Newest-first keyset pagination on (created_at, id). The cursor is the
+  position of the last row of the previous page.
+  """
+  cursor_query_param = 'cursor'
+  page_size = HISTORY_PAGE_SIZE
+  page_size_query_param = 'page_size'
+  max_page_size = HISTORY_MAX_PAGE_SIZE
+
+  def get_page_size(self, request):
+    try:
+      page_size = int(request.query_params[self.page_size_query_param])
+    except (KeyError, ValueError):
+      return self.page_size
+    if page_size <= 0:
+      return self.page_size
+    return min(page_size, self.max_page_size)
+
+  def encode_cursor(self, obj):
+    position = json.dumps({'t': obj.created_at.isoformat(), 'i': obj.pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+  def decode_cursor(self, request):
+    encoded = request.query_params.get(self.cursor_query_param, '')
+    if not encoded:
+      return None
+    try:
+      padded = encoded + '=' * (-len(encoded) % 4)
+      position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+      created_at = datetime.fromisoformat(position['t'])
+      pk = int(position['i'])
+    except (TypeError, ValueError, KeyError):
+      raise InvalidCursor('Invalid cursor')
+    if created_at.tzinfo is None:
+      raise InvalidCursor('Invalid cursor')
+    return created_at, pk
+
+  def paginate_queryset(self, queryset, request, view=None):
+    self.request = request
+    self.page_size = self.get_page_size(request)
+    position = self.decode_cursor(request)
+
+    queryset = queryset.order_by(*HISTORY_ORDERING)
+    if position is not None:
+      created_at, pk = position
+      queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    rows = list(queryset[:self.page_size + 1])
+    self.has_next = len(rows) > self.page_size
+    self.page = rows[:self.page_size]
+    return self.page
+
+  def get_next_link(self):
+    if not self.has_next:
+      return None
+    url = self.request.build_absolute_uri()
+    return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+  def get_paginated_response(self, data):
+    return Response({
+      'next': self.get_next_link(),
+      'page_size': self.page_size,
+      'results': data,
+    })
+
+
+def paginate_history(request, queryset, serializer_class, totals=None):
+  """
+  Paginates a history queryset (newest first) and returns the Response.
+  `?cursor=` opts into keyset pages; otherwise the page-number response is kept.
+  `totals` ({name: aggregate}) are added to the response, None sums as 0.
+  """
+  summary = {}
+  if totals:
+    summary = queryset.order_by().aggregate(**{TOTALS_COUNT_KEY: Count('pk')}, **totals)
+    summary = {name: 0 if value is None else value for name, value in summary.items()}
+
+  if KeysetPagination.cursor_query_param in request.query_params:
+    paginator = KeysetPagination()
+    summary.pop(TOTALS_COUNT_KEY, None)
+  else:
+    paginator = CountedPageNumberPagination(summary.pop(TOTALS_COUNT_KEY)) if totals else HistoryPageNumberPagination()
+    queryset = queryset.order_by(*HISTORY_ORDERING)
+
+  try:
+    page = paginator.paginate_queryset(queryset, request)
+  except InvalidCursor as e:
+    return Response({'error': str(e)}, status=400)
+  serializer = serializer_class(page, many=True)
+  response = paginator.get_paginated_response(serializer.data)
+  response.data.update(summary)
+  return response
@@ -0,0 +1,118 @@
+"""
+Per-process cache of the reference data admins change a few times a day at
+most: OperationalProfit, MonthlyFinalizedProfit, Performance and
+WithdrawalWindow. The withdrawal window polls, withdrawal requests, the user
+app's operational and finalized profit reads and the admin dashboard read
+them from here instead of the database. The profit distribution still reads
+its rate from the database: it runs once a day, and in the jobs worker a
+rate changed moments before must never be missed. For the same reason the
+withdrawal requests check the withdrawal window in the database.
+
+Every save or delete of one of these models bumps a shared version stamp in
+the default cache once the transaction commits (see local_cache.py). Each
+worker checks it at most every REFERENCE_DATA_POLL_SECONDS; entries also
+expire after REFERENCE_DATA_TTL seconds.
+"""
+import copy
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+from .local_cache import MISSING, VersionedLocalCache
+from .models import MonthlyFinalizedProfit, OperationalProfit, Performance, WithdrawalWindow
+from .serializers import MonthlyFinalizedProfitSerializer, PerformanceSerializer
+
+REFERENCE_DATA_TTL = getattr(settings, 'REFERENCE_DATA_TTL', 300)
+# How often each worker checks the shared version stamp in the default cache
+REFERENCE_DATA_POLL_SECONDS = getattr(settings, 'REFERENCE_DATA_POLL_SECONDS', 1)
+# Keys come partly from query parameters, so the number of entries is capped
+REFERENCE_DATA_MAX_ENTRIES = 1000
+REFERENCE_VERSION_KEY = 'reference_data:version'
+
+REFERENCE_MODELS = (OperationalProfit, MonthlyFinalizedProfit, Performance, WithdrawalWindow)
+
+
+class ReferenceDataCache(VersionedLocalCache):
+    """Reference data values, filled by loaders on a miss (see local_cache.py)."""
+
+    def get(self, key, loader):
+        """
+        The cached value of key, or loader()'s result. The result is not
+        cached when the version moved meanwhile, or when it was read inside a
+        transaction, which may see changes that are never committed.
+        """
+        value = self.lookup(key)
+        if value is not MISSING:
+            return value
+        if connection.in_atomic_block:
+            return loader()
+        version = self.version
+        value = loader()
+        self.store(key, value, version)
+        return value
+
+
+reference_data = ReferenceDataCache(
+    REFERENCE_VERSION_KEY, REFERENCE_DATA_TTL, REFERENCE_DATA_MAX_ENTRIES, REFERENCE_DATA_POLL_SECONDS, 'reference data',
+)
+
+
+def get_operational_profit(day, month, year):
+    """The OperationalProfit of the given day, or None. A copy, so callers may modify it."""
+    operational_profit = reference_data.get(
+        ('operational_profit', day, month, year),
+        lambda: OperationalProfit.objects.filter(
+            active_day_profit=day, active_month_profit=month, active_year_profit=year
+        ).first(),
+    )
+    return copy.copy(operational_profit)
+
+
+def is_withdrawal_window_open(date, cached=True):
+    """
+    Whether withdrawals are open on date. The checks that allow a withdrawal
+    pass cached=False: a cached answer may lag an admin's change by up to
+    REFERENCE_DATA_TTL seconds in other workers.
+    """
+    def load():
+        return WithdrawalWindow.objects.filter(date=date, is_active=True).exists()
+
+    if not cached:
+        return load()
+    return reference_data.get(('withdrawal_window', date), load)
+
+
+def get_monthly_finalized_profits(year=None):
+    """MonthlyFinalizedProfitSerializer data of every month (of `year`), oldest first."""
+    def load():
+        queryset = MonthlyFinalizedProfit.objects.all()
+        if year is not None:
+            queryset = queryset.filter(year=year)
+        return [dict(row) for row in MonthlyFinalizedProfitSerializer(queryset.order_by('year', 'month'), many=True).data]
+
+    return [dict(row) for row in reference_data.get(('monthly_finalized_profits', year), load)]
+
+
+def get_yearly_performance(year):
+    """PerformanceSerializer data of every month of `year`, in month order."""
+    rows = reference_data.get(
+        ('performance', year),
+        lambda: [dict(row) for row in PerformanceSerializer(Performance.objects.filter(year=year).order_by('month'), many=True).data],
+    )
+    return [dict(row) for row in rows]
+
+
+def bump_reference_version():
+    """Drops this worker's reference data now and every other worker's at its next poll."""
+    reference_data.publish_version()
+
+
+def _on_reference_change(sender, raw=False, **kwargs):
+    if not raw:
+        db_transaction.on_commit(bump_reference_version)
+
+
+for _model in REFERENCE_MODELS:
+    post_save.connect(_on_reference_change, sender=_model, dispatch_uid=f'reference_data_post_save_{_model.__name__}')
+    post_delete.connect(_on_reference_change, sender=_model, dispatch_uid=f'reference_data_post_delete_{_model.__name__}')
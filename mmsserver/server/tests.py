@@ -1,3 +1,372 @@
-from django.test import TestCase
+import json
+import random
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection, connections, transaction as db_transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .balances import change_balances
+from .dashboard import compute_live_totals, get_dashboard_summary
+from .local_cache import MISSING, VersionedLocalCache
+from .management.commands._bench import get_or_create_superuser, seed_history, seed_network
+from .models import PromoCode, Transaction, User, Wallet
+from .utils import CommissionService, ProfitService, WalletService, get_day_distributions, get_profit_reference
+
+
+class DashboardSummaryTests(TestCase):
+
+    def test_distribution_day_netting_to_zero_is_listed(self):
+        user = get_or_create_superuser()
+        for amount in (Decimal('5.00'), Decimal('-5.00')):
+            Transaction.objects.create(user=user, transaction_type='DISTRIBUTION', point_type='PROFIT', amount=amount)
+        today = timezone.localdate()
+
+        self.assertEqual(get_dashboard_summary()['daily_profits'], [{'day': today, 'total': Decimal('0.00')}])
+        self.assertEqual(compute_live_totals()[('distribution', today)], Decimal('0.00'))
+
+
+class VersionedLocalCacheTests(TestCase):
+
+    def make_cache(self):
+        local_cache = VersionedLocalCache('tests:version', ttl=60, max_entries=2, poll_seconds=0, label='test')
+        self.addCleanup(local_cache.publish_version)
+        return local_cache
+
+    def test_counts_hits_and_misses(self):
+        local_cache = self.make_cache()
+        self.assertIs(local_cache.lookup('a'), MISSING)
+        local_cache.store('a', None, local_cache.version)
+        self.assertIsNone(local_cache.lookup('a'))
+        self.assertEqual(local_cache.summary(), {'entries': 1, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_publish_version_drops_entries_in_other_caches(self):
+        local_cache, other = self.make_cache(), self.make_cache()
+        other.store('a', 1, other.version)
+        local_cache.publish_version()
+        self.assertIs(other.lookup('a'), MISSING)
+
+    def test_store_skips_values_loaded_before_a_new_version(self):
+        local_cache = self.make_cache()
+        version = local_cache.version
+        local_cache.publish_version()
+        local_cache.store('a', 1, version)
+        self.assertIs(local_cache.lookup('a'), MISSING)
+
+    def test_store_keeps_entry_count_bounded(self):
+        local_cache = self.make_cache()
+        for key in 'abc':
+            local_cache.store(key, key, local_cache.version)
+        self.assertLessEqual(local_cache.summary()['entries'], 2)
+        self.assertEqual(local_cache.lookup('c'), 'c')
+
+
+class ServerTimingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_or_create_superuser()
+        cls.member = User.objects.get(id=seed_network(1, with_deposits=False)[0])
+
+    def get_wallet(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse('user_wallet'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_sent_to_staff_only(self):
+        self.assertIn('Server-Timing', self.get_wallet(self.staff))
+        self.assertNotIn('Server-Timing', self.get_wallet(self.member))
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_sent_to_everyone_when_enabled(self):
+        self.assertIn('Server-Timing', self.get_wallet(self.member))
+
+
+class ListQueryCountTests(TestCase):
+    """The list endpoints make the same number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seeded_ids = seed_network(300, level_sizes=[2, 20, 300])
+        PromoCode.objects.bulk_create(
+            [PromoCode(user_id=user_id, code=f'XXXX{index:06d}') for index, user_id in enumerate(seeded_ids)]
+        )
+        cls.superuser = get_or_create_superuser()
+        cls.leader = User.objects.get(id=seeded_ids[0])
+
+    def assert_constant_queries(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as small_page:
+            response = client.get(url.format(page_size=10))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+
+        with self.assertNumQueries(len(small_page)):
+            response = client.get(url.format(page_size=100))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_all_users(self):
+        self.assert_constant_queries(self.superuser, reverse('all_users') + '?page_size={page_size}')
+
+    def test_user_network_level(self):
+        self.assert_constant_queries(self.leader, reverse('user_network') + '?level=2&page_size={page_size}')
+
+
+class UserNetworkPageSizeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seeded_ids = seed_network(61, level_sizes=[1, 60], with_deposits=False)
+        cls.leader = User.objects.get(id=seeded_ids[0])
+
+    def get_level(self, page_size):
+        client = APIClient()
+        client.force_authenticate(self.leader)
+        return client.get(reverse('user_network'), {'level': 1, 'page_size': page_size})
+
+    def test_page_size_is_honoured(self):
+        response = self.get_level(20)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_invalid_page_size_falls_back_to_default(self):
+        for page_size in (0, -5, 'abc'):
+            with self.subTest(page_size=page_size):
+                response = self.get_level(page_size)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), 50)
+                self.assertEqual(response.data['count'], 60)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Reads PostgreSQL EXPLAIN output')
+class TransactionQueryPlanTests(TestCase):
+    """
+    The transaction endpoints and the engine lookups on seeded history must
+    not scan server_transaction sequentially or sort explicitly.
+    """
+    TABLE = 'server_transaction'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_ids = seed_network(1000, with_deposits=False)
+        seed_history(cls.user_ids, 90)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {cls.TABLE}')
+        cls.superuser = get_or_create_superuser()
+        cls.user = User.objects.get(id=cls.user_ids[-1])
+
+    def capture(self, client, url):
+        """The SELECTs on server_transaction made by a request (and by the second page in cursor mode)."""
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            if not many and self.TABLE in sql and sql.lstrip().upper().startswith('SELECT'):
+                statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            if 'cursor=' in url and response.data.get('next'):
+                # The page after the first one carries the keyset condition
+                client.get(response.data['next'])
+        return statements
+
+    def plan_problems(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        def walk(node):
+            problems = []
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == self.TABLE:
+                problems.append(f'Seq Scan on {self.TABLE}')
+            if node['Node Type'] in ('Sort', 'Incremental Sort'):
+                problems.append(f"{node['Node Type']} on {', '.join(node.get('Sort Key', []))}")
+            for child in node.get('Plans', []):
+                problems += walk(child)
+            return problems
+
+        return walk(plan[0]['Plan'])
+
+    def assert_uses_indexes(self, label, statements):
+        for sql, params in statements:
+            with self.subTest(label, sql=sql):
+                self.assertEqual(self.plan_problems(sql, params), [])
+
+    def test_user_transaction_endpoints(self):
+        today = timezone.localdate()
+        date_range = f'start_date={today - timedelta(days=30)}&end_date={today}'
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for name in ['user_transaction', 'user_commission_transaction', 'user_transfer_transaction',
+                     'user_convert_transaction', 'user_profit_commission_wd_transaction', 'user_asset_transaction']:
+            url = reverse(name)
+            for query in ['page_size=5', 'cursor=&page_size=5', f'cursor=&{date_range}']:
+                self.assert_uses_indexes(f'{name} {query}', self.capture(client, f'{url}?{query}'))
+
+    def test_admin_transaction_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.superuser)
+        # Page-number mode counts the whole table by design; only the cursor mode is expected to stay on an index
+        for url in [f"{reverse('all_transactions')}?cursor=", reverse('get_pending_transaction')]:
+            self.assert_uses_indexes(url, self.capture(client, url))
+
+    def test_engine_lookups(self):
+        today = timezone.localdate()
+        querysets = {
+            'distribution reference lookup': Transaction.objects.filter(
+                transaction_type='DISTRIBUTION',
+                reference=get_profit_reference(today),
+                user_id__in=self.user_ids[:100],
+            ).order_by().values_list('user_id', flat=True),
+            'revoke candidates': get_day_distributions(today).filter(
+                reversal__isnull=True,
+            ).order_by().values('wallet_id', 'point_type').annotate(total=Sum('amount')),
+        }
+        for label, queryset in querysets.items():
+            self.assert_uses_indexes(label, [queryset.query.sql_with_params()])
+
+
+def read_modify_write(user_id, deltas):
+    """The pattern the services used before: read the row, check in Python, save() it."""
+    wallet = Wallet.objects.get(user_id=user_id)
+    for field, delta in deltas.items():
+        if getattr(wallet, field) + delta < 0:
+            return None
+        setattr(wallet, field, getattr(wallet, field) + delta)
+    wallet.save()
+    return wallet
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs concurrent writers (SQLite locks the whole database)')
+class ConcurrentBalanceTests(TransactionTestCase):
+    """
+    Transfers, conversions and credits on a few hot wallets from many
+    threads; every balance must equal its start plus the operations that
+    succeeded.
+    """
+    USERS = 200
+    LEADERS = 4
+    THREADS = 16
+    OPS = 4000
+    START_BALANCES = {
+        'master_point_balance': Decimal('100.00'),
+        'profit_point_balance': Decimal('60.00'),
+        'affiliate_point_balance': Decimal('20.00'),
+        'introducer_point_balance': Decimal('40.00'),
+    }
+    FIELDS = {
+        'master': ('master_point_balance',),
+        'profit': ('profit_point_balance',),
+        'commission': ('affiliate_point_balance', 'introducer_point_balance'),
+    }
+
+    def setUp(self):
+        user_ids = seed_network(
+            self.USERS, level_sizes=[self.LEADERS, self.USERS - self.LEADERS], seed=42, with_deposits=False
+        )
+        for user_id in user_ids:
+            change_balances(Wallet, user_id, self.START_BALANCES)
+        self.users = {user.id: user for user in User.objects.filter(id__in=user_ids)}
+        self.leaders = user_ids[:self.LEADERS]
+
+    def run_ops(self, services):
+        """Runs the operations; returns {user_id: Counter(balance: expected delta)}."""
+        users = self.users
+        rng = random.Random(42)
+        members = [user_id for user_id in users if user_id not in self.leaders]
+        plan = [(rng.random(), rng.choice(members), Decimal(rng.randint(1, 30))) for _ in range(self.OPS)]
+        expected = defaultdict(Counter)
+        lock = threading.Lock()
+
+        def run_op(op):
+            roll, member, amount = op
+            leader = users[member].referred_by
+            try:
+                if roll < 0.4:
+                    # Transfers in both directions between a member and its (hot) leader
+                    sender, receiver = (member, leader) if roll < 0.2 else (leader, member)
+                    if services:
+                        WalletService.transfer_master_point(users[sender], users[receiver], amount)
+                    else:
+                        with db_transaction.atomic():
+                            if read_modify_write(sender, {'master_point_balance': -amount}) is None:
+                                raise ValidationError('Insufficient Register Point balance')
+                        read_modify_write(receiver, {'master_point_balance': amount})
+                    effect = {sender: {'master': -amount}, receiver: {'master': amount}}
+                elif roll < 0.6:
+                    amount = min(amount, Decimal('5'))
+                    if services:
+                        ProfitService.convert_to_master_point(users[member], amount)
+                    elif read_modify_write(member, {'profit_point_balance': -amount, 'master_point_balance': amount}) is None:
+                        raise ValidationError('Insufficient Profit Point balance')
+                    effect = {member: {'profit': -amount, 'master': amount}}
+                elif roll < 0.8:
+                    amount = min(amount, Decimal('5'))
+                    if services:
+                        CommissionService.convert_to_master_point(users[member], amount)
+                    elif read_modify_write(member, {'introducer_point_balance': -amount, 'master_point_balance': amount}) is None:
+                        raise ValidationError('Insufficient Commission Point balance')
+                    effect = {member: {'commission': -amount, 'master': amount}}
+                else:
+                    # Credits landing on the leaders' rows, as the admin and distribution paths do
+                    if services:
+                        change_balances(Wallet, leader, {'profit_point_balance': amount})
+                    else:
+                        read_modify_write(leader, {'profit_point_balance': amount})
+                    effect = {leader: {'profit': amount}}
+            except ValidationError:
+                return
+            with lock:
+                for user_id, deltas in effect.items():
+                    expected[user_id].update(deltas)
+
+        def worker(chunk):
+            try:
+                for op in chunk:
+                    run_op(op)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            list(pool.map(worker, [plan[index::self.THREADS] for index in range(self.THREADS)]))
+        return expected
+
+    def check_balances(self, expected):
+        """Returns ([(user_id, balance, expected, actual)] lost updates, [(user_id, balance)] negative balances)."""
+        lost, negative = [], []
+        for wallet in Wallet.objects.filter(user_id__in=self.users):
+            for balance, fields in self.FIELDS.items():
+                actual = sum(getattr(wallet, field) for field in fields)
+                want = sum(self.START_BALANCES[field] for field in fields) + expected[wallet.user_id][balance]
+                if actual != want:
+                    lost.append((wallet.user_id, balance, want, actual))
+                if any(getattr(wallet, field) < 0 for field in fields):
+                    negative.append((wallet.user_id, balance))
+        return lost, negative
+
+    def test_services_lose_no_updates(self):
+        lost, negative = self.check_balances(self.run_ops(services=True))
+        self.assertEqual(lost, [])
+        self.assertEqual(negative, [])
+
+    def test_check_catches_read_modify_write(self):
+        lost, _ = self.check_balances(self.run_ops(services=False))
+        self.assertNotEqual(lost, [])
@@ -0,0 +1,115 @@
+"""
+Purges expired rows from the token tables that grow with every login and
+refresh: UserJWT, and simplejwt's OutstandingToken / BlacklistedToken
+(ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION add a row to each per
+refresh). An expired token fails signature/exp validation before these
+tables are consulted, so its rows only cost space and cache.
+
+Rows are deleted by primary key in small batches, each in its own short
+transaction, so the sweep never holds locks on a large range of rows.
+"""
+import logging
+import time
+
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .models import UserJWT
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 1000
+# Pause between batches, leaves room for the requests writing to the same tables
+SWEEP_BATCH_PAUSE = 0.05
+
+TOKEN_MODELS = (UserJWT, OutstandingToken, BlacklistedToken)
+
+
+def _expired_querysets(now):
+    """(label, queryset) in deletion order; blacklist rows go before the tokens they point to."""
+    return [
+        ('user_jwt', UserJWT.objects.filter(expires_at__lt=now)),
+        ('blacklisted_token', BlacklistedToken.objects.filter(token__expires_at__lt=now)),
+        ('outstanding_token', OutstandingToken.objects.filter(expires_at__lt=now)),
+    ]
+
+
+def table_sizes():
+    """{table: {'rows': n, 'bytes': size or None}}; row counts are planner estimates on PostgreSQL."""
+    sizes = {}
+    for model in TOKEN_MODELS:
+        table = model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = %s::regclass',
+                    [table],
+                )
+                rows, size = cursor.fetchone()
+            sizes[table] = {'rows': max(rows, 0), 'bytes': size}
+        else:
+            sizes[table] = {'rows': model.objects.count(), 'bytes': None}
+    return sizes
+
+
+def _delete_in_batches(queryset, batch_size, pause, on_batch):
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with db_transaction.atomic():
+            # Counts cascaded rows too (blacklist rows of an outstanding token swept concurrently)
+            removed, _ = model.objects.filter(pk__in=pks).delete()
+        deleted += removed
+        on_batch(removed)
+        if len(pks) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def vacuum_token_tables():
+    """PostgreSQL only: VACUUM (ANALYZE) so the freed pages are reused and the estimates refreshed."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        for model in TOKEN_MODELS:
+            cursor.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(model._meta.db_table)}')
+    return True
+
+
+def sweep_expired_tokens(batch_size=SWEEP_BATCH_SIZE, pause=SWEEP_BATCH_PAUSE, vacuum=False, progress=None):
+    """
+    Deletes every token row that expired before now. Returns the table sizes
+    before and after and the rows removed per table.
+    """
+    now = timezone.now()
+    sizes_before = table_sizes()
+    querysets = _expired_querysets(now)
+    total = sum(queryset.count() for _, queryset in querysets)
+    processed = 0
+
+    def on_batch(removed):
+        nonlocal processed
+        processed += removed
+        if progress:
+            progress(min(processed, total), total)
+
+    if progress:
+        progress(0, total)
+    removed = {}
+    for label, queryset in querysets:
+        removed[label] = _delete_in_batches(queryset, batch_size, pause, on_batch)
+        logger.info(f"Token sweep: removed {removed[label]} expired {label} rows.")
+
+    vacuumed = vacuum and vacuum_token_tables()
+    return {
+        'expired_before': now.isoformat(),
+        'removed': removed,
+        'sizes_before': sizes_before,
+        'sizes_after': table_sizes(),
+        'vacuumed': vacuumed,
+    }
@@ -89,6 +89,7 @@ urlpatterns = [
   path('process_withdrawal_asset/', process_withdrawal_asset, name='process_withdrawal_asset'),
   path('process_withdrawal_profit/', process_withdrawal_profit, name='process_withdrawal_profit'),
   path('process_withdrawal_commission/', process_withdrawal_commission, name='process_withdrawal_commission'),
+  path('process_requests_batch/', process_requests_batch, name='process_requests_batch'),
   path('update_profit_sharing/', update_profit_sharing, name='update_profit_sharing'),
   path('reset_all_wallet_balances/', reset_all_wallet_balances, name='reset_all_wallet_balances'),
   path('process_verification/', process_verification, name='process_verification'),
@@ -96,5 +97,7 @@ urlpatterns = [
   path('toggle_withdrawal_window/', withdrawal_window, name='toggle_withdrawal_window'), 
   path('revoke_profit_distribution/', revoke_profit_distribution_view, name='revoke_profit_distribution'),
   path('remove_welcome_bonus/', remove_welcome_bonus, name='remove_welcome_bonus'),
+  path('job_status/<int:job_id>/', get_job_status, name='job_status'),
+  path('request_metrics/', get_request_metrics, name='request_metrics'),
 
 ]
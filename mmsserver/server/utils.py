@@ -1,12 +1,20 @@
 
 from decimal import Decimal, ROUND_HALF_UP
-from django.db import transaction as db_transaction
+from django.apps import apps as global_apps
+from django.db import IntegrityError, connection, transaction as db_transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .models import *
+from .dashboard import record_bulk_create, record_bulk_update, record_transaction_totals, record_wallet_deltas
+from .ledger import record_transactions_created, record_transactions_inserted
+from .balance_cache import invalidate_balances
+from .balances import change_balances, commission_split, debit_commission
+from .reference_data import is_withdrawal_window_open
 from django.http import HttpRequest
 import logging
-from django.db.models import Sum
+from django.db.models import Count, DecimalField, Sum, F, Q, Value
+from django.db.models.functions import Coalesce, Round, TruncDate
+from collections import defaultdict
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
@@ -19,14 +27,14 @@ def _distribute_affiliate_bonus_for_user(
     affiliate_transactions_list: list,
     all_wallets_map: dict, # Map of {user_id: wallet_instance}
     all_asset_map: dict, # Map of {user_id: asset_instance}
-    all_user_bfr1yr_deposit_lock_map: dict, # Map of {user_id: deposit_lock}
-    all_user_aftr1yr_deposit_lock_map: dict, # Map of {user_id: deposit_lock}
+    deposit_lock_totals_map: dict, # Map of {user_id: (net locked before 1 year, net locked after 1 year)}
     metrics: dict,
 ):
     """
     Calculates and prepares affiliate bonuses for L1 and L2 uplines.
     Modifies wallet objects in-place and appends to transaction list.
     Affiliate bonus available for 1 year only for downline deposit lock.
+    Reads the downline's locked amounts from deposit_lock_totals_map, so no queries are issued here.
     """
 
     except_ids = ['MMS01FXC', 'MMS00QVS']  # Admin/Superuser IDs will not receive affiliate bonuses
@@ -40,8 +48,9 @@ def _distribute_affiliate_bonus_for_user(
         # but we primarily need their wallet from the map.
         upline_l1_wallet = all_wallets_map.get(upline_l1_id)
         upline_l1_asset = all_asset_map.get(upline_l1_id)
-        downline_deposit_lock_bfr1yr = all_user_bfr1yr_deposit_lock_map.get(downline_user.id) or DepositLock.objects.none()
-        downline_deposit_lock_aftr1yr = all_user_aftr1yr_deposit_lock_map.get(downline_user.id) or DepositLock.objects.none()
+        downline_locked_bfr1yr, downline_locked_aftr1yr = deposit_lock_totals_map.get(
+            downline_user.id, (Decimal('0.00'), Decimal('0.00'))
+        )
 
         total_downline_deposit_lock_amount = Decimal('0.00')
         total_downline_deposit_lock_amount_special = Decimal('0.00')
@@ -49,22 +58,11 @@ def _distribute_affiliate_bonus_for_user(
         if upline_l1_wallet and upline_l1_wallet.user.is_active and upline_l1_asset and upline_l1_asset.amount > Decimal('0.00') and upline_l1_id not in except_ids: # Check if L1 user is active and has place asset and not in except_ids
             l1_bonus_percentage = Decimal('0.05')  # 5%
 
-            # Calculate total downline deposit lock amount before 1 year for L1 bonus eligibility
-            if downline_deposit_lock_bfr1yr.exists():
-                amount_6mlocked = downline_deposit_lock_bfr1yr.aggregate(total=Sum('amount_6m_locked'))['total'] or Decimal('0.00')
-                amount_6munlocked = downline_deposit_lock_bfr1yr.aggregate(total=Sum('amount_6m_unlocked'))['total'] or Decimal('0.00')
-                amount_1ylocked = downline_deposit_lock_bfr1yr.aggregate(total=Sum('amount_1y_locked'))['total'] or Decimal('0.00')
-                amount_1yunlocked = downline_deposit_lock_bfr1yr.aggregate(total=Sum('amount_1y_unlocked'))['total'] or Decimal('0.00')
-                amount_freeze = downline_deposit_lock_bfr1yr.aggregate(total=Sum('freeze_amount'))['total'] or Decimal('0.00')
-                total_downline_deposit_lock_amount = ((amount_6mlocked + amount_1ylocked + amount_freeze) -  (amount_6munlocked + amount_1yunlocked)).quantize(Decimal('0.01'))
-
-            if downline_deposit_lock_aftr1yr.exists() and upline_l1_id in special_ids:
-                amount_6mlocked = downline_deposit_lock_aftr1yr.aggregate(total=Sum('amount_6m_locked'))['total'] or Decimal('0.00')
-                amount_6munlocked = downline_deposit_lock_aftr1yr.aggregate(total=Sum('amount_6m_unlocked'))['total'] or Decimal('0.00')
-                amount_1ylocked = downline_deposit_lock_aftr1yr.aggregate(total=Sum('amount_1y_locked'))['total'] or Decimal('0.00')
-                amount_1yunlocked = downline_deposit_lock_aftr1yr.aggregate(total=Sum('amount_1y_unlocked'))['total'] or Decimal('0.00')
-                amount_freeze = downline_deposit_lock_aftr1yr.aggregate(total=Sum('freeze_amount'))['total'] or Decimal('0.00')
-                total_downline_deposit_lock_amount_special = ((amount_6mlocked + amount_1ylocked + amount_freeze) -  (amount_6munlocked + amount_1yunlocked)).quantize(Decimal('0.01'))
+            # Total downline deposit lock amount before 1 year for L1 bonus eligibility
+            total_downline_deposit_lock_amount = downline_locked_bfr1yr
+
+            if upline_l1_id in special_ids:
+                total_downline_deposit_lock_amount_special = downline_locked_aftr1yr
 
             all_total_downline_deposit_lock_amount = total_downline_deposit_lock_amount + total_downline_deposit_lock_amount_special
             l1_bonus_amount = (all_total_downline_deposit_lock_amount * (daily_rate_percentage / Decimal('100.00')) * l1_bonus_percentage).quantize(Decimal('0.01'))
@@ -102,31 +100,18 @@ def _distribute_affiliate_bonus_for_user(
 
                     upline_l2_wallet = all_wallets_map.get(upline_l2_id)
                     upline_l2_asset = all_asset_map.get(upline_l2_id)
-                    downline_deposit_lock_bfr1yr_2 = all_user_bfr1yr_deposit_lock_map.get(downline_user.id) or DepositLock.objects.none()
-                    downline_deposit_lock_aftr1yr_2 = all_user_aftr1yr_deposit_lock_map.get(downline_user.id) or DepositLock.objects.none()
 
                     total_downline_deposit_lock_amount_2 = Decimal('0.00')
                     total_downline_deposit_lock_amount_2_special = Decimal('0.00')
                     all_total_downline_deposit_lock_amount_2 = Decimal('0.00')
                     if upline_l2_wallet and upline_l2_wallet.user.is_active and upline_l1_asset and upline_l2_asset.amount > Decimal('0.00') and upline_l2_id not in except_ids: # Check if L2 user is active and has place asset and not in except_ids
 
-                        # Calculate total downline deposit lock amount before 1 year for L2 bonus eligibility
-                        if downline_deposit_lock_bfr1yr_2.exists():
-                            amount_6mlocked = downline_deposit_lock_bfr1yr_2.aggregate(total=Sum('amount_6m_locked'))['total'] or Decimal('0.00')
-                            amount_6munlocked = downline_deposit_lock_bfr1yr_2.aggregate(total=Sum('amount_6m_unlocked'))['total'] or Decimal('0.00')
-                            amount_1ylocked = downline_deposit_lock_bfr1yr_2.aggregate(total=Sum('amount_1y_locked'))['total'] or Decimal('0.00')
-                            amount_1yunlocked = downline_deposit_lock_bfr1yr_2.aggregate(total=Sum('amount_1y_unlocked'))['total'] or Decimal('0.00')
-                            amount_freeze = downline_deposit_lock_bfr1yr_2.aggregate(total=Sum('freeze_amount'))['total'] or Decimal('0.00')
-                            total_downline_deposit_lock_amount_2 = ((amount_6mlocked + amount_1ylocked + amount_freeze) -  (amount_6munlocked + amount_1yunlocked)).quantize(Decimal('0.01'))
-
-                        # Calculate total downline deposit lock amount after 1 year for special bonus eligibility
-                        if downline_deposit_lock_aftr1yr_2.exists() and upline_l2_id in special_ids:
-                            amount_6mlocked = downline_deposit_lock_aftr1yr_2.aggregate(total=Sum('amount_6m_locked'))['total'] or Decimal('0.00')
-                            amount_6munlocked = downline_deposit_lock_aftr1yr_2.aggregate(total=Sum('amount_6m_unlocked'))['total'] or Decimal('0.00')
-                            amount_1ylocked = downline_deposit_lock_aftr1yr_2.aggregate(total=Sum('amount_1y_locked'))['total'] or Decimal('0.00')
-                            amount_1yunlocked = downline_deposit_lock_aftr1yr_2.aggregate(total=Sum('amount_1y_unlocked'))['total'] or Decimal('0.00')
-                            amount_freeze = downline_deposit_lock_aftr1yr_2.aggregate(total=Sum('freeze_amount'))['total'] or Decimal('0.00')
-                            total_downline_deposit_lock_amount_2_special = ((amount_6mlocked + amount_1ylocked + amount_freeze) - (amount_6munlocked + amount_1yunlocked)).quantize(Decimal('0.01'))
+                        # Total downline deposit lock amount before 1 year for L2 bonus eligibility
+                        total_downline_deposit_lock_amount_2 = downline_locked_bfr1yr
+
+                        # Total downline deposit lock amount after 1 year for special bonus eligibility
+                        if upline_l2_id in special_ids:
+                            total_downline_deposit_lock_amount_2_special = downline_locked_aftr1yr
 
                         l2_bonus_percentage = Decimal('0.02')  # 2%
                         # L2 bonus is also based on the original downline's earned profit
@@ -165,10 +150,44 @@ def _distribute_affiliate_bonus_for_user(
             logger.warning(f"Wallet not found for L1 upline {upline_l1_id}. Skipping L1/L2 affiliate bonus for {downline_user.username}.")
 
 
+def get_deposit_lock_totals_map(today, user_ids=None):
+    """
+    Returns {user_id: (net locked before 1 year, net locked after 1 year)} from a
+    single grouped aggregation over DepositLock joined to its deposit transaction.
+    Net locked = 6m locked + 1y locked + frozen - 6m unlocked - 1y unlocked.
+    Users without any deposit lock are absent from the map.
+    """
+    one_year_ago = timezone.make_aware(datetime.combine(today - timedelta(days=365), time.min))
+    net_locked = (
+        F('amount_6m_locked') + F('amount_1y_locked') + F('freeze_amount')
+        - F('amount_6m_unlocked') - F('amount_1y_unlocked')
+    )
+
+    deposit_locks = DepositLock.objects.all()
+    if user_ids is not None:
+        deposit_locks = deposit_locks.filter(deposit__user_id__in=user_ids)
+
+    rows = (
+        deposit_locks
+        .values('deposit__user_id')
+        .annotate(
+            before_1y=Sum(net_locked, filter=Q(deposit__created_at__gte=one_year_ago)),
+            after_1y=Sum(net_locked, filter=Q(deposit__created_at__lt=one_year_ago)),
+        )
+        .order_by()
+    )
+    return {
+        row['deposit__user_id']: (
+            (row['before_1y'] or Decimal('0.00')).quantize(Decimal('0.01')),
+            (row['after_1y'] or Decimal('0.00')).quantize(Decimal('0.01')),
+        )
+        for row in rows
+    }
+
+
 def sharing_profit(daily_profit_rate):
 
     super_user = User.objects.get(is_superuser=True)
-    super_user_wallet = Wallet.objects.get(user=super_user)
 
     admin_asset = Asset.objects.filter(user_id__in=['MMS00QVS', 'MMS01FXC', 'MMS0216J',  'MMS02O5G', 'MMS02GKX']).aggregate(total=models.Sum('amount'))['total'] or 0
     print(f'admin as: {admin_asset}')
@@ -186,8 +205,7 @@ def sharing_profit(daily_profit_rate):
         sharing_below_10k = asset_below_10k * Decimal(daily_profit_rate) * Decimal('0.0028') # 0.28%
 
         total_sharing = sharing_above_10k + sharing_below_10k + sharing_mms03
-        super_user_wallet.profit_point_balance += total_sharing
-        super_user_wallet.save()
+        super_user_wallet = change_balances(Wallet, super_user.id, {'profit_point_balance': total_sharing})
 
         current_time = timezone.now()
 
@@ -204,11 +222,45 @@ def sharing_profit(daily_profit_rate):
         logger.info(f'Sharing profit completed {total_sharing:.2f}')
 
 
-def distribute_profit_manually():
+DISTRIBUTION_BATCH_SIZE = 1000
+WELCOME_BONUS_REMOVAL_BATCH_SIZE = 500
+REVOKE_LINK_BATCH_SIZE = 1000
+
+
+def get_profit_reference(distribution_date):
+    """Reference of a day's DISTRIBUTION transactions; also the idempotency key of a chunked run."""
+    return f"ProfitDist_{distribution_date.strftime('%Y%m%d')}"
+
+
+def _calculate_user_profit(asset_balance: Decimal, daily_rate_percentage: Decimal) -> Decimal:
+    """
+    Returns the user's share of the daily profit on asset_balance.
+    Assets below 10k keep 65% of the raw profit, 10k and above keep 75%.
+    """
+    raw_profit = (asset_balance * (daily_rate_percentage / Decimal('100.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    if raw_profit <= Decimal('0.00'):
+        return Decimal('0.00')
+
+    if asset_balance < Decimal('10000.00'):
+        user_share_ratio = Decimal('0.65') #"65/35"
+    else:
+        user_share_ratio = Decimal('0.75') #"75/25"
+
+    return (raw_profit * user_share_ratio).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def distribute_profit_manually(progress=None):
     """
     Calculates and distributes profit to user wallets (profit_point_balance),
     distributes affiliate bonuses to uplines (affiliate_point_balance)
     Triggered manually by an admin.
+
+    Every eligible wallet is fetched once (joined with its user and asset),
+    the per-user profit and affiliate bonuses are computed in memory, and the
+    results are written back with one bulk update and one bulk insert.
+
+    `progress`, if given, is called as progress(processed, total) every
+    DISTRIBUTION_BATCH_SIZE users.
     """
     metrics = {
         'users_with_profit': 0,
@@ -236,36 +288,17 @@ def distribute_profit_manually():
 
         logger.info(f"Starting manual profit distribution with rate: {daily_rate_percentage}%.")
 
-        # Pre-fetch all active user wallets for efficiency
+        # Single bulk fetch of every eligible wallet together with its user and asset.
         # We operate on these wallet objects directly.
-        eligible_users = User.objects.filter(
-            is_active=True,
-            wallet__isnull=False,
-            asset__amount__gt=0  # Use 'asset' (the related_name)
-        ).select_related('wallet').prefetch_related('asset')
-        all_wallets_map = {user.id: user.wallet for user in eligible_users if hasattr(user, 'wallet')}
-        all_asset_map = {user.id: user.asset for user in eligible_users if hasattr(user, 'asset')}
+        eligible_wallets = Wallet.objects.filter(
+            user__is_active=True,
+            user__asset__amount__gt=0  # Use 'asset' (the related_name)
+        ).select_related('user', 'user__asset')
+        all_wallets_map = {wallet.user_id: wallet for wallet in eligible_wallets}
+        all_asset_map = {user_id: wallet.user.asset for user_id, wallet in all_wallets_map.items()}
 
-        today = timezone.localdate()
-        one_year_ago = today - timedelta(days=365)
-
-        # All user DEPOSIT LOCK before 1 year ---------------------------------------------------------
-        all_user_bfr1yr_deposit_lock_map = {
-            user.id: DepositLock.objects.filter(
-                deposit__user=user,
-                deposit__created_at__gte=one_year_ago,
-            )
-            for user in eligible_users
-        }
-
-        # All user DEPOSIT LOCK after 1 year ---------------------------------------------------------
-        all_user_aftr1yr_deposit_lock_map = {
-            user.id: DepositLock.objects.filter(
-                deposit__user=user,
-                deposit__created_at__lt=one_year_ago,
-            )
-            for user in eligible_users
-        }
+        # Net DEPOSIT LOCK per user, split at the 1 year boundary (one grouped query) -----------------
+        deposit_lock_totals_map = get_deposit_lock_totals_map(today)
 
 
         wallets_to_update_profit_balance_list = []
@@ -275,12 +308,17 @@ def distribute_profit_manually():
         affiliate_bonus_transactions_to_create = []
 
         processed_wallets_count = 0
+        profit_reference = get_profit_reference(today)
+        total_wallets = len(all_wallets_map)
 
         # Iterate over the values of the map (the wallet objects)
-        for wallet_instance in all_wallets_map.values():
+        for index, (user_id, wallet_instance) in enumerate(all_wallets_map.items(), start=1):
+            if progress and index % DISTRIBUTION_BATCH_SIZE == 0:
+                progress(index, total_wallets)
+
             user_wallet = wallet_instance.user
-            asset_obj = Asset.objects.filter(user=user_wallet).first()
-            if not asset_obj or asset_obj.amount is None:
+            asset_obj = all_asset_map[user_id]
+            if asset_obj.amount is None:
                 continue
             asset_balance = Decimal(asset_obj.amount)
             
@@ -288,16 +326,7 @@ def distribute_profit_manually():
                 metrics['skipped_users'] += 1
                 continue
 
-            raw_profit = (asset_balance * (daily_rate_percentage / Decimal('100.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            if raw_profit <= Decimal('0.00'):
-                continue
-
-            if asset_balance < Decimal('10000.00'):
-                user_share_ratio = Decimal('0.65') #"65/35"
-            else:
-                user_share_ratio = Decimal('0.75') #"75/25"
-
-            user_profit_amount = (raw_profit * user_share_ratio).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            user_profit_amount = _calculate_user_profit(asset_balance, daily_rate_percentage)
 
             # Update User's profit_point_balance
             if user_profit_amount > Decimal('0.00'):
@@ -307,7 +336,6 @@ def distribute_profit_manually():
                 metrics['users_with_profit'] += 1
                 metrics['total_profit_distributed'] += user_profit_amount
 
-                current_time = timezone.now()
                 user_profit_transactions_to_create.append(
                     Transaction(
                         user=user_wallet,
@@ -318,7 +346,7 @@ def distribute_profit_manually():
                         description=(
                             f"Profit distribution ({daily_rate_percentage}% on Asset {asset_balance:.2f}). "
                         ),
-                        reference=f"ProfitDist_{current_time.strftime('%Y%m%d')}"
+                        reference=profit_reference
                     )
                 )
                 
@@ -330,51 +358,52 @@ def distribute_profit_manually():
                     affiliate_transactions_list=affiliate_bonus_transactions_to_create,
                     all_wallets_map=all_wallets_map,
                     all_asset_map=all_asset_map,
-                    all_user_bfr1yr_deposit_lock_map=all_user_bfr1yr_deposit_lock_map,
-                    all_user_aftr1yr_deposit_lock_map=all_user_aftr1yr_deposit_lock_map,
+                    deposit_lock_totals_map=deposit_lock_totals_map,
                     metrics=metrics
                 )
             
             processed_wallets_count += 1
+
+        # Each wallet is updated once with both its final profit and affiliate balance.
+        wallets_to_update = {w.pk: w for w in wallets_to_update_profit_balance_list}
+        wallets_to_update.update({w.pk: w for w in wallets_to_update_affiliate_balance_list})
+        transactions_to_create = user_profit_transactions_to_create + affiliate_bonus_transactions_to_create
         
         # Perform database updates atomically
         with db_transaction.atomic():
             current_time = timezone.now()
 
-            # Wallets for profit_point_balance update (these are unique as they came from map values)
-            if wallets_to_update_profit_balance_list:
-                for w_instance in wallets_to_update_profit_balance_list:
+            if wallets_to_update:
+                for w_instance in wallets_to_update.values():
                     w_instance.updated_at = current_time
-                Wallet.objects.bulk_update(wallets_to_update_profit_balance_list, ['profit_point_balance', 'updated_at'])
-                logger.info(f"Updated profit_point_balance for {len(wallets_to_update_profit_balance_list)} wallets.")
-
-            # Wallets for affiliate_point_balance update (need to ensure uniqueness before bulk update)
-            if wallets_to_update_affiliate_balance_list:
-                # Use set to get unique wallet objects, then convert back to list
-                # This ensures each wallet is updated once with its final accumulated affiliate bonus.
-                unique_wallets_for_affiliate_update = {w.pk: w for w in wallets_to_update_affiliate_balance_list}.values()
-                for w_instance in unique_wallets_for_affiliate_update:
-                    w_instance.updated_at = current_time
-                Wallet.objects.bulk_update(unique_wallets_for_affiliate_update, ['affiliate_point_balance', 'updated_at'])
-                logger.info(f"Updated affiliate_point_balance for {len(unique_wallets_for_affiliate_update)} wallets.")
-
-            # Create transactions
-            if user_profit_transactions_to_create:
-                Transaction.objects.bulk_create(user_profit_transactions_to_create)
-            if affiliate_bonus_transactions_to_create:
-                Transaction.objects.bulk_create(affiliate_bonus_transactions_to_create)
+                Wallet.objects.bulk_update(
+                    list(wallets_to_update.values()),
+                    ['profit_point_balance', 'affiliate_point_balance', 'updated_at'],
+                    batch_size=DISTRIBUTION_BATCH_SIZE
+                )
+                record_bulk_update(wallets_to_update.values())
+                invalidate_balances(w.user_id for w in wallets_to_update.values())
+                logger.info(f"Updated profit/affiliate balances for {len(wallets_to_update)} wallets.")
+
+            if transactions_to_create:
+                Transaction.objects.bulk_create(transactions_to_create, batch_size=DISTRIBUTION_BATCH_SIZE)
+                record_bulk_create(transactions_to_create)
+                record_transactions_created(transactions_to_create)
             
             logger.info(f"Created {len(user_profit_transactions_to_create)} profit transactions and {len(affiliate_bonus_transactions_to_create)} affiliate bonus transactions.")
 
             sharing_profit(daily_rate_percentage)
+
+        if progress:
+            progress(total_wallets, total_wallets)
         
-        print(f"Manual profit and affiliate distribution completed. Processed {processed_wallets_count} direct profit recipients.")
-        print(f"Metrics: {metrics}")
+        logger.info(f"Manual profit and affiliate distribution completed. Processed {processed_wallets_count} direct profit recipients.")
+        logger.info(f"Metrics: {metrics}")
         return {
             "message": "Profit and affiliate bonuses distributed successfully.",
             'metrics': metrics,
             "profit_wallets_updated": len(wallets_to_update_profit_balance_list),
-            "affiliate_wallets_updated": len(set(wallets_to_update_affiliate_balance_list)), # Count unique
+            "affiliate_wallets_updated": len({w.pk for w in wallets_to_update_affiliate_balance_list}), # Count unique
             "profit_tx_created": len(user_profit_transactions_to_create),
             "affiliate_tx_created": len(affiliate_bonus_transactions_to_create),
         }
@@ -386,129 +415,433 @@ def distribute_profit_manually():
     except Exception as e:
         logger.error(f"Error during manual profit/affiliate distribution: {e}", exc_info=True)
         raise Exception(f"An error occurred: {e}")
-    
 
-# --------------------- REVOKE PROFIT DISTRIBUTION ---------------------------------------
 
-def revoke_profit_distribution(target_date=None):
+def _get_eligible_wallets():
+    """Wallets that receive profit (and can receive affiliate bonuses): active users with a placed asset."""
+    return Wallet.objects.filter(
+        user__is_active=True,
+        user__asset__amount__gt=0
+    ).select_related('user', 'user__asset')
+
+
+def _apply_wallet_deltas(transactions_to_create, current_time):
     """
-    Reverses ALL profit and affiliate bonus distributions for a given date.
-    Does NOT delete original transactions — creates offsetting negative
-    transactions instead, so the ledger stays fully auditable.
+    Adds the amounts of the given transactions to their wallets with
+    F() expressions, so balances changed by other requests while the
+    distribution is running are not overwritten.
+    """
+    deltas = {}  # {wallet_id: [profit_delta, affiliate_delta]}
+    balance_deltas = []  # (user_id, balance_field, delta) for the dashboard counters
+    for txn in transactions_to_create:
+        wallet_delta = deltas.setdefault(txn.wallet_id, [Decimal('0.00'), Decimal('0.00')])
+        if txn.point_type == 'PROFIT':
+            wallet_delta[0] += txn.amount
+            balance_deltas.append((txn.user_id, 'profit_point_balance', txn.amount))
+        else:
+            wallet_delta[1] += txn.amount
+            balance_deltas.append((txn.user_id, 'affiliate_point_balance', txn.amount))
+
+    wallets_to_update = [
+        Wallet(
+            pk=wallet_id,
+            profit_point_balance=F('profit_point_balance') + profit_delta,
+            affiliate_point_balance=F('affiliate_point_balance') + affiliate_delta,
+            updated_at=current_time,
+        )
+        for wallet_id, (profit_delta, affiliate_delta) in deltas.items()
+    ]
+    Wallet.objects.bulk_update(
+        wallets_to_update,
+        ['profit_point_balance', 'affiliate_point_balance', 'updated_at'],
+        batch_size=DISTRIBUTION_BATCH_SIZE
+    )
+    record_wallet_deltas(balance_deltas)
+    invalidate_balances(txn.user_id for txn in transactions_to_create)
+    return len(wallets_to_update)
+
 
-    Safe to call only if funds haven't been withdrawn/converted yet.
+def distribute_profit_chunked(chunk_size=DISTRIBUTION_BATCH_SIZE, progress=None):
     """
-    if target_date is None:
-        target_date = timezone.localdate()
+    Chunked, resumable variant of distribute_profit_manually.
+
+    Eligible wallets are walked in user id order, chunk_size users at a time.
+    Each chunk (its profit and affiliate transactions, the wallet balance
+    increments and the DistributionCheckpoint row) is committed in its own
+    transaction, so only that chunk's wallets are locked at any time.
+
+    A crashed run is resumed by calling this again on the same day: it
+    continues after the checkpoint's last_user_id with the rate recorded when
+    the run started. Users who already have a DISTRIBUTION transaction with
+    today's ProfitDist_YYYYMMDD reference are skipped, so nobody is paid
+    twice. sharing_profit runs once, together with marking the checkpoint
+    completed.
+    """
+    today = timezone.localdate()
+    profit_reference = get_profit_reference(today)
 
-    metrics = {
-        'profit_reversed_count': 0,
-        'affiliate_reversed_count': 0,
-        'sharing_profit_reversed_count': 0,
-        'total_amount_reversed': Decimal('0.00'),
-        'skipped_already_reversed': 0,
-        'skipped_negative_balance_risk': [],
-    }
+    checkpoint = DistributionCheckpoint.objects.filter(distribution_date=today).first()
+    if checkpoint and checkpoint.is_completed:
+        return {"status": "skipped", "message": f"Profit has already been distributed for {today}."}
 
-    with db_transaction.atomic():
-        # Pull every distribution-related transaction created that day
-        original_txns = Transaction.objects.filter(
-            transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'SHARING_PROFIT'],
-            created_at__date=target_date,
-        ).select_related('wallet', 'user')
+    if checkpoint is None:
+        try:
+            operational_profit = OperationalProfit.objects.get(active_day_profit=today.day, active_month_profit=today.month, active_year_profit=today.year)
+        except OperationalProfit.DoesNotExist:
+            logger.error("OperationalProfit record not found.")
+            raise Exception("OperationalProfit record not found.")
+
+        daily_rate_percentage = Decimal(operational_profit.daily_profit_rate)
+        if daily_rate_percentage <= Decimal('0.00'):
+            logger.info(f"Profit rate ({daily_rate_percentage}%) is zero or not set. No profit distributed.")
+            return {"status": "skipped", "message": "Profit rate is zero or not set."}
+
+        checkpoint, _ = DistributionCheckpoint.objects.get_or_create(
+            distribution_date=today,
+            defaults={
+                'daily_profit_rate': daily_rate_percentage,
+                'users_total': _get_eligible_wallets().count(),
+                'metrics': {
+                    'users_with_profit': 0,
+                    'total_profit_distributed': Decimal('0.00'),
+                    'l1_bonuses_paid': 0,
+                    'l2_bonuses_paid': 0,
+                    'skipped_users': 0,
+                    'already_distributed': 0,
+                },
+            },
+        )
+        logger.info(f"Starting chunked profit distribution for {today} with rate: {checkpoint.daily_profit_rate}%.")
+    else:
+        logger.info(f"Resuming chunked profit distribution for {today} after user {checkpoint.last_user_id or '(start)'}.")
+
+    daily_rate_percentage = Decimal(checkpoint.daily_profit_rate)
 
-        if not original_txns.exists():
-            return {"status": "skipped", "message": f"No distributions found for {target_date}."}
+    while True:
+        chunk_wallets = list(
+            _get_eligible_wallets()
+            .filter(user_id__gt=checkpoint.last_user_id)
+            .order_by('user_id')[:chunk_size]
+        )
+        if not chunk_wallets:
+            break
 
-        # Idempotency guard: find reversals already created for this date's txns
-        already_reversed_refs = set(
+        chunk_user_ids = [wallet.user_id for wallet in chunk_wallets]
+        already_paid_ids = set(
             Transaction.objects.filter(
-                reference__startswith='REVOKE_',
-                created_at__date__gte=target_date,  # reversal could run later than target_date
-            ).values_list('reference', flat=True)
+                transaction_type='DISTRIBUTION',
+                reference=profit_reference,
+                user_id__in=chunk_user_ids,
+            ).order_by().values_list('user_id', flat=True)
         )
 
-        wallets_to_update = {}  # {wallet_id: wallet_instance}
-        reversal_txns_to_create = []
-        current_time = timezone.now()
+        # Wallets of the chunk plus their L1 and L2 uplines, which may live in other chunks.
+        wallets_map = {wallet.user_id: wallet for wallet in chunk_wallets}
+        for _ in range(2):
+            upline_ids = {
+                wallet.user.referred_by for wallet in wallets_map.values()
+                if wallet.user.referred_by and wallet.user.referred_by not in wallets_map
+            }
+            if upline_ids:
+                wallets_map.update(
+                    (wallet.user_id, wallet) for wallet in _get_eligible_wallets().filter(user_id__in=upline_ids)
+                )
+        asset_map = {user_id: wallet.user.asset for user_id, wallet in wallets_map.items()}
+        deposit_lock_totals_map = get_deposit_lock_totals_map(today, user_ids=chunk_user_ids)
 
-        for txn in original_txns:
-            revoke_ref = f"REVOKE_{txn.id}"
-            if revoke_ref in already_reversed_refs:
-                metrics['skipped_already_reversed'] += 1
+        metrics = checkpoint.metrics
+        metrics['total_profit_distributed'] = Decimal(metrics['total_profit_distributed'])
+        profit_transactions_to_create = []
+        affiliate_transactions_to_create = []
+        affiliate_wallets = []
+
+        for wallet_instance in chunk_wallets:
+            user_wallet = wallet_instance.user
+            if wallet_instance.user_id in already_paid_ids:
+                metrics['already_distributed'] += 1
                 continue
 
-            wallet = txn.wallet
-            if not wallet:
+            asset_balance = Decimal(asset_map[wallet_instance.user_id].amount)
+            if asset_balance <= Decimal('0.00'):
+                metrics['skipped_users'] += 1
                 continue
 
-            # Determine which balance field this transaction touched
-            if txn.point_type == 'PROFIT':
-                balance_field = 'profit_point_balance'
-            elif txn.point_type == 'COMMISSION':
-                balance_field = 'affiliate_point_balance'
-            else:
-                continue  # not a distribution-affecting point type, skip
+            user_profit_amount = _calculate_user_profit(asset_balance, daily_rate_percentage)
+            if user_profit_amount > Decimal('0.00'):
+                metrics['users_with_profit'] += 1
+                metrics['total_profit_distributed'] += user_profit_amount
 
-            current_balance = getattr(wallet, balance_field)
-            if current_balance - txn.amount < Decimal('0.00'):
-                # Balance already moved (e.g. converted) — don't blindly go negative
-                metrics['skipped_negative_balance_risk'].append(txn.id)
-                continue
+                profit_transactions_to_create.append(
+                    Transaction(
+                        user=user_wallet,
+                        wallet=wallet_instance,
+                        transaction_type='DISTRIBUTION',
+                        point_type='PROFIT',
+                        amount=user_profit_amount,
+                        description=(
+                            f"Profit distribution ({daily_rate_percentage}% on Asset {asset_balance:.2f}). "
+                        ),
+                        reference=profit_reference
+                    )
+                )
 
-            # Use a cached wallet instance so repeated reversals for the
-            # same wallet accumulate correctly before bulk_update
-            wallet_key = wallet.pk
-            if wallet_key not in wallets_to_update:
-                wallets_to_update[wallet_key] = wallet
-            cached_wallet = wallets_to_update[wallet_key]
-            setattr(cached_wallet, balance_field, getattr(cached_wallet, balance_field) - txn.amount)
-
-            reversal_txns_to_create.append(
-                Transaction(
-                    user=txn.user,
-                    wallet=wallet,
-                    transaction_type=txn.transaction_type,
-                    point_type=txn.point_type,
-                    amount=-txn.amount,  # negative = reversal
-                    description=f"REVOKED: {txn.description} (original txn id={txn.id})",
-                    reference=revoke_ref,
+                _distribute_affiliate_bonus_for_user(
+                    downline_user=user_wallet,
+                    daily_rate_percentage=daily_rate_percentage,
+                    wallets_needing_affiliate_update_list=affiliate_wallets,
+                    affiliate_transactions_list=affiliate_transactions_to_create,
+                    all_wallets_map=wallets_map,
+                    all_asset_map=asset_map,
+                    deposit_lock_totals_map=deposit_lock_totals_map,
+                    metrics=metrics
                 )
-            )
 
-            metrics['total_amount_reversed'] += txn.amount
-            if txn.transaction_type == 'DISTRIBUTION':
-                metrics['profit_reversed_count'] += 1
-            elif txn.transaction_type == 'AFFILIATE_BONUS':
-                metrics['affiliate_reversed_count'] += 1
-            elif txn.transaction_type == 'SHARING_PROFIT':
-                metrics['sharing_profit_reversed_count'] += 1
-
-        # Apply wallet balance updates
-        if wallets_to_update:
-            for w in wallets_to_update.values():
-                w.updated_at = current_time
-            Wallet.objects.bulk_update(
-                list(wallets_to_update.values()),
-                ['profit_point_balance', 'affiliate_point_balance', 'updated_at']
-            )
+        with db_transaction.atomic():
+            locked_checkpoint = DistributionCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+            if locked_checkpoint.last_user_id != checkpoint.last_user_id or locked_checkpoint.is_completed:
+                raise Exception(f"Distribution for {today} is being processed by another run.")
+
+            transactions_to_create = profit_transactions_to_create + affiliate_transactions_to_create
+            if transactions_to_create:
+                _apply_wallet_deltas(transactions_to_create, timezone.now())
+                Transaction.objects.bulk_create(transactions_to_create, batch_size=DISTRIBUTION_BATCH_SIZE)
+                record_bulk_create(transactions_to_create)
+                record_transactions_created(transactions_to_create)
+
+            checkpoint.last_user_id = chunk_user_ids[-1]
+            checkpoint.users_processed += len(chunk_wallets)
+            checkpoint.profit_tx_created += len(profit_transactions_to_create)
+            checkpoint.affiliate_tx_created += len(affiliate_transactions_to_create)
+            checkpoint.affiliate_wallets_updated += len({w.pk for w in affiliate_wallets})
+            checkpoint.metrics = metrics
+            checkpoint.save()
+
+        logger.info(f"Distribution {today}: committed chunk ending at {checkpoint.last_user_id} ({checkpoint.users_processed}/{checkpoint.users_total}).")
+        if progress:
+            progress(checkpoint.users_processed, max(checkpoint.users_total, checkpoint.users_processed))
+
+    with db_transaction.atomic():
+        locked_checkpoint = DistributionCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+        if locked_checkpoint.is_completed:
+            raise Exception(f"Distribution for {today} was completed by another run.")
+        if not Transaction.objects.filter(date_filter_q('created_at', today), transaction_type='SHARING_PROFIT').exists():
+            sharing_profit(daily_rate_percentage)
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save()
+
+    if progress:
+        progress(checkpoint.users_processed, checkpoint.users_processed)
+
+    logger.info(f"Chunked profit and affiliate distribution for {today} completed. Metrics: {checkpoint.metrics}")
+    return {
+        "message": "Profit and affiliate bonuses distributed successfully.",
+        'metrics': checkpoint.metrics,
+        "profit_wallets_updated": checkpoint.profit_tx_created,
+        "affiliate_wallets_updated": checkpoint.affiliate_wallets_updated,
+        "profit_tx_created": checkpoint.profit_tx_created,
+        "affiliate_tx_created": checkpoint.affiliate_tx_created,
+    }
+    
+
+# --------------------- REVOKE PROFIT DISTRIBUTION ---------------------------------------
+
+REVOKED_TRANSACTION_TYPES = ['DISTRIBUTION', 'AFFILIATE_BONUS', 'SHARING_PROFIT']
+# Balance that a reversal of each point type is taken back from
+REVOKED_BALANCE_FIELDS = {'PROFIT': 'profit_point_balance', 'COMMISSION': 'affiliate_point_balance'}
+REVOKE_REFERENCE_PREFIX = 'REVOKE_'
+
+
+def get_day_distributions(target_date):
+    """The distribution-related transactions created on target_date, reversals excluded."""
+    return Transaction.objects.filter(
+        date_filter_q('created_at', target_date),
+        transaction_type__in=REVOKED_TRANSACTION_TYPES,
+        reverses__isnull=True,
+    )
+
+
+def revoke_profit_distribution(target_date=None, progress=None):
+    """
+    Reverses ALL profit and affiliate bonus distributions for a given date.
+    Does NOT delete original transactions — creates offsetting negative
+    transactions instead, each linked to its original through
+    Transaction.reverses, so the ledger stays fully auditable.
+
+    Safe to call only if funds haven't been withdrawn/converted yet: when a
+    wallet's balance no longer covers the day's total of a point type, none
+    of that wallet's rows of that point type are reversed.
+
+    Runs as a fixed number of set-based statements however many rows the day
+    has: per-wallet totals are computed with GROUP BY and applied with one
+    UPDATE ... FROM, and the offsetting rows are inserted with one
+    INSERT ... SELECT. `progress`, if given, is called as
+    progress(processed, total) before and after.
+    """
+    if target_date is None:
+        target_date = timezone.localdate()
 
-        if reversal_txns_to_create:
-            Transaction.objects.bulk_create(reversal_txns_to_create)
+    metrics = {
+        'profit_reversed_count': 0,
+        'affiliate_reversed_count': 0,
+        'sharing_profit_reversed_count': 0,
+        'total_amount_reversed': Decimal('0.00'),
+        'skipped_already_reversed': 0,
+        'skipped_negative_balance_risk': [],
+    }
 
+    day_txns = get_day_distributions(target_date)
+    total_txns = day_txns.count()
+    if not total_txns:
+        return {"status": "skipped", "message": f"No distributions found for {target_date}."}
+    if progress:
+        progress(0, total_txns)
+
+    current_time = timezone.now()
+    with db_transaction.atomic():
+        # Idempotency guard: a reversed row has a reversal pointing at it
+        metrics['skipped_already_reversed'] = day_txns.filter(reversal__isnull=False).count()
+        pending = day_txns.filter(
+            reversal__isnull=True, wallet__isnull=False, point_type__in=REVOKED_BALANCE_FIELDS,
+        ).order_by()
+
+        # Lock the wallets before comparing their balances with the totals
+        list(Wallet.objects.select_for_update().filter(pk__in=pending.values('wallet_id')).order_by('pk').values_list('pk', flat=True))
+
+        # Balance already moved (e.g. converted): don't blindly go negative
+        uncovered = pending.values(
+            'wallet_id', 'point_type', 'wallet__profit_point_balance', 'wallet__affiliate_point_balance',
+        ).annotate(total=Round(Sum('amount'), 2)).filter(
+            Q(point_type='PROFIT', total__gt=Round(F('wallet__profit_point_balance'), 2))
+            | Q(point_type='COMMISSION', total__gt=Round(F('wallet__affiliate_point_balance'), 2))
+        )
+        skipped_q = Q(pk__in=[])
+        for row in uncovered:
+            skipped_q |= Q(wallet_id=row['wallet_id'], point_type=row['point_type'])
+        metrics['skipped_negative_balance_risk'] = list(pending.filter(skipped_q).values_list('id', flat=True))
+        pending = pending.exclude(skipped_q)
+
+        groups = list(pending.values('wallet__user_id', 'transaction_type', 'point_type').annotate(
+            amount=Round(Sum('amount'), 2), count=Count('pk'),
+        ))
+        if groups:
+            record_transactions_inserted(pending, current_time, sign=-1)
+            wallets_updated = _reverse_in_database(pending, current_time)
+            _record_reversals(groups, current_time)
+        else:
+            wallets_updated = 0
+
+        for group in groups:
+            metrics['total_amount_reversed'] += group['amount']
+            if group['transaction_type'] == 'DISTRIBUTION':
+                metrics['profit_reversed_count'] += group['count']
+            elif group['transaction_type'] == 'AFFILIATE_BONUS':
+                metrics['affiliate_reversed_count'] += group['count']
+            elif group['transaction_type'] == 'SHARING_PROFIT':
+                metrics['sharing_profit_reversed_count'] += group['count']
+
+        metrics['total_amount_reversed'] = metrics['total_amount_reversed'].quantize(Decimal('0.01'))
         logger.info(
             f"Revoked distributions for {target_date}: "
-            f"{len(reversal_txns_to_create)} reversal transactions, "
-            f"{len(wallets_to_update)} wallets updated."
+            f"{sum(group['count'] for group in groups)} reversal transactions, "
+            f"{wallets_updated} wallets updated."
         )
 
+    if progress:
+        progress(total_txns, total_txns)
+
     return {
         "message": f"Reversed distributions for {target_date}.",
         "metrics": metrics,
     }
 
 
-def remove_welcome_bonus_100():
+def _reverse_in_database(pending, current_time):
+    """
+    Takes the totals of `pending` off their wallets and inserts one
+    offsetting row per pending transaction. Returns the wallets updated.
+    """
+    quote = connection.ops.quote_name
+    wallet_table = quote(Wallet._meta.db_table)
+    transaction_table = quote(Transaction._meta.db_table)
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    totals = pending.values('wallet_id').annotate(
+        profit=Coalesce(Round(Sum('amount', filter=Q(point_type='PROFIT')), 2), zero),
+        affiliate=Coalesce(Round(Sum('amount', filter=Q(point_type='COMMISSION')), 2), zero),
+    )
+    totals_sql, totals_params = totals.query.sql_with_params()
+    ids_sql, ids_params = pending.values('pk').query.sql_with_params()
+    now = connection.ops.adapt_datetimefield_value(current_time)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {wallet_table} SET "
+            f"profit_point_balance = {wallet_table}.profit_point_balance - totals.profit, "
+            f"affiliate_point_balance = {wallet_table}.affiliate_point_balance - totals.affiliate, "
+            f"updated_at = %s "
+            f"FROM ({totals_sql}) AS totals WHERE {wallet_table}.id = totals.wallet_id",
+            [now, *totals_params],
+        )
+        wallets_updated = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {transaction_table} "
+            f"(user_id, wallet_id, transaction_type, point_type, amount, description, reference, created_at, reverses_id) "
+            f"SELECT user_id, wallet_id, transaction_type, point_type, -amount, "
+            f"'REVOKED: ' || description || ' (original txn id=' || CAST(id AS VARCHAR(20)) || ')', "
+            f"'{REVOKE_REFERENCE_PREFIX}' || CAST(id AS VARCHAR(20)), %s, id "
+            f"FROM {transaction_table} WHERE id IN ({ids_sql})",
+            [now, *ids_params],
+        )
+    return wallets_updated
+
+
+def _record_reversals(groups, current_time):
+    """Feeds the dashboard counters and balance cache, which the raw statements bypass."""
+    record_wallet_deltas(
+        (group['wallet__user_id'], REVOKED_BALANCE_FIELDS[group['point_type']], -group['amount']) for group in groups
+    )
+    invalidate_balances(group['wallet__user_id'] for group in groups)
+    type_totals = defaultdict(Decimal)
+    for group in groups:
+        type_totals[group['transaction_type']] -= group['amount']
+    record_transaction_totals(
+        (transaction_type, current_time, amount) for transaction_type, amount in type_totals.items()
+    )
+
+
+def link_revoke_references(apps=global_apps):
+    """
+    Sets Transaction.reverses on the reversals that only carry a REVOKE_<id>
+    reference (created before the link existed). A reversal whose original
+    is gone, or already linked to an earlier reversal, stays unlinked.
+    Returns the number of reversals linked.
+    """
+    Transaction = apps.get_model('server', 'Transaction')
+    linked = set(Transaction.objects.filter(reverses__isnull=False).values_list('reverses_id', flat=True))
+    candidates = {}
+    rows = Transaction.objects.filter(
+        reference__startswith=REVOKE_REFERENCE_PREFIX, reverses__isnull=True,
+    ).order_by('pk').values_list('pk', 'reference')
+    for pk, reference in rows.iterator(chunk_size=REVOKE_LINK_BATCH_SIZE):
+        try:
+            original_id = int(reference[len(REVOKE_REFERENCE_PREFIX):])
+        except ValueError:
+            continue
+        if original_id not in linked:
+            linked.add(original_id)
+            candidates[pk] = original_id
+
+    total = 0
+    pending = list(candidates.items())
+    for start in range(0, len(pending), REVOKE_LINK_BATCH_SIZE):
+        batch = pending[start:start + REVOKE_LINK_BATCH_SIZE]
+        existing = set(Transaction.objects.filter(pk__in=[original_id for _, original_id in batch]).values_list('pk', flat=True))
+        updates = [Transaction(pk=pk, reverses_id=original_id) for pk, original_id in batch if original_id in existing]
+        Transaction.objects.bulk_update(updates, ['reverses'])
+        total += len(updates)
+    return total
+
+
+def remove_welcome_bonus_100(progress=None):
     """
     Remove welcome_bonus 100 from profit_point_balance and asset for users who:
     - have a free-campro asset
@@ -517,6 +850,11 @@ def remove_welcome_bonus_100():
     Neutralizes the associated free-campro DepositLock (kept, not deleted, for
     withdrawal-verification / audit trail integrity).
     This is a one-time operation for a specific business case.
+
+    Users are processed in chunks of WELCOME_BONUS_REMOVAL_BATCH_SIZE, each in
+    its own transaction. Every step zeroes what it removes, so re-running after
+    a failed chunk does not remove anything twice. `progress`, if given, is
+    called as progress(processed, total) after every chunk.
     """
     one_year_ago = timezone.now() - timedelta(days=365)
 
@@ -525,7 +863,7 @@ def remove_welcome_bonus_100():
         created_at__lte=one_year_ago,
     ).values_list('user_id', flat=True)
 
-    expired_100_users = Asset.objects.filter( # Users who have free-campro asset, received welcome bonus 1 year ago but never made an asset placement and have less than or equal to 100 USDT in asset
+    expired_100_users = list(Asset.objects.filter( # Users who have free-campro asset, received welcome bonus 1 year ago but never made an asset placement and have less than or equal to 100 USDT in asset
         is_free_campro=True,
         user_id__in=welcome_bonus_users_1y_old,
         amount__lte=Decimal('100.00')
@@ -533,58 +871,66 @@ def remove_welcome_bonus_100():
         user_id__in=Transaction.objects.filter(
             transaction_type='ASSET_PLACEMENT', point_type='MASTER'
         ).values_list('user_id', flat=True)
-    ).values_list('user_id', flat=True).distinct()
-
-    deposit_locks = DepositLock.objects.filter( # DepositLock records for those users, to neutralize the free-campro lock
-        is_free_campro=True,
-        deposit_id__in=Transaction.objects.filter(
-            transaction_type='WELCOME_BONUS', user_id__in=expired_100_users
-        ).values_list('id', flat=True)
-    )
+    ).values_list('user_id', flat=True).distinct())
 
-    with db_transaction.atomic():
-        assets = Asset.objects.filter(user_id__in=expired_100_users, is_free_campro=True, amount__lte=Decimal('100.00'))
-        wallets = Wallet.objects.filter(user_id__in=expired_100_users)
+    if not expired_100_users:
+        return {"message": "No eligible users found for WELCOME BONUS 100 removal."}
 
-        if not assets.exists() and not deposit_locks.exists():
-            return {"message": "No eligible users found for WELCOME BONUS 100 removal."}
+    assets_count = 0
+    wallets_count = 0
+    deposit_locks_count = 0
+    total_users = len(expired_100_users)
 
-        for wallet in wallets:
-            before_balance = wallet.profit_point_balance
-            if before_balance > Decimal('0.00'):
-                wallet.profit_point_balance = Decimal('0.00')
-                wallet.save()
-
-                Transaction.objects.create(
-                    user=wallet.user,
-                    wallet=wallet,
-                    transaction_type='EXPIRATION',
-                    point_type='PROFIT',
-                    amount=-before_balance,
-                    description="Expiration: WELCOME BONUS 100 USDT profit removed",
-                    reference=f"EXPIRATION_WELCOME_BONUS_{wallet.user_id}_{timezone.now().strftime('%Y%m%d%H%M%S')}"
-                )
+    for offset in range(0, total_users, WELCOME_BONUS_REMOVAL_BATCH_SIZE):
+        chunk_user_ids = expired_100_users[offset:offset + WELCOME_BONUS_REMOVAL_BATCH_SIZE]
 
-        for deposit_lock in deposit_locks:
-            deposit_lock.amount_1y_locked = Decimal('0.00')
-            deposit_lock.save()
+        with db_transaction.atomic():
+            deposit_locks = list(DepositLock.objects.filter( # DepositLock records for those users, to neutralize the free-campro lock
+                is_free_campro=True,
+                deposit_id__in=Transaction.objects.filter(
+                    transaction_type='WELCOME_BONUS', user_id__in=chunk_user_ids
+                ).values_list('id', flat=True)
+            ))
+            assets = list(Asset.objects.filter(user_id__in=chunk_user_ids, is_free_campro=True, amount__lte=Decimal('100.00')).select_related('user'))
+            wallets = list(Wallet.objects.filter(user_id__in=chunk_user_ids).select_related('user'))
+
+            for wallet in wallets:
+                before_balance = wallet.profit_point_balance
+                # Removes the balance as read; anything credited since stays
+                if before_balance > Decimal('0.00') and change_balances(Wallet, wallet.user_id, {'profit_point_balance': -before_balance}):
+                    Transaction.objects.create(
+                        user=wallet.user,
+                        wallet=wallet,
+                        transaction_type='EXPIRATION',
+                        point_type='PROFIT',
+                        amount=-before_balance,
+                        description="Expiration: WELCOME BONUS 100 USDT profit removed",
+                        reference=f"EXPIRATION_WELCOME_BONUS_{wallet.user_id}_{timezone.now().strftime('%Y%m%d%H%M%S')}"
+                    )
 
-        for asset in assets:
-            if asset.amount >= Decimal('100.00'):
-                asset.amount -= Decimal('100.00')
-                asset.save()
+            for deposit_lock in deposit_locks:
+                deposit_lock.amount_1y_locked = Decimal('0.00')
+                deposit_lock.save()
+
+            for asset in assets:
+                if change_balances(Asset, asset.user_id, {'amount': -Decimal('100.00')}):
+                    Transaction.objects.create(
+                        user=asset.user,
+                        asset=asset,
+                        transaction_type='EXPIRATION',
+                        point_type='ASSET',
+                        amount=-Decimal('100.00'),
+                        description="Expiration: WELCOME BONUS 100 USDT",
+                        reference=f"EXPIRATION_WELCOME_BONUS_{asset.user_id}_{timezone.now().strftime('%Y%m%d%H%M%S')}"
+                    )
 
-                Transaction.objects.create(
-                    user=asset.user,
-                    asset=asset,
-                    transaction_type='EXPIRATION',
-                    point_type='ASSET',
-                    amount=-Decimal('100.00'),
-                    description="Expiration: WELCOME BONUS 100 USDT",
-                    reference=f"EXPIRATION_WELCOME_BONUS_{asset.user_id}_{timezone.now().strftime('%Y%m%d%H%M%S')}"
-                )
+        assets_count += len(assets)
+        wallets_count += len(wallets)
+        deposit_locks_count += len(deposit_locks)
+        if progress:
+            progress(min(offset + WELCOME_BONUS_REMOVAL_BATCH_SIZE, total_users), total_users)
 
-    return {"message": f"Expired WELCOME BONUS 100 USDT removed from eligible users. {assets.count()} ASSETS updated, {wallets.count()} WALLETS updated, {deposit_locks.count()} DEPOSIT LOCKS neutralized."}
+    return {"message": f"Expired WELCOME BONUS 100 USDT removed from eligible users. {assets_count} ASSETS updated, {wallets_count} WALLETS updated, {deposit_locks_count} DEPOSIT LOCKS neutralized."}
 
 
 # ----------------------------------------------------------------------------------------
@@ -593,13 +939,14 @@ class UserService:
     @staticmethod
     def setup_user(user_id, master_amount, profit_amount, affiliate_amount):
         user = User.objects.get(id=user_id)
-        wallet, _ = Wallet.objects.get_or_create(user=user)
+        Wallet.objects.get_or_create(user=user)
         
         with db_transaction.atomic():
-            wallet.master_point_balance += Decimal(master_amount)
-            wallet.profit_point_balance += Decimal(profit_amount)
-            wallet.affiliate_point_balance += Decimal(affiliate_amount)
-            wallet.save()
+            wallet = change_balances(Wallet, user.id, {
+                'master_point_balance': Decimal(master_amount),
+                'profit_point_balance': Decimal(profit_amount),
+                'affiliate_point_balance': Decimal(affiliate_amount),
+            })
 
             Transaction.objects.create(
                 user=user,
@@ -631,21 +978,27 @@ class UserService:
         return wallet 
     
 
-def are_in_same_network(sender, receiver, max_depth=99): #need review
-    """Check if sender and receiver are connected in either direction"""
+def are_in_same_network(sender, receiver, max_depth=99):
+    """
+    Check if sender and receiver are connected in either direction
+    (one is in the other's downline within max_depth levels).
+    A single indexed lookup on the referral closure, whatever the size of either downline.
+    """
 
     if sender.is_superuser:
         return True
 
-    except_ids = ['MMS01FXC', 'MMS00QVS']
-
-    downline_sender = sender.get_indirect_network(max_depth=max_depth)
-    downline_receiver = receiver.get_indirect_network(max_depth=max_depth)
+    except_ids = ['MMS01FXC', 'MMS00QVS'] # Never counted as someone's downline
 
-    flat_sender = {u.id for level in downline_sender for u in level if u.id not in except_ids}
-    flat_receiver = {u.id for level in downline_receiver for u in level if u.id not in except_ids}
+    connected = Q()
+    if receiver.id not in except_ids:
+        connected |= Q(ancestor_id=sender.id, descendant_id=receiver.id)
+    if sender.id not in except_ids:
+        connected |= Q(ancestor_id=receiver.id, descendant_id=sender.id)
+    if not connected:
+        return False
 
-    return receiver.id in flat_sender or sender.id in flat_receiver
+    return ReferralClosure.objects.filter(connected, depth__gte=1, depth__lte=max_depth).exists()
 
 import re
 
@@ -669,6 +1022,32 @@ def are_in_same_level(sender, receiver):
     level_receiver = extract_level(receiver)
     return level_sender is not None and level_sender == level_receiver
 
+def introducer_bonus_rate(introducer_asset_amount):
+    """Share of an approved placement paid to the introducer, by the introducer's own asset."""
+    if introducer_asset_amount == 0:
+        return Decimal('0.00')
+    elif introducer_asset_amount < 1000:
+        return Decimal('0.02')
+    elif introducer_asset_amount < 10000:
+        return Decimal('0.025')
+    return Decimal('0.03')
+
+
+def unlock_withdrawn_amount(lock, amount):
+    """
+    Books an approved asset withdrawal against the deposit lock: all of it to
+    the 1 year bucket once the deposit is a year old, to the 6 month bucket
+    once it is 6 months old, to neither before that. Does not save the lock.
+    """
+    if amount > 0 and lock.withdrawable_now <= 0:
+        raise ValidationError(f"Nothing is withdrawable from deposit lock {lock.id}")
+    age = timezone.now() - lock.deposit.created_at
+    if age >= timedelta(days=365):
+        lock.amount_1y_unlocked += amount
+    elif age >= timedelta(days=180):
+        lock.amount_6m_unlocked += amount
+
+
 class WalletService:
     @staticmethod
     def transfer_master_point(sender, receiver, amount, description="", reference=""):
@@ -683,17 +1062,14 @@ class WalletService:
         if are_in_same_level(sender, receiver):
             raise ValidationError("Transfer unsuccessful. Users are in the same level")
 
-        sender_wallet = Wallet.objects.get(user=sender)
-        if sender_wallet.master_point_balance < amount:
-            raise ValidationError("Insufficient Register Point balance")
-        
         with db_transaction.atomic():
-            sender_wallet.master_point_balance -= Decimal(amount)
-            sender_wallet.save()
-            
-            receiver_wallet = Wallet.objects.get(user=receiver)
-            receiver_wallet.master_point_balance += Decimal(amount)
-            receiver_wallet.save()
+            # Both rows are updated in user id order, so opposite transfers cannot deadlock
+            wallets = {}
+            for user_id, delta in sorted([(sender.id, -Decimal(amount)), (receiver.id, Decimal(amount))]):
+                wallets[user_id] = change_balances(Wallet, user_id, {'master_point_balance': delta})
+                if wallets[user_id] is None:
+                    raise ValidationError("Insufficient Register Point balance")
+            sender_wallet, receiver_wallet = wallets[sender.id], wallets[receiver.id]
             
             # Create transactions for both sender and receiver
             Transaction.objects.create(
@@ -728,19 +1104,15 @@ class WalletService:
         if amount % 10 != 0:
             raise ValidationError("Amount must be a multiple of 10")
 
-        wallet = Wallet.objects.get(user=user)
-        if wallet.master_point_balance < amount:
-            raise ValidationError("Insufficient Master Point balance")
-        
         with db_transaction.atomic():
 
             user_ = User.objects.select_for_update().get(id=user.id)
             if user_.verification_status != 'APPROVED':
                 raise ValidationError("User is not verified.")
 
-            amount = Decimal(amount)
-            wallet.master_point_balance -= amount
-            wallet.save()
+            wallet = change_balances(Wallet, user.id, {'master_point_balance': -amount})
+            if wallet is None:
+                raise ValidationError("Insufficient Master Point balance")
             
             asset = Asset.objects.get(user=user)
 
@@ -783,8 +1155,7 @@ class WalletService:
 
 
             if action == 'Approve':
-                asset.amount += Decimal(amount)
-                asset.save()
+                change_balances(Asset, asset.user_id, {'amount': Decimal(amount)})
                 trx.request_status = 'APPROVED'
                 trx.save()
 
@@ -792,22 +1163,10 @@ class WalletService:
                 if user.referred_by:
                     try:
                         introducer = User.objects.get(id=user.referred_by)
-                        introducer_wallet = Wallet.objects.get(user=introducer)
                         introducer_asset = Asset.objects.get(user=introducer)
-                        asset_amount = introducer_asset.amount
-                        # Determine bonus rate
-
-                        if asset_amount == 0:
-                            bonus_rate = Decimal('0.00')
-                        elif asset_amount < 1000:
-                            bonus_rate = Decimal('0.02')
-                        elif 1000 <= asset_amount < 10000:
-                            bonus_rate = Decimal('0.025')
-                        elif asset_amount >= 10000:
-                            bonus_rate = Decimal('0.03')
+                        bonus_rate = introducer_bonus_rate(introducer_asset.amount)
                         bonus_amount = (bonus_rate * Decimal(amount)).quantize(Decimal('0.01'))
-                        introducer_wallet.introducer_point_balance += bonus_amount
-                        introducer_wallet.save()
+                        introducer_wallet = change_balances(Wallet, introducer.id, {'introducer_point_balance': bonus_amount})
                         Transaction.objects.create(
                             user=introducer,
                             wallet=introducer_wallet,
@@ -821,8 +1180,7 @@ class WalletService:
                         pass # Referrer not found, skip bonus
 
             elif action == 'Reject':
-                wallet.master_point_balance += Decimal(amount)
-                wallet.save()
+                change_balances(Wallet, wallet.user_id, {'master_point_balance': Decimal(amount)})
                 trx.request_status = 'REJECTED'
                 trx.save()
             return trx
@@ -839,10 +1197,8 @@ class AssetService:
         
         with db_transaction.atomic():
             # 1. Add 100 to user's Asset
-            asset, created = Asset.objects.get_or_create(user=user)
-            asset.amount += Decimal('100.00')
-            asset.is_free_campro = True  # Mark as received
-            asset.save()
+            Asset.objects.get_or_create(user=user)
+            asset = change_balances(Asset, user.id, {'amount': Decimal('100.00')}, values={'is_free_campro': True})  # Mark as received
 
             # 2. Create a Transaction record (for audit)
             trx = Transaction.objects.create(
@@ -904,34 +1260,32 @@ class AssetService:
         if amount > 1000:
             raise ValidationError("Maximum withdrawal amount is 1000")
 
-        asset = Asset.objects.get(user=user)
-        if asset.amount < amount:
-            raise ValidationError("Insufficient Asset balance")
-        
-        lock = DepositLock.objects.get(id=depositlock_id)
+        with db_transaction.atomic():
+            # Freeze the asset amount, unless it is no longer there
+            asset = change_balances(Asset, user.id, {'amount': -Decimal(amount)})
+            if asset is None:
+                raise ValidationError("Insufficient Asset balance")
 
-        total_withdrawable = lock.withdrawable_now - lock.freeze_amount       
-        if amount > total_withdrawable:
-            raise ValidationError(
-            f"Only {total_withdrawable} is withdrawable"
-        )
-        lock.freeze_amount += Decimal(amount)
-        lock.save()
-       
-        Transaction.objects.create(
-            user=user,
-            asset=asset,
-            transaction_type='ASSET_WITHDRAWAL',
-            point_type='ASSET',
-            amount=amount,
-            description=description,
-            request_status='PENDING',
-            reference=str(lock.id),
-        )
+            lock = DepositLock.objects.select_for_update().get(id=depositlock_id)
 
-        # Update asset balance
-        asset.amount -= amount
-        asset.save()
+            total_withdrawable = lock.withdrawable_now - lock.freeze_amount       
+            if amount > total_withdrawable:
+                raise ValidationError(
+                f"Only {total_withdrawable} is withdrawable"
+            )
+            lock.freeze_amount += Decimal(amount)
+            lock.save()
+           
+            Transaction.objects.create(
+                user=user,
+                asset=asset,
+                transaction_type='ASSET_WITHDRAWAL',
+                point_type='ASSET',
+                amount=amount,
+                description=description,
+                request_status='PENDING',
+                reference=str(lock.id),
+            )
         
         return asset
     
@@ -948,24 +1302,8 @@ class AssetService:
             
             if action == 'Approve':
 
-                available = lock.withdrawable_now
-                remaining_to_deduct = amount
-                while remaining_to_deduct > 0:
-                    deduct_amount = min(available, remaining_to_deduct)
-                    if remaining_to_deduct <= 0:
-                        break
-                    if deduct_amount > 0:
-                        age = timezone.now() - lock.deposit.created_at
-                        if age >= timedelta(days=365):
-                            lock.amount_1y_unlocked += deduct_amount
-                        elif age >= timedelta(days=180):
-                            lock.amount_6m_unlocked += deduct_amount
-                        lock.save()
-                        remaining_to_deduct -= deduct_amount
-
-                wallet = Wallet.objects.get(user=trx.user)
-                wallet.profit_point_balance += Decimal(amount)
-                wallet.save()
+                unlock_withdrawn_amount(lock, amount)
+                change_balances(Wallet, trx.user_id, {'profit_point_balance': Decimal(amount)})
 
                 # Mark as approved
                 trx.request_status = 'APPROVED'
@@ -974,9 +1312,7 @@ class AssetService:
             elif action == 'Reject':
 
                 # Restore asset balance (unfreeze the amount)
-                asset = trx.asset
-                asset.amount += trx.amount
-                asset.save()
+                change_balances(Asset, trx.asset.user_id, {'amount': trx.amount})
 
                 trx.request_status = 'REJECTED'
                 trx.save()
@@ -986,30 +1322,107 @@ class AssetService:
             return trx
         
 
+DAILY_CONVERSION_LIMIT = Decimal('50')
+CONVERSION_COUNTER_BATCH_SIZE = 1000
+
+
 class ConversionLimitService:
     @staticmethod
-    def check_daily_conversion_limit(user, amount_to_add):
-        """Check combined daily conversion limit for both Profit and Commission"""
-        start_of_day = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
+    def reserve_daily_conversion(user, amount_to_add):
+        """
+        Counts amount_to_add against the user's combined Profit and Commission
+        conversion limit for today (local time), or raises ValidationError if
+        it does not fit. Call it inside the conversion's transaction, so a
+        conversion that fails afterwards gives its share back.
+        """
+        amount = Decimal(amount_to_add)
+        today = timezone.localdate()
+        counter = ConversionDailyCounter.objects.filter(user=user, day=today)
 
-        # Get total conversions from both sources
-        daily_total = Transaction.objects.filter(
-            user=user,
-            transaction_type='CONVERT',
-            target_point_type='MASTER',
-            created_at__gte=start_of_day,
-            created_at__lt=end_of_day
-        ).exclude(
-            point_type='MASTER'  # Exclude any MASTER-to-MASTER conversions if they exist
-        ).aggregate(total=Sum('converted_amount'))['total'] or 0
-
-        daily_limit = Decimal(daily_total) + Decimal(amount_to_add)
-        if daily_limit > Decimal('50'):
-            available = Decimal('50') - Decimal(daily_total)
-            raise ValidationError(
-                f"You can convert {available} more Master Points today "
+        def add_within_limit():
+            # Check and increment in one statement: concurrent conversions cannot both fit in the last points
+            return counter.filter(converted_amount__lte=DAILY_CONVERSION_LIMIT - amount).update(
+                converted_amount=F('converted_amount') + amount, updated_at=timezone.now()
             )
+
+        if add_within_limit():
+            return
+        converted = counter.values_list('converted_amount', flat=True).first()
+        if converted is None and amount <= DAILY_CONVERSION_LIMIT:
+            try:
+                with db_transaction.atomic():
+                    ConversionDailyCounter.objects.create(user=user, day=today, converted_amount=amount)
+                return
+            except IntegrityError:
+                # First conversion of the day made concurrently by another request
+                if add_within_limit():
+                    return
+                converted = counter.values_list('converted_amount', flat=True).first()
+
+        available = DAILY_CONVERSION_LIMIT - (converted or Decimal('0.00'))
+        raise ValidationError(f"You can convert {available} more Master Points today")
+
+
+def live_conversion_totals(since=None, apps=global_apps):
+    """Points converted per (user, local day), aggregated from the CONVERT transactions."""
+    Transaction = apps.get_model('server', 'Transaction')
+    conversions = Transaction.objects.filter(
+        user__isnull=False, transaction_type='CONVERT', target_point_type='MASTER',
+    ).exclude(point_type='MASTER')
+    if since is not None:
+        conversions = conversions.filter(created_at__gte=local_day_start(since))
+    return (
+        conversions
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(converted_amount=Sum('converted_amount'))
+        .filter(converted_amount__isnull=False)
+        .order_by('user_id', 'day')
+    )
+
+
+def rebuild_conversion_counters(since=None, apps=global_apps):
+    """
+    Replaces the conversion counters (of the local days from `since` on, or
+    all of them) with the totals of the CONVERT transactions. Returns the
+    number of counters written.
+    """
+    ConversionDailyCounter = apps.get_model('server', 'ConversionDailyCounter')
+    created = 0
+    with db_transaction.atomic():
+        stale = ConversionDailyCounter.objects.all()
+        if since is not None:
+            stale = stale.filter(day__gte=since)
+        stale.delete()
+
+        batch = []
+        for row in live_conversion_totals(since, apps).iterator(chunk_size=CONVERSION_COUNTER_BATCH_SIZE):
+            batch.append(ConversionDailyCounter(**row))
+            if len(batch) >= CONVERSION_COUNTER_BATCH_SIZE:
+                ConversionDailyCounter.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        ConversionDailyCounter.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def find_conversion_counter_drift(since=None):
+    """[(user_id, day, stored, live)] for every counter that differs from the transactions."""
+    stored_rows = ConversionDailyCounter.objects.values('user_id', 'day', 'converted_amount')
+    if since is not None:
+        stored_rows = stored_rows.filter(day__gte=since)
+    stored = {(row['user_id'], row['day']): Decimal(row['converted_amount']).quantize(Decimal('0.01')) for row in stored_rows}
+    live = {
+        (row['user_id'], row['day']): Decimal(row['converted_amount']).quantize(Decimal('0.01'))
+        for row in live_conversion_totals(since)
+    }
+    zero = Decimal('0.00')
+    return [
+        (user_id, day, stored.get((user_id, day), zero), live.get((user_id, day), zero))
+        for user_id, day in sorted(set(stored) | set(live))
+        if stored.get((user_id, day), zero) != live.get((user_id, day), zero)
+    ]
             
 
 class ProfitService:
@@ -1030,19 +1443,14 @@ class ProfitService:
             raise ValidationError("Amount must be a multiple of 10")
         
         today = timezone.localdate()
-        if not WithdrawalWindow.objects.filter(date=today, is_active=True).exists():
+        if not is_withdrawal_window_open(today, cached=False):
             raise ValidationError("Profit Point withdrawal is only allowed on specific days.")
         
-        wallet = Wallet.objects.get(user=user)
-        if wallet.profit_point_balance < amount:
-            raise ValidationError("Insufficient Profit Point balance")
-
         txn_this_month = Transaction.objects.filter(
+            month_filter_q('created_at', today.year, today.month),
             user=user,
             transaction_type='WITHDRAWAL',
             point_type='PROFIT',
-            created_at__month=timezone.now().month,
-            created_at__year=timezone.now().year
         ).exists()
         if txn_this_month:
             raise ValidationError("You can only request one Profit Point withdrawal per month")
@@ -1050,11 +1458,14 @@ class ProfitService:
         
         fee_rate = Decimal('0.02') #Fee Rate 2%
         fee = amount * fee_rate
-        wallet.profit_point_balance -= amount
-        wallet.save()
         actual_amount = amount - fee
         
         with db_transaction.atomic():
+            # Reserve the amount by deducting from balance
+            wallet = change_balances(Wallet, user.id, {'profit_point_balance': -Decimal(amount)})
+            if wallet is None:
+                raise ValidationError("Insufficient Profit Point balance")
+
             # Create withdrawal request
             withdrawal_request = WithdrawalRequest.objects.create(
                 wallet=wallet,
@@ -1087,7 +1498,6 @@ class ProfitService:
         """Approve or reject a withdrawal request"""
 
         super_user = User.objects.get(is_superuser=True)
-        super_user_wallet = Wallet.objects.get(user=super_user)
 
         if reference is None:
             raise ValidationError('Reference is required.')
@@ -1111,8 +1521,7 @@ class ProfitService:
                 fee_rate = Decimal('0.02') #Fee Rate 2%
                 fee = txn.amount * fee_rate
 
-                super_user_wallet.profit_point_balance += fee
-                super_user_wallet.save()
+                super_user_wallet = change_balances(Wallet, super_user.id, {'profit_point_balance': fee})
                 
                 txn.save()
 
@@ -1129,8 +1538,7 @@ class ProfitService:
                 
             elif action == 'Reject':
                 # Refund the amount back to wallet
-                wallet.profit_point_balance += withdrawal_request.amount
-                wallet.save()
+                change_balances(Wallet, wallet.user_id, {'profit_point_balance': withdrawal_request.amount})
                 
                 # Update request status
                 txn.reference = reference
@@ -1151,17 +1559,15 @@ class ProfitService:
         if amount != int(amount):
             raise ValidationError("Amount need to be whole number")
 
-        # Combined daily limit check
-        ConversionLimitService.check_daily_conversion_limit(user, amount)
-
-        wallet = Wallet.objects.get(user=user)
-        if wallet.profit_point_balance < amount:
-            raise ValidationError("Insufficient Profit Point balance")
-        
         with db_transaction.atomic():
-            wallet.profit_point_balance -= Decimal(amount)
-            wallet.master_point_balance += Decimal(amount)
-            wallet.save()
+            # Combined daily limit check
+            ConversionLimitService.reserve_daily_conversion(user, amount)
+            wallet = change_balances(Wallet, user.id, {
+                'profit_point_balance': -Decimal(amount),
+                'master_point_balance': Decimal(amount),
+            })
+            if wallet is None:
+                raise ValidationError("Insufficient Profit Point balance")
             
             Transaction.objects.create(
                 user=user,
@@ -1191,23 +1597,19 @@ class CommissionService:
             raise ValidationError("Amount must be a multiple of 10")
         
         today = timezone.localdate()
-        if not WithdrawalWindow.objects.filter(date=today, is_active=True).exists():
+        if not is_withdrawal_window_open(today, cached=False):
             raise ValidationError("Commission Point withdrawal is only allowed on specific days.")
         
-        wallet = Wallet.objects.get(user=user)
-        
-        affiliate_balance = Decimal(wallet.affiliate_point_balance)
-        introducer_balance = Decimal(wallet.introducer_point_balance)
-        
-        commission_point = affiliate_balance + introducer_balance
-        if commission_point < amount:
-            raise ValidationError("Insufficient Commission Point balance")
-        
         fee_rate = Decimal('0.02') #Fee Rate 2% 
         fee = amount * fee_rate
         actual_amount = amount - fee
         
         with db_transaction.atomic():
+            # Reserve the amount by deducting from balance, affiliate first
+            wallet = debit_commission(user.id, amount)
+            if wallet is None:
+                raise ValidationError("Insufficient Commission Point balance")
+
             # Create withdrawal request
             withdrawal_request = WithdrawalRequest.objects.create(
                 wallet=wallet,
@@ -1218,15 +1620,6 @@ class CommissionService:
                 fee_rate=fee_rate,
             )
             
-            # Reserve the amount by deducting from balance
-            balance_deduct = amount - affiliate_balance
-            if affiliate_balance >= amount:
-                wallet.affiliate_point_balance -= amount
-            else:
-                wallet.affiliate_point_balance = Decimal('0.00')
-                wallet.introducer_point_balance -= balance_deduct
-            wallet.save()
-            
             # Create pending transaction
             txn = Transaction.objects.create(
                 user=user,
@@ -1249,7 +1642,6 @@ class CommissionService:
         """Approve or reject a withdrawal request"""
 
         super_user = User.objects.get(is_superuser=True)
-        super_user_wallet = Wallet.objects.get(user=super_user)
 
         if reference is None:
             raise ValidationError('Reference is required.')
@@ -1273,8 +1665,7 @@ class CommissionService:
                 fee_rate = Decimal('0.02') #Fee Rate 2%
                 fee = txn.amount * fee_rate
 
-                super_user_wallet.profit_point_balance += fee
-                super_user_wallet.save()
+                super_user_wallet = change_balances(Wallet, super_user.id, {'profit_point_balance': fee})
                 
                 txn.save()
 
@@ -1292,13 +1683,13 @@ class CommissionService:
             elif action == 'Reject':
                 # Refund the amount back to wallet
                 refund_amount = withdrawal_request.amount
-                affiliate_balance = wallet.affiliate_point_balance
-                ori_affiliate_deduct = min(refund_amount, affiliate_balance)
-                ori_bounus_deduct = refund_amount - ori_affiliate_deduct
+                wallet_values = Wallet.objects.filter(pk=wallet.pk).values('affiliate_point_balance').get()
+                ori_affiliate_deduct, ori_bounus_deduct = commission_split(wallet_values, refund_amount)
 
-                wallet.affiliate_point_balance += ori_affiliate_deduct
-                wallet.introducer_point_balance += ori_bounus_deduct
-                wallet.save()
+                change_balances(Wallet, wallet.user_id, {
+                    'affiliate_point_balance': ori_affiliate_deduct,
+                    'introducer_point_balance': ori_bounus_deduct,
+                })
                 
                 # Update request status
                 txn.request_status = 'REJECTED'
@@ -1317,31 +1708,17 @@ class CommissionService:
     @staticmethod
     def convert_to_master_point(user, amount, reference=""):
         """Convert Commission Point to Master Point"""
-        wallet = Wallet.objects.get(user=user)
-        commission_point = wallet.affiliate_point_balance + wallet.introducer_point_balance
-
         if amount != int(amount):
             raise ValidationError("Amount need to be whole number")
         
-        if commission_point < amount:
-            raise ValidationError("Insufficient Commission Point balance")
-        
-        # Combined daily limit check
-        ConversionLimitService.check_daily_conversion_limit(user, amount)
-
         with db_transaction.atomic():
-            affiliate_point = wallet.affiliate_point_balance
-            convert_balance = amount - affiliate_point
-            if affiliate_point >= amount:
-                wallet.affiliate_point_balance -= Decimal(amount)
-            else:
-                wallet.affiliate_point_balance = Decimal('0.00')
-                if wallet.introducer_point_balance < convert_balance:
-                    raise ValidationError("Insufficient Commission Point balance(bonus insufficient)")
-                wallet.introducer_point_balance -= convert_balance
-                
-            wallet.master_point_balance += Decimal(amount)
-            wallet.save()
+            # Combined daily limit check
+            ConversionLimitService.reserve_daily_conversion(user, amount)
+
+            # Affiliate point first, the rest from the introducer bonus
+            wallet = debit_commission(user.id, amount, credits={'master_point_balance': Decimal(amount)})
+            if wallet is None:
+                raise ValidationError("Insufficient Commission Point balance")
             
             Transaction.objects.create(
                 user=user,
@@ -1357,6 +1734,301 @@ class CommissionService:
         return wallet
     
 
+# --------------------- BATCH APPROVALS --------------------------------------------------
+
+BATCH_APPROVAL_MAX_ITEMS = 500
+BATCH_APPROVAL_ACTIONS = {'Approve': 'APPROVED', 'Reject': 'REJECTED'}
+WITHDRAWAL_FEE_RATE = Decimal('0.02')
+
+
+class BatchBalances:
+    """
+    The Wallet and Asset rows a batch of approvals touches, locked in user
+    order. Credits change the rows in memory, so later items of the batch see
+    the earlier ones (introducer bonus tiers, commission refund splits), and
+    are written back by save() as one F() bulk_update per model.
+    """
+
+    def __init__(self, wallet_user_ids=(), asset_user_ids=()):
+        self.rows = {
+            model: {
+                row.user_id: row
+                for row in model.objects.select_for_update().filter(user_id__in=set(user_ids)).order_by('user_id')
+            }
+            for model, user_ids in ((Wallet, wallet_user_ids), (Asset, asset_user_ids))
+        }
+        self.deltas = {Wallet: {}, Asset: {}}
+
+    def get(self, model, user_id):
+        row = self.rows[model].get(user_id)
+        if row is None:
+            raise ValidationError(f"{model.__name__} of {user_id} does not exist.")
+        return row
+
+    def credit(self, credits):
+        """
+        Applies [(model, user_id, {field: amount})]. Every row is checked
+        first, so a failing item leaves nothing half applied.
+        """
+        rows = [self.get(model, user_id) for model, user_id, _ in credits]
+        for row, (model, user_id, amounts) in zip(rows, credits):
+            row_deltas = self.deltas[model].setdefault(user_id, {})
+            for field, amount in amounts.items():
+                setattr(row, field, getattr(row, field) + amount)
+                row_deltas[field] = row_deltas.get(field, Decimal('0.00')) + amount
+
+    def save(self):
+        current_time = timezone.now()
+        for model, per_user in self.deltas.items():
+            fields = sorted({field for row_deltas in per_user.values() for field in row_deltas})
+            if not fields:
+                continue
+            has_updated_at = any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+            updates = []
+            for user_id, row_deltas in per_user.items():
+                update = model(pk=self.rows[model][user_id].pk)
+                for field in fields:
+                    setattr(update, field, F(field) + row_deltas.get(field, Decimal('0.00')))
+                if has_updated_at:
+                    update.updated_at = current_time
+                updates.append(update)
+            model.objects.bulk_update(updates, fields + (['updated_at'] if has_updated_at else []), batch_size=DISTRIBUTION_BATCH_SIZE)
+            record_bulk_update([self.rows[model][user_id] for user_id in per_user])
+            invalidate_balances(per_user)
+
+
+class BatchApprovalService:
+    """
+    Approves or rejects many pending requests of one kind in a single
+    database transaction. Requests that cannot be processed (unknown, of
+    another kind, already processed, missing rows) are reported per item and
+    left untouched; the others are written back with bulk updates and bulk
+    inserts instead of row by row.
+    """
+
+    REQUEST_TYPES = ('ASSET_PLACEMENT', 'ASSET_WITHDRAWAL', 'PROFIT_WITHDRAWAL', 'COMMISSION_WITHDRAWAL')
+
+    @classmethod
+    def process(cls, request_type, ids, action, reference=""):
+        """
+        ids are Transaction ids for ASSET_PLACEMENT / ASSET_WITHDRAWAL and
+        WithdrawalRequest ids for PROFIT_WITHDRAWAL / COMMISSION_WITHDRAWAL.
+        Returns one {'id', 'status'[, 'error']} per distinct id, in order.
+        """
+        if request_type not in cls.REQUEST_TYPES:
+            raise ValidationError(f"Type must be one of {', '.join(cls.REQUEST_TYPES)}.")
+        if action not in BATCH_APPROVAL_ACTIONS:
+            raise ValidationError("Action must be Approve or Reject.")
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError("ids must be a non-empty list.")
+        try:
+            ids = list(dict.fromkeys(int(item_id) for item_id in ids))
+        except (TypeError, ValueError):
+            raise ValidationError("ids must be integers.")
+        if len(ids) > BATCH_APPROVAL_MAX_ITEMS:
+            raise ValidationError(f"At most {BATCH_APPROVAL_MAX_ITEMS} requests can be processed at once.")
+        if request_type in ('PROFIT_WITHDRAWAL', 'COMMISSION_WITHDRAWAL') and reference is None:
+            raise ValidationError('Reference is required.')
+
+        with db_transaction.atomic():
+            if request_type == 'ASSET_PLACEMENT':
+                errors = cls._process_placements(ids, action)
+            elif request_type == 'ASSET_WITHDRAWAL':
+                errors = cls._process_asset_withdrawals(ids, action)
+            else:
+                point_type = 'PROFIT' if request_type == 'PROFIT_WITHDRAWAL' else 'COMMISSION'
+                errors = cls._process_point_withdrawals(ids, action, point_type, reference)
+
+        status = BATCH_APPROVAL_ACTIONS[action]
+        return [
+            {'id': item_id, 'status': 'FAILED', 'error': errors[item_id]} if item_id in errors else {'id': item_id, 'status': status}
+            for item_id in ids
+        ]
+
+    @staticmethod
+    def _pending_transactions(ids, transaction_type, errors):
+        transactions = Transaction.objects.select_for_update(of=('self',)).select_related('user').filter(id__in=ids)
+        by_id = {trx.id: trx for trx in transactions.order_by('id')}
+        pending = []
+        for item_id in ids:
+            trx = by_id.get(item_id)
+            if trx is None or trx.transaction_type != transaction_type:
+                errors[item_id] = f"No {transaction_type} transaction {item_id}"
+            elif trx.request_status != 'PENDING':
+                errors[item_id] = "This request has already been processed"
+            else:
+                pending.append(trx)
+        return pending
+
+    @staticmethod
+    def _save_transactions(processed, fields, created):
+        Transaction.objects.bulk_update(processed, fields, batch_size=DISTRIBUTION_BATCH_SIZE)
+        if created:
+            Transaction.objects.bulk_create(created, batch_size=DISTRIBUTION_BATCH_SIZE)
+            record_bulk_create(created)
+            record_transactions_created(created)
+
+    @classmethod
+    def _process_placements(cls, ids, action):
+        errors = {}
+        pending = cls._pending_transactions(ids, 'ASSET_PLACEMENT', errors)
+        approve = action == 'Approve'
+        introducers = {}
+        if approve:
+            referrer_ids = {trx.user.referred_by for trx in pending if trx.user and trx.user.referred_by}
+            introducers = User.objects.in_bulk(referrer_ids)
+            balances = BatchBalances(wallet_user_ids=introducers, asset_user_ids=[trx.user_id for trx in pending] + list(introducers))
+        else:
+            balances = BatchBalances(wallet_user_ids=[trx.user_id for trx in pending])
+
+        processed, bonuses = [], []
+        for trx in pending:
+            amount = trx.amount if trx.amount is not None else Decimal('0.00')
+            try:
+                if approve:
+                    credits = [(Asset, trx.user_id, {'amount': amount})]
+                    introducer = introducers.get(trx.user.referred_by) if trx.user else None
+                    if introducer is not None:
+                        bonus_rate = introducer_bonus_rate(balances.get(Asset, introducer.id).amount)
+                        bonus_amount = (bonus_rate * amount).quantize(Decimal('0.01'))
+                        credits.append((Wallet, introducer.id, {'introducer_point_balance': bonus_amount}))
+                    balances.credit(credits)
+                    if introducer is not None:
+                        bonuses.append(Transaction(
+                            user=introducer,
+                            wallet=balances.get(Wallet, introducer.id),
+                            transaction_type='INTRODUCER_BONUS',
+                            point_type='COMMISSION',
+                            amount=bonus_amount,
+                            description=f"Introducer bonus from {trx.user.username} asset placement ({amount})",
+                            reference=f"INTRODUCER_BONUS from {trx.user_id}"
+                        ))
+                else:
+                    balances.credit([(Wallet, trx.user_id, {'master_point_balance': amount})])
+            except ValidationError as e:
+                errors[trx.id] = ' '.join(e.messages)
+                continue
+            trx.request_status = BATCH_APPROVAL_ACTIONS[action]
+            processed.append(trx)
+
+        balances.save()
+        cls._save_transactions(processed, ['request_status'], bonuses)
+        return errors
+
+    @classmethod
+    def _process_asset_withdrawals(cls, ids, action):
+        errors = {}
+        pending = cls._pending_transactions(ids, 'ASSET_WITHDRAWAL', errors)
+        lock_ids = {}
+        for trx in pending:
+            try:
+                lock_ids[trx.id] = int(trx.reference)
+            except ValueError:
+                errors[trx.id] = f"Invalid deposit lock reference {trx.reference!r}"
+        pending = [trx for trx in pending if trx.id in lock_ids]
+        locks = DepositLock.objects.select_for_update(of=('self',)).select_related('deposit').in_bulk(set(lock_ids.values()))
+        approve = action == 'Approve'
+        user_ids = [trx.user_id for trx in pending]
+        balances = BatchBalances(wallet_user_ids=user_ids) if approve else BatchBalances(asset_user_ids=user_ids)
+
+        processed, changed_locks = [], {}
+        for trx in pending:
+            lock = locks.get(lock_ids[trx.id])
+            try:
+                if lock is None:
+                    raise ValidationError(f"Deposit lock {lock_ids[trx.id]} does not exist.")
+                if approve:
+                    balances.get(Wallet, trx.user_id)
+                    unlock_withdrawn_amount(lock, trx.amount)
+                    balances.credit([(Wallet, trx.user_id, {'profit_point_balance': trx.amount})])
+                else:
+                    balances.credit([(Asset, trx.user_id, {'amount': trx.amount})])
+            except ValidationError as e:
+                errors[trx.id] = ' '.join(e.messages)
+                continue
+            lock.freeze_amount -= trx.amount
+            changed_locks[lock.id] = lock
+            trx.request_status = BATCH_APPROVAL_ACTIONS[action]
+            processed.append(trx)
+
+        balances.save()
+        DepositLock.objects.bulk_update(
+            changed_locks.values(), ['amount_6m_unlocked', 'amount_1y_unlocked', 'freeze_amount'], batch_size=DISTRIBUTION_BATCH_SIZE
+        )
+        cls._save_transactions(processed, ['request_status'], [])
+        return errors
+
+    @classmethod
+    def _process_point_withdrawals(cls, ids, action, point_type, reference):
+        errors = {}
+        requests = WithdrawalRequest.objects.select_for_update(of=('self',)).select_related('wallet', 'transaction__user')
+        by_id = requests.filter(point_type=point_type).in_bulk(ids)
+        pending = []
+        for item_id in ids:
+            withdrawal_request = by_id.get(item_id)
+            if withdrawal_request is None or withdrawal_request.transaction is None:
+                errors[item_id] = f"No {point_type} withdrawal request {item_id}"
+            elif withdrawal_request.transaction.request_status != 'PENDING':
+                errors[item_id] = "This request has already been processed"
+            else:
+                pending.append(withdrawal_request)
+
+        approve = action == 'Approve'
+        if approve:
+            super_user = User.objects.get(is_superuser=True)
+            balances = BatchBalances(wallet_user_ids=[super_user.id])
+        else:
+            balances = BatchBalances(wallet_user_ids=[withdrawal_request.wallet.user_id for withdrawal_request in pending])
+
+        current_time = timezone.now()
+        processed, fees = [], []
+        for withdrawal_request in pending:
+            txn = withdrawal_request.transaction
+            owner_id = withdrawal_request.wallet.user_id
+            try:
+                if approve:
+                    fee = txn.amount * WITHDRAWAL_FEE_RATE
+                    balances.credit([(Wallet, super_user.id, {'profit_point_balance': fee})])
+                    connector = 'of' if point_type == 'PROFIT' else 'for'
+                    fees.append(Transaction(
+                        user=super_user,
+                        wallet=balances.get(Wallet, super_user.id),
+                        transaction_type='WITHDRAWAL_FEE',
+                        point_type='PROFIT',
+                        amount=fee,
+                        description=f"Withdrawal Fee {connector} {txn.user}: {fee}",
+                        request_status='APPROVED',
+                        reference=reference
+                    ))
+                elif point_type == 'PROFIT':
+                    balances.credit([(Wallet, owner_id, {'profit_point_balance': withdrawal_request.amount})])
+                else:
+                    wallet = balances.get(Wallet, owner_id)
+                    from_affiliate, from_introducer = commission_split(
+                        {'affiliate_point_balance': wallet.affiliate_point_balance}, withdrawal_request.amount
+                    )
+                    balances.credit([(Wallet, owner_id, {
+                        'affiliate_point_balance': from_affiliate,
+                        'introducer_point_balance': from_introducer,
+                    })])
+            except ValidationError as e:
+                errors[withdrawal_request.id] = ' '.join(e.messages)
+                continue
+            txn.reference = reference
+            txn.request_status = BATCH_APPROVAL_ACTIONS[action]
+            if not approve:
+                txn.description = f"Withdrawal request {txn.amount} has been refunded"
+            withdrawal_request.processed_at = current_time
+            processed.append(withdrawal_request)
+
+        balances.save()
+        WithdrawalRequest.objects.bulk_update(processed, ['processed_at'], batch_size=DISTRIBUTION_BATCH_SIZE)
+        cls._save_transactions(
+            [withdrawal_request.transaction for withdrawal_request in processed], ['request_status', 'reference', 'description'], fees
+        )
+        return errors
+
+
 def get_client_ip(request: HttpRequest) -> str:
     """Get client IP address from request object"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -1379,6 +2051,35 @@ DEFAULT_TIMEZONE = 'Asia/Kuala_Lumpur'
 def get_timezone(tz_name=None):
     return pytz.timezone(tz_name or DEFAULT_TIMEZONE)
 
+def local_day_start(day, tz_name=None):
+    """Returns the aware UTC datetime at which the local calendar `day` begins."""
+    return get_timezone(tz_name).localize(datetime.combine(day, time.min)).astimezone(pytz.UTC)
+
+def _to_date(value, label):
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"Invalid {label} string: {value}. Expected format: YYYY-MM-DD")
+    elif isinstance(value, datetime):
+        return value.date()  # Extract date part
+    elif isinstance(value, date):
+        return value
+    raise TypeError(f"{label}_input must be str, datetime, or date. Got {type(value)}")
+
+def local_range_q(field_name, start_day, end_day, tz_name=None):
+    """
+    Half-open `start_day <= local date < end_day` filter on a DateTimeField.
+    Compares the bare column against UTC bounds, so it can use the column's
+    index, unlike the __date / __month / __year lookups.
+    """
+    return Q(
+        **{
+            f"{field_name}__gte": local_day_start(start_day, tz_name),
+            f"{field_name}__lt": local_day_start(end_day, tz_name),
+        }
+    )
+
 def date_filter_q(field_name, start_date_input, end_date_input=None, tz_name=None):
     """
     Returns a Q object to filter a DateTimeField by local calendar date(s) in given timezone.
@@ -1392,52 +2093,24 @@ def date_filter_q(field_name, start_date_input, end_date_input=None, tz_name=Non
         date_filter_q('created_at', some_datetime_obj)
         date_filter_q('created_at', some_date_obj, '2025-04-05')
     """
-    tz = get_timezone(tz_name)
-
-    # Normalize start_date_input to date
-    if isinstance(start_date_input, str):
-        try:
-            start_dt = datetime.strptime(start_date_input, '%Y-%m-%d').date()
-        except ValueError:
-            raise ValueError(f"Invalid date string: {start_date_input}. Expected format: YYYY-MM-DD")
-    elif isinstance(start_date_input, datetime):
-        start_dt = start_date_input.date()  # Extract date part
-    elif isinstance(start_date_input, date):
-        start_dt = start_date_input
-    else:
-        raise TypeError(f"start_date_input must be str, datetime, or date. Got {type(start_date_input)}")
-
-    # Normalize end_date_input to date (if provided)
-    if end_date_input:
-        if isinstance(end_date_input, str):
-            try:
-                end_dt = datetime.strptime(end_date_input, '%Y-%m-%d').date()
-            except ValueError:
-                raise ValueError(f"Invalid end date string: {end_date_input}. Expected format: YYYY-MM-DD")
-        elif isinstance(end_date_input, datetime):
-            end_dt = end_date_input.date()
-        elif isinstance(end_date_input, date):
-            end_dt = end_date_input
-        else:
-            raise TypeError(f"end_date_input must be str, datetime, or date. Got {type(end_date_input)}")
-    else:
-        end_dt = None
-
-    # Build local datetime range
-    if end_dt:
-        start_local = tz.localize(datetime.combine(start_dt, time.min))
-        end_local = tz.localize(datetime.combine(end_dt, time.max))
-    else:
-        start_local = tz.localize(datetime.combine(start_dt, time.min))
-        end_local = tz.localize(datetime.combine(start_dt, time.max))
-
-    # Convert to UTC for querying
-    start_utc = start_local.astimezone(pytz.UTC)
-    end_utc = end_local.astimezone(pytz.UTC)
-
-    return Q(
-        **{
-            f"{field_name}__gte": start_utc,
-            f"{field_name}__lte": end_utc
-        }
-    )
+    start_dt = _to_date(start_date_input, 'start_date')
+    end_dt = _to_date(end_date_input, 'end_date') if end_date_input else start_dt
+    return local_range_q(field_name, start_dt, end_dt + timedelta(days=1), tz_name)
+
+def month_filter_q(field_name, year, month, tz_name=None):
+    """Filters a DateTimeField to one local calendar month; year / month may be str or int."""
+    first_day = date(int(year), int(month), 1)
+    next_first_day = (first_day + timedelta(days=32)).replace(day=1)
+    return local_range_q(field_name, first_day, next_first_day, tz_name)
+
+def day_filter_q(field_name, start_date_input, end_date_input=None):
+    """date_filter_q for a DateField that already holds local dates (e.g. DailyLedgerRollup.day)."""
+    start_dt = _to_date(start_date_input, 'start_date')
+    end_dt = _to_date(end_date_input, 'end_date') if end_date_input else start_dt
+    return Q(**{f"{field_name}__gte": start_dt, f"{field_name}__lte": end_dt})
+
+def day_month_filter_q(field_name, year, month):
+    """month_filter_q for a DateField that already holds local dates."""
+    first_day = date(int(year), int(month), 1)
+    next_first_day = (first_day + timedelta(days=32)).replace(day=1)
+    return Q(**{f"{field_name}__gte": first_day, f"{field_name}__lt": next_first_day})
@@ -13,9 +13,12 @@ from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Sum, Q
-from django.db.models.functions import TruncDate
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Sum, Q, Count
+from .pagination import NetworkPageNumberPagination, paginate_history
+from .balance_cache import get_balances
+from .reference_data import is_withdrawal_window_open
+from .authentication import revoke_tokens
+from rest_framework_simplejwt.settings import api_settings
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes #force_str
 
@@ -26,6 +29,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+NETWORK_MAX_DEPTH = 5 # Levels shown on the network page
+
 
 class TokenVerifyView(APIView):
   authentication_classes = [JWTAuthentication]
@@ -62,7 +67,11 @@ def refresh_token(request):
 def get_user(request):
   user = request.user
   try:
-    serializer = UserSerializer(user)
+    # Wallet and asset fields come from the balance cache rather than the joined rows
+    serializer = UserSerializer(
+      User.objects.select_related('promo_code').get(pk=user.pk),
+      context={'balances': get_balances(user)},
+    )
     return Response(serializer.data, status=200)
   except Exception as e:
     logger.error(f"Error retrieving user {user.username}: {str(e)}")
@@ -153,6 +162,9 @@ def login(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
+  jti = request.auth.payload.get(api_settings.JTI_CLAIM) if request.auth else None
+  if jti:
+    revoke_tokens(UserJWT.objects.filter(access_jti=jti))
   response = Response({'message': 'Logout successful'})
   response.delete_cookie('access_token', path='/')
   response.delete_cookie('refresh_token', path='/')
@@ -297,39 +309,57 @@ def update_user(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_network(request):
+  """
+  Downline up to NETWORK_MAX_DEPTH levels, read from the referral closure.
+  Per-level user counts and asset totals are aggregated in SQL.
+  ?level=N returns only that level, paginated (page, page_size).
+  """
   user = request.user
 
   try:
-    network_level = user.get_indirect_network()
-    all_network_users = []
-    for level in network_level:
-      all_network_users.extend(level)
-
-    network_total = Asset.objects.filter(user__in=all_network_users).count()
-    network_level_asset = Asset.objects.filter(user__in=all_network_users).aggregate(total_asset=Sum('amount'))
-
-    response_data = {
-      'level_1': [],
-      'level_2': [],
-      'level_3': [],
-      'level_4': [],
-      'level_5': [],
-      'total_asset': network_level_asset['total_asset'] or 0,
-      'total_user': network_total,
+    level_stats = (
+      ReferralClosure.objects
+      .filter(ancestor_id=user.id, depth__gte=1, depth__lte=NETWORK_MAX_DEPTH)
+      .values('depth')
+      .annotate(total_user=Count('descendant__asset'), total_asset=Sum('descendant__asset__amount'))
+      .order_by('depth')
+    )
+    levels = {
+      row['depth']: {'level': row['depth'], 'total_user': row['total_user'], 'total_asset': row['total_asset'] or 0}
+      for row in level_stats
     }
+    summary = [levels.get(depth, {'level': depth, 'total_user': 0, 'total_asset': 0}) for depth in range(1, NETWORK_MAX_DEPTH + 1)]
 
-    if len(network_level) >= 1:
-      response_data['level_1'] = UserNetworkSerializer(network_level[0], many=True).data
-    if len(network_level) >= 2:
-      response_data['level_2'] = UserNetworkSerializer(network_level[1], many=True).data
-    if len(network_level) >= 3:
-      response_data['level_3'] = UserNetworkSerializer(network_level[2], many=True).data
-    if len(network_level) >= 4:
-      response_data['level_4'] = UserNetworkSerializer(network_level[3], many=True).data
-    if len(network_level) >= 5:
-      response_data['level_5'] = UserNetworkSerializer(network_level[4], many=True).data
+    downline = (
+      user.get_downline(max_depth=NETWORK_MAX_DEPTH)
+      .select_related('asset')
+      .order_by('network_depth', *User._meta.ordering)
+    )
+
+    level = request.GET.get('level')
+    if level:
+      level = int(level)
+      if not 1 <= level <= NETWORK_MAX_DEPTH:
+        return Response({'error': f'Level must be between 1 and {NETWORK_MAX_DEPTH}'}, status=400)
+      paginator = NetworkPageNumberPagination()
+      page = paginator.paginate_queryset(downline.filter(network_depth=level), request)
+      response = paginator.get_paginated_response(UserNetworkSerializer(page, many=True).data)
+      response.data['summary'] = summary[level - 1]
+      return response
+
+    response_data = {f'level_{depth}': [] for depth in range(1, NETWORK_MAX_DEPTH + 1)}
+    for downline_user in downline:
+      response_data[f'level_{downline_user.network_depth}'].append(downline_user)
+    for depth in range(1, NETWORK_MAX_DEPTH + 1):
+      response_data[f'level_{depth}'] = UserNetworkSerializer(response_data[f'level_{depth}'], many=True).data
+
+    response_data['levels'] = summary
+    response_data['total_asset'] = sum(row['total_asset'] for row in summary)
+    response_data['total_user'] = sum(row['total_user'] for row in summary)
 
     return Response(response_data, status=200)
+  except ValueError:
+    return Response({'error': 'Invalid level'}, status=400)
   except User.DoesNotExist: 
     return Response({'error': 'User does not exist'}, status=400)
   except Exception as e:
@@ -341,9 +371,10 @@ def get_user_network(request):
 def get_wallet(request):
   user = request.user
   try:
-    wallet, _ = Wallet.objects.get_or_create(user=user)
-    serializer = WalletSerializer(wallet)
-    return Response(serializer.data, status=200)
+    wallet = get_balances(user)['wallet']
+    if wallet is None:
+      wallet = WalletSerializer(Wallet.objects.get_or_create(user=user)[0]).data
+    return Response(wallet, status=200)
   except Exception as e:
     logger.error(f"Error retrieving wallet for {user.username}: {str(e)}")
     return Response({'error': str(e)}, status=500)
@@ -353,9 +384,10 @@ def get_wallet(request):
 def get_asset(request):
   user = request.user
   try:
-    asset, _ = Asset.objects.get_or_create(user=user)
-    serializer = AssetSerializer(asset)
-    return Response(serializer.data, status=200)
+    asset = get_balances(user)['asset']
+    if asset is None:
+      asset = AssetSerializer(Asset.objects.get_or_create(user=user)[0]).data
+    return Response(asset, status=200)
   except Exception as e:
     logger.error(f"Error retrieving asset for {user.username}: {str(e)}")
     return Response({'error': str(e)}, status=500)
@@ -379,20 +411,13 @@ def get_profit_transaction(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    profit_tx = Transaction.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_profit_tx = paginator.paginate_queryset(profit_tx, request)
-    
-    serializer = TransactionSerializer(paginated_profit_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    profit_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, profit_tx, TransactionSerializer)
   except Transaction.DoesNotExist:
     return Response({'error': 'Profit Transaction not found'}, status=404)
   except Exception as e:
@@ -412,19 +437,11 @@ def get_commission_transaction(request):
 
     query = Q(user=user, point_type='COMMISSION', transaction_type__in=['AFFILIATE_BONUS', 'INTRODUCER_BONUS', 'MIGRATION'])
     if start_date and end_date:
-      query &= Q(created_at__date__range=[start_date, end_date])
+      query &= date_filter_q('created_at', start_date, end_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
-
-    commission_tx = Transaction.objects.filter(query).order_by('-created_at')
-
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_commission_tx = paginator.paginate_queryset(commission_tx, request)
-    
-    serializer = TransactionSerializer(paginated_commission_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+      query &= month_filter_q('created_at', year, month)
+    commission_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, commission_tx, TransactionSerializer)
   except Transaction.DoesNotExist:
     return Response({'error': 'Commission Transaction not found'}, status=404)
   except Exception as e:
@@ -438,18 +455,17 @@ def get_accumulate_commission_tx(request):
   try:
     month = request.GET.get('month')
     year = request.GET.get('year')
-    # Base queryset
-    qs = Transaction.objects.filter(point_type='COMMISSION', user=user, transaction_type__in=['AFFILIATE_BONUS', 'INTRODUCER_BONUS', 'MIGRATION'])
+    # Base queryset: one rollup row per day and bonus type instead of every transaction
+    qs = DailyLedgerRollup.objects.filter(point_type='COMMISSION', user=user, transaction_type__in=['AFFILIATE_BONUS', 'INTRODUCER_BONUS', 'MIGRATION'])
 
     # Optional filtering by month and year
     if month and year:
-      qs = qs.filter(created_at__month=month, created_at__year=year)
+      qs = qs.filter(day_month_filter_q('day', year, month))
 
     daily_commission_tx = (
       qs
-      .annotate(day=TruncDate('created_at'))  # Extract just the date part
       .values('day')  # Group by day
-      .annotate(total=Sum('amount'))  # Sum amounts per day
+      .annotate(total=Sum('total_amount'))  # Sum amounts per day
       .order_by('-day')
     )
 
@@ -478,20 +494,13 @@ def get_transfer_transaction(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    transfer_tx = Transaction.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_transfer_tx = paginator.paginate_queryset(transfer_tx, request)
-
-    serializer = TransactionSerializer(paginated_transfer_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    transfer_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, transfer_tx, TransactionSerializer)
   except Transaction.DoesNotExist:
     return Response({'error': 'Transfer Transaction not found'}, status=404)
   except Exception as e:
@@ -518,20 +527,13 @@ def get_convert_transaction(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    convert_tx = Transaction.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_convert_tx = paginator.paginate_queryset(convert_tx, request)
-
-    serializer = TransactionSerializer(paginated_convert_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    convert_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, convert_tx, TransactionSerializer)
   except Transaction.DoesNotExist:
     return Response({'error': 'Convert Transaction not found'}, status=404)
   except Exception as e:
@@ -558,20 +560,13 @@ def get_profit_commission_wd_transaction(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    profit_commission_wd_tx = Transaction.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_profit_commission_wd_tx = paginator.paginate_queryset(profit_commission_wd_tx, request)
-
-    serializer = TransactionSerializer(paginated_profit_commission_wd_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    profit_commission_wd_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, profit_commission_wd_tx, TransactionSerializer)
 
   except Transaction.DoesNotExist:
     return Response({'error': 'Profit/Commission Withdrawal Transaction not found'}, status=404)
@@ -590,11 +585,11 @@ def get_profit_commission_wd_total(request):
     query = Q(user=user, point_type__in=['PROFIT', 'COMMISSION'], transaction_type__in=['WITHDRAWAL'])
     if start_date:
       if end_date:
-        query &= date_filter_q('created_at', start_date, end_date)
+        query &= day_filter_q('day', start_date, end_date)
       else:
-        query &= date_filter_q('created_at', start_date)
+        query &= day_filter_q('day', start_date)
 
-    profit_commission_wd_total = Transaction.objects.filter(query).aggregate(total_amount=Sum('amount'))['total_amount'] or 0
+    profit_commission_wd_total = DailyLedgerRollup.objects.filter(query).aggregate(total_amount=Sum('total_amount'))['total_amount'] or 0
     return Response({'total_amount': profit_commission_wd_total}, status=200)
 
   except Transaction.DoesNotExist:
@@ -624,20 +619,13 @@ def get_asset_transaction(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    asset_tx = Transaction.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_asset_tx = paginator.paginate_queryset(asset_tx, request)
-
-    serializer = TransactionSerializer(paginated_asset_tx, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    asset_tx = TransactionSerializer.with_related(Transaction.objects.filter(query))
+    return paginate_history(request, asset_tx, TransactionSerializer)
   except Transaction.DoesNotExist:
     return Response({'error': 'Asset Transaction not found'}, status=404)
   except Exception as e:
@@ -700,20 +688,13 @@ def get_deposit_lock(request):
       else:
         query &= date_filter_q('created_at', start_date)
     if month and year:
-      query &= Q(created_at__year=year, created_at__month=month)
+      query &= month_filter_q('created_at', year, month)
     if search:
       query &= Q(description__icontains=search)
     if status:
       query &= Q(status=status)
-
-    deposit_lock = DepositLock.objects.filter(query).order_by('-created_at')
-    # 📄 Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = int(request.GET.get('page_size', 30))
-    paginated_deposit_lock = paginator.paginate_queryset(deposit_lock, request)
-
-    serializer = DepositLockSerializer(paginated_deposit_lock, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    deposit_lock = DepositLockSerializer.with_related(DepositLock.objects.filter(query))
+    return paginate_history(request, deposit_lock, DepositLockSerializer)
   except DepositLock.DoesNotExist:
     return Response({'error': 'Deposit lock not found'}, status=404)
   except Exception as e:
@@ -965,7 +946,7 @@ def withdraw_asset(request):
   if amount <= 0 or amount > 1000:
     return Response({'error': 'Maximum withdrawal amount is 1000'}, status=400)
   
-  tx_asset_wd = Transaction.objects.filter(user=user, transaction_type='ASSET_WITHDRAWAL', created_at__date=today_my).aggregate(total_withdrawn=Sum('amount'))['total_withdrawn'] or Decimal('0.00')
+  tx_asset_wd = Transaction.objects.filter(date_filter_q('created_at', today_my), user=user, transaction_type='ASSET_WITHDRAWAL').aggregate(total_withdrawn=Sum('amount'))['total_withdrawn'] or Decimal('0.00')
   if tx_asset_wd + amount > 1000:
     return Response({'error': 'Weekly asset withdrawal limit of 1000 exceeded'}, status=400)
 
@@ -999,11 +980,10 @@ def get_daily_total_profit(request):
     start_date = request.GET.get('start_date', today)
     end_date = request.GET.get('end_date', today)
 
-    transaction = Transaction.objects.filter(user=user, transaction_type__in=['DISTRIBUTION',
-    'AFFILIATE_BONUS', 'INTRODUCER_BONUS'],
-    created_at__date__range=[start_date, end_date]).values("transaction_type").annotate(
-      total_amount=Sum("amount")
-    )
+    transaction = DailyLedgerRollup.objects.filter(day_filter_q('day', start_date, end_date), user=user,
+    transaction_type__in=['DISTRIBUTION', 'AFFILIATE_BONUS', 'INTRODUCER_BONUS']).values("transaction_type").annotate(
+      total_amount=Sum("total_amount")
+    ).order_by("transaction_type")
     return Response(transaction, status=200)
   except Exception as e:
     logger.error(f"Error retrieving daily total profit for {user.username}: {str(e)}")
@@ -1041,7 +1021,7 @@ def withdrawal_window_status(request):
 
   try:
     today = timezone.localdate()
-    is_open = WithdrawalWindow.objects.filter(date=today, is_active=True).exists()
+    is_open = is_withdrawal_window_open(today)
     return Response({'is_open': is_open}, status=200)
   except ValidationError as e:
     logger.error(f"Validation Error for {user.username}: {str(e)}")
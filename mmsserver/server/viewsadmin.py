@@ -1,6 +1,13 @@
 from .models import *
 from .serializers import *
 from .utils import *
+from .jobs import enqueue_job, get_active_job
+from .dashboard import SUPER_USER_ID, get_dashboard_summary, record_bulk_update
+from .balance_cache import balance_cache_stats, invalidate_balances
+from .reference_data import (
+  get_monthly_finalized_profits, get_operational_profit, get_yearly_performance, is_withdrawal_window_open, reference_data,
+)
+from mmsserver.middleware.query_metrics import request_metrics
 import calendar
 from decimal import Decimal
 from rest_framework.authentication import authenticate
@@ -13,6 +20,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Sum, Q
 from django.db.models.functions import TruncDate
 from rest_framework.pagination import PageNumberPagination
+from .pagination import paginate_history
 from datetime import datetime
 import stripe
 from django.conf import settings
@@ -89,6 +97,8 @@ def reset_all_wallet_balances(request):
               'updated_at'
             ]
           )
+          record_bulk_update(wallets)
+          invalidate_balances(wallet.user_id for wallet in wallets)
 
       return Response(f"Reset successful for {wallets.count()} wallets.")
     else:
@@ -148,9 +158,8 @@ def manage_operational_profit(request):
 
   try:
     if request.method == 'GET':
-      try:
-        operational_profit = OperationalProfit.objects.get(active_day_profit=day, active_month_profit=month, active_year_profit=year)
-      except OperationalProfit.DoesNotExist:
+      operational_profit = get_operational_profit(day, month, year)
+      if operational_profit is None:
         return Response({'error': 'Operational profit not found'}, status=404)
       serializer = OperationalProfitSerializer(operational_profit)
       return Response(serializer.data, status=200)
@@ -194,19 +203,13 @@ def manage_monthly_finalized_profit(request):
   try:
     
     if request.method == 'GET':
-      queryset = MonthlyFinalizedProfit.objects.all()
       year_filter = None
       if year:
         try:
           year_filter = int(year)
-          queryset = queryset.filter(year=year_filter)
         except ValueError:
           return Response({'error': 'Year query parameter must be an integer.'}, status=400)   
-      else:
-        queryset = MonthlyFinalizedProfit.objects.all()   
-      queryset = queryset.order_by('year', 'month') 
-      serializer = MonthlyFinalizedProfitSerializer(queryset, many=True)
-      return Response(serializer.data, status=200)
+      return Response(get_monthly_finalized_profits(year_filter), status=200)
 
     if user.is_staff:
       if request.method == 'POST':
@@ -318,7 +321,7 @@ def get_all_user(request):
         sort_by = 'created_at'  # fallback to safe default
 
       sort_prefix = '' if order == 'asc' else '-'
-      all_user = User.objects.filter(query).order_by(f'{sort_prefix}{sort_by}').distinct()
+      all_user = UserSerializer.with_related(User.objects.filter(query)).order_by(f'{sort_prefix}{sort_by}').distinct()
 
       # 📄 Pagination
       paginator = PageNumberPagination()
@@ -340,7 +343,7 @@ def get_all_network(request):
   user = request.user
   try:
     if user.is_staff:
-      all_network = user.get_all_network(include_self=True)
+      all_network = user.get_all_network(include_self=True).select_related('asset')
       serializer = UserNetworkSerializer(all_network, many=True)
       return Response(serializer.data, status=200)
     else:
@@ -393,15 +396,8 @@ def get_all_transaction(request):
         end_date = timezone.now()
         start_date = end_date - timedelta(days=30)
 
-      transactions = Transaction.objects.filter(query).order_by('-created_at')
-
-      # 📄 Pagination
-      paginator = PageNumberPagination()
-      paginator.page_size = int(request.GET.get('page_size', 30))
-      paginated_transactions = paginator.paginate_queryset(transactions, request)
-
-      serializer = TransactionSerializer(paginated_transactions, many=True)
-      return paginator.get_paginated_response(serializer.data)
+      transactions = TransactionSerializer.with_related(Transaction.objects.filter(query))
+      return paginate_history(request, transactions, TransactionSerializer)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except Exception as e:
@@ -415,9 +411,14 @@ def get_pending_transaction(request):
   user = request.user
   try:
     if user.is_staff:
-      pending_transaction = Transaction.objects.filter(request_status='PENDING', transaction_type__in=['ASSET_PLACEMENT', 'ASSET_WITHDRAWAL']).order_by('-created_at')
-      serializer= TransactionSerializer(pending_transaction, many=True)
-      return Response(serializer.data, status=200)
+      pending_types = ['ASSET_PLACEMENT', 'ASSET_WITHDRAWAL']
+      pending_transaction = Transaction.objects.filter(request_status='PENDING', transaction_type__in=pending_types)
+      totals = {}
+      for transaction_type in pending_types:
+        type_q = Q(transaction_type=transaction_type)
+        totals[f'count_{transaction_type.lower()}'] = models.Count('pk', filter=type_q)
+        totals[f'total_{transaction_type.lower()}'] = models.Sum('amount', filter=type_q)
+      return paginate_history(request, TransactionSerializer.with_related(pending_transaction), TransactionSerializer, totals)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except Exception as e:
@@ -450,18 +451,15 @@ def get_all_withdrawal_request(request):
         else:
           query &= date_filter_q('created_at', start_date)
       if month and year:
-        query &= Q(created_at__year=year, created_at__month=month)
-
-      all_withdrawal_request = WithdrawalRequest.objects.filter(query).order_by('-created_at')
-      serializer = WithdrawalRequestSerializer(all_withdrawal_request, many=True)
-
-      total_actual_wd = WithdrawalRequest.objects.filter(query).aggregate(
-        total=models.Sum('actual_amount'))['total'] or 0
-
-      return Response({
-        'results': serializer.data,
-        'total_actual_wd': total_actual_wd
-      }, status=200)
+        query &= month_filter_q('created_at', year, month)
+
+      all_withdrawal_request = WithdrawalRequestSerializer.with_related(WithdrawalRequest.objects.filter(query))
+      totals = {'total_actual_wd': models.Sum('actual_amount'), 'total_fee': models.Sum('fee')}
+      for status in RequestStatus.names:
+        totals[f'count_{status.lower()}'] = models.Count('pk', filter=Q(transaction__request_status=status))
+      for point_type in ('PROFIT', 'COMMISSION'):
+        totals[f'count_{point_type.lower()}'] = models.Count('pk', filter=Q(point_type=point_type))
+      return paginate_history(request, all_withdrawal_request, WithdrawalRequestSerializer, totals)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except Exception as e:
@@ -474,9 +472,11 @@ def get_all_deposit_lock(request):
   user = request.user
   try:
     if user.is_staff:
-      all_deposit_lock = DepositLock.objects.all()
-      serializer = DepositLockSerializer(all_deposit_lock, many=True)
-      return Response(serializer.data, status=200)
+      all_deposit_lock = DepositLockSerializer.with_related(DepositLock.objects.all())
+      totals = {'total_freeze_amount': models.Sum('freeze_amount')}
+      for status in RequestStatus.names:
+        totals[f'count_{status.lower()}'] = models.Count('pk', filter=Q(deposit__request_status=status))
+      return paginate_history(request, all_deposit_lock, DepositLockSerializer, totals)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except Exception as e:
@@ -538,7 +538,7 @@ def get_user_info(request):
 
   try:
     if user.is_staff:
-      get_user = User.objects.get(id=user_id)
+      get_user = UserSerializer.with_related(User.objects.all()).get(id=user_id)
       serializer = UserSerializer(get_user)
       return Response(serializer.data, status=200)
     else:
@@ -581,24 +581,19 @@ def update_profit_sharing(request):
   try:
     if user.is_staff:
       userSuper = User.objects.get(is_superuser=True)
-      wallet, _ = Wallet.objects.get_or_create(user=userSuper)
-      wallet.profit_point_balance += Decimal(amount)
-      wallet.save()
-      Transaction.objects.create(
-        user=userSuper,
-        wallet=wallet,
-        transaction_type='SHARING_PROFIT',
-        point_type='PROFIT',
-        amount=amount,
-        description=f"SHARING PROFIT: {amount}",
-        reference=f"SHARING PROFIT - {amount}"
-      )
-      serializer = WalletSerializer(wallet, data=request.data, partial=True)
-      if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=200)
-      else:
-        return Response(serializer.errors, status=401)
+      Wallet.objects.get_or_create(user=userSuper)
+      with db_transaction.atomic():
+        wallet = change_balances(Wallet, userSuper.id, {'profit_point_balance': Decimal(amount)})
+        Transaction.objects.create(
+          user=userSuper,
+          wallet=wallet,
+          transaction_type='SHARING_PROFIT',
+          point_type='PROFIT',
+          amount=amount,
+          description=f"SHARING PROFIT: {amount}",
+          reference=f"SHARING PROFIT - {amount}"
+        )
+      return Response(WalletSerializer(wallet).data, status=200)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except Exception as e:
@@ -622,14 +617,18 @@ def distribute_profit(request):
       today_my = localtime(now(), malaysia_tz).date()
 
       asset_req = Transaction.objects.filter(transaction_type='ASSET_PLACEMENT', request_status='PENDING')
-      profit_released = Transaction.objects.filter(transaction_type='DISTRIBUTION', created_at__date=today_my)
+      profit_released = Transaction.objects.filter(date_filter_q('created_at', today_my), transaction_type='DISTRIBUTION')
+      # An unfinished checkpoint means an earlier run stopped part-way; triggering again resumes it.
+      resumable = DistributionCheckpoint.objects.filter(distribution_date=today_my, completed_at__isnull=True).exists()
       if asset_req.exists():
         return Response({'error': 'There are pending asset placements. Please process them before distributing profit.'}, status=400)
-      elif profit_released.exists():
+      elif profit_released.exists() and not resumable:
         return Response({'error': 'Profit has already been distributed for today.'}, status=400)
+      elif get_active_job('DISTRIBUTE_PROFIT'):
+        return Response({'error': 'Profit distribution is already in progress.'}, status=400)
       else:
-        result = distribute_profit_manually()
-        return Response(result, status=200)
+        job = enqueue_job('DISTRIBUTE_PROFIT', created_by=user)
+        return Response(JobSerializer(job).data, status=202)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   except ValidationError as e:
@@ -689,8 +688,10 @@ def remove_welcome_bonus(request):
         return Response({'message': len(expired_100_users)}, status=200)
         
       elif request.method == 'POST':
-        result = remove_welcome_bonus_100()
-        return Response(result, status=200)
+        if get_active_job('REMOVE_WELCOME_BONUS'):
+          return Response({'error': 'Welcome bonus removal is already in progress.'}, status=400)
+        job = enqueue_job('REMOVE_WELCOME_BONUS', created_by=user)
+        return Response(JobSerializer(job).data, status=202)
       else:
         return Response({'error': 'Method not allowed'}, status=405)
       
@@ -807,6 +808,40 @@ def process_withdrawal_commission(request):
     return Response({'error': str(e)}, status=500)
   
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def process_requests_batch(request):
+  """
+  Approves or rejects a list of pending requests of one type in a single
+  transaction: {'type': ASSET_PLACEMENT | ASSET_WITHDRAWAL (Transaction ids)
+  or PROFIT_WITHDRAWAL | COMMISSION_WITHDRAWAL (WithdrawalRequest ids),
+  'action': Approve | Reject, 'ids': [...], 'reference': ...}. Returns one
+  result per id; requests that could not be processed carry an error.
+  """
+  user = request.user
+  request_type = request.data.get('type')
+  action = request.data.get('action')
+  ids = request.data.get('ids')
+  reference = request.data.get('reference')
+
+  if not request_type or not action or not ids:
+    return Response({'error': 'Type, action and ids are required'}, status=400)
+
+  try:
+    if user.is_staff:
+      results = BatchApprovalService.process(request_type, ids, action, reference)
+      failed = sum(1 for result in results if result['status'] == 'FAILED')
+      return Response({'processed': len(results) - failed, 'failed': failed, 'results': results}, status=200)
+    else:
+      return Response({'error': 'Permission denied'}, status=403)
+  except ValidationError as e:
+    logger.error(f"Validation error processing request batch: {str(e)}")
+    return Response({'error': list(e.messages)}, status=400)
+  except Exception as e:
+    logger.error(f"Error processing request batch: {str(e)}")
+    return Response({'error': str(e)}, status=500)
+  
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def process_verification(request):
@@ -843,106 +878,32 @@ def get_info_dashboard(request):
 
   try:
     if user.is_staff:
-      
-      all_profit_balance = Wallet.objects.aggregate(
-        total=models.Sum('profit_point_balance'))['total'] or 0 
-      admin_profit = Wallet.objects.filter(user_id__in=[
-        'MMS00QVS', 'MMS01FXC' # mmssuper, MMSAdmin
-      ]).aggregate(total=models.Sum('profit_point_balance'))['total'] or 0
-      actual_profit_balance = all_profit_balance - admin_profit
-      print(f'admin p: {admin_profit}')
-
-      all_affiliate_balance = Wallet.objects.aggregate(
-        total=models.Sum('affiliate_point_balance'))['total'] or 0
-      admin_affiliate = Wallet.objects.filter(user_id__in=[
-        'MMS01FXC'
-      ]).aggregate(total=models.Sum('affiliate_point_balance'))['total'] or 0
-      actual_affiliate_balance = all_affiliate_balance - admin_affiliate
-      print(f'admin af: {admin_affiliate}')
-
-      all_introducer_balance = Wallet.objects.aggregate(
-        total=models.Sum('introducer_point_balance'))['total'] or 0
-      admin_introducer = Wallet.objects.filter(user_id__in=['MMS01FXC']).aggregate(total=models.Sum('introducer_point_balance'))['total'] or 0
-      actual_introducer_balance = all_introducer_balance - admin_introducer
-      print(f'admin i: {admin_introducer}')
-
-      total_profit_balance = actual_profit_balance + actual_affiliate_balance + actual_introducer_balance
-      
-
-      total_convert_amount = Transaction.objects.filter(transaction_type='CONVERT').aggregate(
-        total=models.Sum('amount'))['total'] or 0
-      
-
-      daily_profits = (
-        Transaction.objects
-        .filter(transaction_type='DISTRIBUTION')
-        .annotate(day=TruncDate('created_at'))  # Extract just the date part
-        .values('day')  # Group by day
-        .annotate(total=Sum('amount'))  # Sum amounts per day
-        .order_by('day')
-      )
-      
-
-      total_withdraw_amount = WithdrawalRequest.objects.aggregate(
-        total=models.Sum('actual_amount'))['total'] or 0
-      
-      total_withdraw_fee = WithdrawalRequest.objects.aggregate(
-        total=models.Sum('fee'))['total'] or 0 
-      
+      # Balances, totals and the daily profit series come from the incrementally
+      # maintained dashboard counters (server/dashboard.py) instead of full-table aggregates.
+      summary = get_dashboard_summary()
 
       if year is not None:
         try:
-          performance = Performance.objects.filter(year=year).order_by('month')
-          serializer = PerformanceSerializer(performance, many=True)
+          monthly_data = get_yearly_performance(year)
 
           # Calculate yearly total
           yearly_totals = {
-            'total_deposit': sum(Decimal(p['total_deposit']) for p in serializer.data),
-            'total_gain_a': sum(Decimal(p['total_gain_a']) for p in serializer.data),
-            'total_gain_z': sum(Decimal(p['total_gain_z']) for p in serializer.data),
+            'total_deposit': sum(Decimal(p['total_deposit']) for p in monthly_data),
+            'total_gain_a': sum(Decimal(p['total_gain_a']) for p in monthly_data),
+            'total_gain_z': sum(Decimal(p['total_gain_z']) for p in monthly_data),
           }
 
-        except Performance.DoesNotExist:
-          return Response({'error': f'Performance for year {year} not found,'}, status=404)
         except Exception as e:
           logger.error(f"Error retrieving performance data for {year}: {str(e)}")
           return Response({'error': str(e)}, status=500)    
 
-      total_user = User.objects.count()
-
-
-      admin_asset = Asset.objects.filter(
-        user_id__in=[
-          'MMS00QVS', 'MMS01FXC', 'MMS0216J',  'MMS02O5G', 'MMS02GKX'
-        ]).aggregate(total=models.Sum('amount'))['total'] or 0
-      print(f'admin as: {admin_asset}')
-      all_asset_amount = Asset.objects.aggregate(
-        total=models.Sum('amount'))['total'] or 0  
-      total_asset_amount = all_asset_amount - admin_asset
-      all_asset_above_10k = Asset.objects.filter(amount__gte=10000).aggregate(total=models.Sum('amount'))['total'] or 0
-      asset_above_10k = Decimal(all_asset_above_10k) - Decimal(admin_asset)
-      asset_below_10k = Asset.objects.filter(amount__lt=10000).aggregate(total=models.Sum('amount'))['total'] or 0
-      user_asset_above_10k = Asset.objects.filter(amount__gte=10000).count()
-      user_asset_below_10k = Asset.objects.filter(amount__lt=10000).count()
-
-      super_user = User.objects.get(id='MMS00QVS')
-      super_user_profit = Wallet.objects.filter(user=super_user).aggregate(
+      super_user_profit = Wallet.objects.filter(user_id=SUPER_USER_ID).aggregate(
         total=models.Sum('profit_point_balance'))['total'] or 0
 
       return Response({
-        'total_asset_amount': total_asset_amount, 
-        'total_profit_balance': total_profit_balance,
-        'total_convert_amount': total_convert_amount,
-        'daily_profits': list(daily_profits),
-        'total_withdraw_amount': total_withdraw_amount,
-        'total_withdraw_fee': total_withdraw_fee,
-        'monthly_data': serializer.data,
+        **summary,
+        'monthly_data': monthly_data,
         'yearly_totals': yearly_totals,
-        'total_user': total_user,
-        'asset_above_10k': asset_above_10k,
-        'asset_below_10k': asset_below_10k,
-        'user_asset_above_10k': user_asset_above_10k,
-        'user_asset_below_10k': user_asset_below_10k,
         'super_user_profit': super_user_profit,
       }, status=200)
     else: 
@@ -1060,11 +1021,9 @@ def withdrawal_window(request):
     
       if request.method == 'GET':
         today = timezone.localdate()
-        window = WithdrawalWindow.objects.filter(date=today).first()
-        is_active = window.is_active if window else False
         return Response({
-          'is_active': is_active if window else False, 
-          'date': today if window else today
+          'is_active': is_withdrawal_window_open(today),
+          'date': today
         }, status=200) 
 
       elif request.method == 'POST':
@@ -1099,9 +1058,11 @@ def revoke_profit_distribution_view(request):
       # target_date_str = request.data.get('target_date')  # e.g. "2026-07-08"
       # target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date() if target_date_str else None
       # result = revoke_profit_distribution(target_date=target_date)
-      result = revoke_profit_distribution()
-      print(f"Profit distribution revoked: {result}")
-      return Response(result, status=200)
+      if get_active_job('REVOKE_PROFIT_DISTRIBUTION'):
+        return Response({'error': 'Profit distribution revoke is already in progress.'}, status=400)
+      target_date = timezone.localdate()
+      job = enqueue_job('REVOKE_PROFIT_DISTRIBUTION', created_by=user, payload={'target_date': target_date.isoformat()})
+      return Response(JobSerializer(job).data, status=202)
     else:
       return Response({'error': 'Permission denied'}, status=403)
   
@@ -1110,4 +1071,56 @@ def revoke_profit_distribution_view(request):
     return Response({'error': str(e)}, status=400)
   except Exception as e:
     logger.error(f"Exception Error: {str(e)}")
-    return Response({'error': str(e)}, status=500)
\ No newline at end of file
+    return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_job_status(request, job_id):
+  """
+  Progress of a background job: rows processed / remaining, elapsed time and,
+  once finished, the job result or error.
+  """
+  user = request.user
+
+  try:
+    if user.is_staff:
+      job = Job.objects.get(id=job_id)
+      return Response(JobSerializer(job).data, status=200)
+    else:
+      return Response({'error': 'Permission denied'}, status=403)
+  except Job.DoesNotExist:
+    return Response({'error': 'Job not found'}, status=404)
+  except Exception as e:
+    logger.error(f"Error fetching job status: {str(e)}")
+    return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def get_request_metrics(request):
+  """
+  Per-route latency / DB time / query count percentiles collected by
+  QueryMetricsMiddleware, and the balance and reference data cache hit
+  ratios, in the worker process that serves this request. DELETE clears the
+  samples.
+  """
+  user = request.user
+
+  try:
+    if user.is_staff:
+      if request.method == 'DELETE':
+        request_metrics.reset()
+        balance_cache_stats.reset()
+        reference_data.reset_stats()
+        return Response({'message': 'Request metrics cleared'}, status=200)
+      return Response({
+        'routes': request_metrics.summary(),
+        'balance_cache': balance_cache_stats.summary(),
+        'reference_data': reference_data.summary(),
+      }, status=200)
+    else:
+      return Response({'error': 'Permission denied'}, status=403)
+  except Exception as e:
+    logger.error(f"Error retrieving request metrics: {str(e)}")
+    return Response({'error': str(e)}, status=500)
@@ -1,13 +1,60 @@
 from .models import *
 from .serializers import *
-import pandas as pd
-from io import BytesIO
+import csv
+import tempfile
+import xlsxwriter
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 
+EXPORT_CHUNK_SIZE = 2000 # Rows fetched per round trip while exporting
+
+
+class _Echo:
+  """Pseudo-buffer for csv.writer: returns each formatted line instead of storing it."""
+  def write(self, value):
+    return value
+
+
+def _export_response(request, rows, headers, filename, sheet_name):
+  """
+  Streams `rows` (an iterator of tuples matching `headers`) without holding
+  the report in memory.
+  ?file_format=csv streams CSV line by line; the default xlsx is written with
+  xlsxwriter's constant_memory mode to a temporary file that is then
+  streamed back in chunks.
+  """
+  if request.GET.get('file_format') == 'csv':
+    writer = csv.writer(_Echo())
+
+    def lines():
+      yield writer.writerow(headers)
+      for row in rows:
+        yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+  output = tempfile.TemporaryFile()
+  workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+  worksheet = workbook.add_worksheet(sheet_name)
+  header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+  worksheet.write_row(0, 0, headers, header_format)
+  for row_index, row in enumerate(rows, start=1):
+    worksheet.write_row(row_index, 0, row)
+  workbook.close()
+
+  output.seek(0)
+  return FileResponse(
+    output,
+    as_attachment=True,
+    filename=f'{filename}.xlsx',
+    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+  )
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -20,40 +67,33 @@ def export_all_user(request):
   print(f'User without Wallet: {user_without_wallet}')
 
 
-  # Build DataFrame
-  data = []
-  for user in users:
-
-    data.append({
-      "Joined Date": user.created_at.strftime('%d/%m/%Y'),
-      "Joined Time": user.created_at.strftime('%I:%M:%S %p'),
-      "User ID": user.id,
-      "Username": user.username,
-      "I/C": user.ic,
-      "Email": user.email,
-      "Referral ID": user.referred_by,
-      "Verification": user.verification_status,
-      "Wallet Address": user.wallet_address if user.wallet_address else '-',
-      'Asset Amount': user.asset.amount if hasattr(user, 'asset') else 0,
-      "Register Point": user.wallet.master_point_balance if hasattr(user, 'wallet') else 0,
-      "Profit Point": user.wallet.profit_point_balance if hasattr(user, 'wallet') else 0,
-      "Affiliate Point": user.wallet.affiliate_point_balance if hasattr(user, 'wallet') else 0,
-      "Introducer Point": user.wallet.introducer_point_balance if hasattr(user, 'wallet') else 0,
-    })
-  df = pd.DataFrame(data)
-
-  # Export to Excel
-  buffer = BytesIO()
-  with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-    df.to_excel(writer, sheet_name='User Report', index=False)
-
-  buffer.seek(0)
-  response = HttpResponse(
-    buffer.getvalue(),
-    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-  )
-  response['Content-Disposition'] = 'attachment; filename="user_report.xlsx"'
-  return response
+  headers = [
+    "Joined Date", "Joined Time", "User ID", "Username", "I/C", "Email", "Referral ID", "Verification",
+    "Wallet Address", "Asset Amount", "Register Point", "Profit Point", "Affiliate Point", "Introducer Point",
+  ]
+
+  def rows():
+    for user in users.select_related('asset', 'wallet').iterator(chunk_size=EXPORT_CHUNK_SIZE):
+      asset = getattr(user, 'asset', None)
+      wallet = getattr(user, 'wallet', None)
+      yield (
+        user.created_at.strftime('%d/%m/%Y'),
+        user.created_at.strftime('%I:%M:%S %p'),
+        user.id,
+        user.username,
+        user.ic,
+        user.email,
+        user.referred_by,
+        user.verification_status,
+        user.wallet_address if user.wallet_address else '-',
+        asset.amount if asset else 0,
+        wallet.master_point_balance if wallet else 0,
+        wallet.profit_point_balance if wallet else 0,
+        wallet.affiliate_point_balance if wallet else 0,
+        wallet.introducer_point_balance if wallet else 0,
+      )
+
+  return _export_response(request, rows(), headers, 'user_report', 'User Report')
 
 
 @api_view(['GET'])
@@ -61,40 +101,32 @@ def export_all_user(request):
 def export_all_verification(request):
   users = User.objects.all().order_by('-created_at')
 
-  # Build DataFrame
-  data = []
-  for user in users:
-    data.append({
-      "User ID": user.id,
-      "Username": user.username,
-      "First Name": user.first_name,
-      "Last Name": user.last_name,
-      "I/C": user.ic,
-      "Phone": user.phone_no,
-      "Email": user.email,
-      "Address Line": user.address_line,
-      "City": user.address_city,
-      "State": user.address_state,
-      "Poscode": user.address_postcode,
-      "Country": user.address_country,
-      "Document Link": user.ic_document_url,
-      "Verification Status": user.verification_status,
-      "Welcome Bonus": user.is_campro,
-    })
-  df = pd.DataFrame(data)
-
-  # Export to Excel
-  buffer = BytesIO()
-  with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-    df.to_excel(writer, sheet_name='User Verification Report', index=False)
-
-  buffer.seek(0)
-  response = HttpResponse(
-    buffer.getvalue(),
-    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-  )
-  response['Content-Disposition'] = 'attachment; filename="user_verification_report.xlsx"'
-  return response
+  headers = [
+    "User ID", "Username", "First Name", "Last Name", "I/C", "Phone", "Email", "Address Line", "City",
+    "State", "Poscode", "Country", "Document Link", "Verification Status", "Welcome Bonus",
+  ]
+
+  def rows():
+    for user in users.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+      yield (
+        user.id,
+        user.username,
+        user.first_name,
+        user.last_name,
+        user.ic,
+        user.phone_no,
+        user.email,
+        user.address_line,
+        user.address_city,
+        user.address_state,
+        user.address_postcode,
+        user.address_country,
+        user.ic_document_url,
+        user.verification_status,
+        user.is_campro,
+      )
+
+  return _export_response(request, rows(), headers, 'user_verification_report', 'User Verification Report')
 
 
 @api_view(['GET'])
@@ -119,34 +151,26 @@ def export_all_tx(request):
   if start_date or end_date:
     query &= Q(created_at__range=[start_date, end_date])  
 
-  txn = Transaction.objects.filter(query).order_by('-created_at')
-
-  # Build DataFrame
-  data = []
-  for tx in txn:
-    data.append({
-      "Created Date": tx.created_at.strftime('%d/%m/%Y'),
-      "Created Time": tx.created_at.strftime('%I:%M:%S %p'),
-      "User ID": tx.user.id,
-      "Username": tx.user.username,
-      "Point Type": tx.point_type,
-      "Transaction Type": tx.transaction_type,
-      "Amount": tx.amount,
-      "Status": tx.request_status,
-      "Description": tx.description,
-      "Reference": tx.reference,
-    })
-  df = pd.DataFrame(data)
-
-  # Export to Excel
-  buffer = BytesIO()
-  with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-    df.to_excel(writer, sheet_name='Transactions Report', index=False)
-
-  buffer.seek(0)
-  response = HttpResponse(
-    buffer.getvalue(),
-    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-  )
-  response['Content-Disposition'] = 'attachment; filename="all_transactions_report.xlsx"'
-  return response
\ No newline at end of file
+  txn = Transaction.objects.filter(query).select_related('user').order_by('-created_at')
+
+  headers = [
+    "Created Date", "Created Time", "User ID", "Username", "Point Type", "Transaction Type",
+    "Amount", "Status", "Description", "Reference",
+  ]
+
+  def rows():
+    for tx in txn.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+      yield (
+        tx.created_at.strftime('%d/%m/%Y'),
+        tx.created_at.strftime('%I:%M:%S %p'),
+        tx.user.id if tx.user else None,
+        tx.user.username if tx.user else None,
+        tx.point_type,
+        tx.transaction_type,
+        tx.amount,
+        tx.request_status,
+        tx.description,
+        tx.reference,
+      )
+
+  return _export_response(request, rows(), headers, 'all_transactions_report', 'Transactions Report')